@@ -0,0 +1,312 @@
+"""Static checks over the tables of a decoded bpd.
+
+Unlike building a graph, which stops at the first bad index, this reports every problem it finds.
+Each sequence is checked in time linear to the size of its tables: one pass over the events and
+behaviors to validate indexes and collect links, then a walk from the events for reachability,
+and Tarjan's algorithm over the zero delay links to find cycles.
+"""
+
+from __future__ import annotations
+
+import json
+from collections import deque
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass, field
+from typing import IO, Any
+
+from bpd_grapher.model import Bpd, Sequence, parse_arrayindexandlength
+
+ERROR = "error"
+WARNING = "warning"
+
+DANGLING_INDEX = "dangling_index"
+NONE_BEHAVIOR = "none_behavior"
+UNREACHABLE = "unreachable"
+ZERO_DELAY_CYCLE = "zero_delay_cycle"
+UNUSED_VARIABLE = "unused_variable"
+
+# Behaviors which only fire their outputs after some time, so loops through them are fine.
+DELAYING_CLASSES = frozenset({"Behavior_Delay", "Behavior_Metronome"})
+
+
+@dataclass
+class Issue:
+    """A single problem found in a sequence.
+
+    The index lists hold the events, behaviors and variables involved, in the order they're
+    mentioned in the message.
+    """
+
+    kind: str
+    severity: str
+    sequence: int
+    message: str
+    events: list[int] = field(default_factory=list)
+    behaviors: list[int] = field(default_factory=list)
+    variables: list[int] = field(default_factory=list)
+
+
+class _SequenceChecker:
+    def __init__(self, sequence: Sequence, sequence_idx: int) -> None:
+        self.sequence = sequence
+        self.sequence_idx = sequence_idx
+        self.issues: list[Issue] = []
+        # Valid links out of each behavior, as (target, delay).
+        self.behavior_links: list[list[tuple[int, float]]] = [[] for _ in sequence.behaviors]
+        self.event_targets: list[int] = []
+        self.used_variables = [False] * len(sequence.variables)
+        self.link_counts = [0] * len(sequence.behaviors)
+
+    def issue(self, kind: str, severity: str, message: str, **indexes: list[int]) -> None:
+        self.issues.append(Issue(kind, severity, self.sequence_idx, message, **indexes))
+
+    def describe(self, kind: str, idx: int) -> str:
+        if kind == "event":
+            return f"event [{idx}] {self.sequence.events[idx].name}"
+        return f"behavior [{idx}] {self.sequence.behaviors[idx].name}"
+
+    def dangling(self, kind: str, idx: int, message: str) -> None:
+        indexes = {"events": [idx]} if kind == "event" else {"behaviors": [idx]}
+        self.issue(DANGLING_INDEX, ERROR, f"{self.describe(kind, idx)}: {message}", **indexes)
+
+    def check_output_links(self, kind: str, idx: int, packed: int) -> list[tuple[int, float]]:
+        sequence = self.sequence
+        links = []
+        start, length = parse_arrayindexandlength(packed)
+        for link_idx in range(start, start + length):
+            if link_idx >= len(sequence.output_links):
+                msg = f"Index {link_idx} is out of range for ConsolidatedOutputLinkData"
+                self.dangling(kind, idx, msg)
+                continue
+            link = sequence.output_links[link_idx]
+            if link.linked_behavior >= len(sequence.behaviors):
+                msg = f"Index {link.linked_behavior} is out of range for BehaviorData2"
+                self.dangling(kind, idx, msg)
+                continue
+            self.link_counts[link.linked_behavior] += 1
+            links.append((link.linked_behavior, link.activate_delay))
+        return links
+
+    def check_variable_links(self, kind: str, idx: int, packed: int) -> None:
+        sequence = self.sequence
+        start, length = parse_arrayindexandlength(packed)
+        for var in range(start, start + length):
+            if var >= len(sequence.variable_links):
+                msg = f"Index {var} is out of range for ConsolidatedVariableLinkData"
+                self.dangling(kind, idx, msg)
+                continue
+            v_start, v_length = parse_arrayindexandlength(
+                sequence.variable_links[var].linked_variables
+            )
+            for v in range(v_start, v_start + v_length):
+                if v >= len(sequence.linked_variables):
+                    msg = f"Index {v} is out of range for ConsolidatedLinkedVariables"
+                    self.dangling(kind, idx, msg)
+                    continue
+                v_index = sequence.linked_variables[v]
+                if not 0 <= v_index < len(sequence.variables):
+                    msg = f"Index {v_index} is out of range for VariableData"
+                    self.dangling(kind, idx, msg)
+                    continue
+                self.used_variables[v_index] = True
+
+    def check_tables(self) -> None:
+        for idx, event in enumerate(self.sequence.events):
+            self.check_variable_links("event", idx, event.output_variables)
+            self.event_targets.extend(
+                target for target, _ in self.check_output_links("event", idx, event.output_links)
+            )
+        for idx, behavior in enumerate(self.sequence.behaviors):
+            self.check_variable_links("behavior", idx, behavior.linked_variables)
+            self.behavior_links[idx] = self.check_output_links(
+                "behavior", idx, behavior.output_links
+            )
+
+    def check_none_behaviors(self) -> None:
+        for idx, behavior in enumerate(self.sequence.behaviors):
+            if behavior.path is not None:
+                continue
+            count = self.link_counts[idx]
+            linked = f", but {count} links lead to it" if count else ""
+            self.issue(
+                NONE_BEHAVIOR,
+                ERROR if count else WARNING,
+                f"behavior [{idx}] is None{linked}",
+                behaviors=[idx],
+            )
+
+    def check_reachable(self) -> None:
+        reached = [False] * len(self.sequence.behaviors)
+        queue = deque(self.event_targets)
+        for idx in queue:
+            reached[idx] = True
+        while queue:
+            for target, _ in self.behavior_links[queue.popleft()]:
+                if not reached[target]:
+                    reached[target] = True
+                    queue.append(target)
+        for idx, behavior in enumerate(self.sequence.behaviors):
+            if not reached[idx] and behavior.path is not None:
+                self.issue(
+                    UNREACHABLE,
+                    WARNING,
+                    f"{self.describe('behavior', idx)} can't be reached from any event",
+                    behaviors=[idx],
+                )
+
+    def check_cycles(self) -> None:
+        self.zero_delay_links = [
+            []
+            if behavior.cls in DELAYING_CLASSES
+            else [target for target, delay in links if delay == 0]
+            for behavior, links in zip(self.sequence.behaviors, self.behavior_links, strict=True)
+        ]
+        # Iterative Tarjan, bpds can easily be deeper than the recursion limit.
+        count = len(self.sequence.behaviors)
+        index = [-1] * count
+        low = [0] * count
+        on_stack = [False] * count
+        stack: list[int] = []
+        counter = 0
+        for root in range(count):
+            if index[root] != -1:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, child_idx = work[-1]
+                if child_idx == 0:
+                    index[node] = low[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack[node] = True
+                successors = self.zero_delay_links[node]
+                if child_idx < len(successors):
+                    work[-1] = (node, child_idx + 1)
+                    target = successors[child_idx]
+                    if index[target] == -1:
+                        work.append((target, 0))
+                    elif on_stack[target]:
+                        low[node] = min(low[node], index[target])
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in self.zero_delay_links[node]:
+                        self.report_cycle(set(component))
+
+    def report_cycle(self, component: set[int]) -> None:
+        # Find one concrete loop through the component, starting at its lowest index.
+        start = min(component)
+        parents: dict[int, int] = {}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            for target in self.zero_delay_links[node]:
+                if target not in component:
+                    continue
+                if target == start:
+                    path = [node]
+                    while path[-1] != start:
+                        path.append(parents[path[-1]])
+                    path.reverse()
+                    names = [self.sequence.behaviors[idx].name for idx in path]
+                    self.issue(
+                        ZERO_DELAY_CYCLE,
+                        WARNING,
+                        f"Zero delay cycle: {' -> '.join([*names, names[0]])}",
+                        behaviors=path,
+                    )
+                    return
+                if target not in parents:
+                    parents[target] = node
+                    queue.append(target)
+
+    def check_unused_variables(self) -> None:
+        for idx, used in enumerate(self.used_variables):
+            if not used:
+                var = self.sequence.variables[idx]
+                name = "" if var.name == "None" else f" {var.name}"
+                self.issue(
+                    UNUSED_VARIABLE,
+                    WARNING,
+                    f"variable [{idx}]{name} ({var.type_name}) is never linked",
+                    variables=[idx],
+                )
+
+
+def analyze_sequence(sequence: Sequence, sequence_idx: int = 0) -> list[Issue]:
+    """Check a single sequence.
+
+    Args:
+        sequence: The sequence to check.
+        sequence_idx: The index of the sequence in its bpd, used in the issues.
+    Returns:
+        The issues found.
+    """
+    checker = _SequenceChecker(sequence, sequence_idx)
+    checker.check_tables()
+    checker.check_none_behaviors()
+    checker.check_reachable()
+    checker.check_cycles()
+    checker.check_unused_variables()
+    return checker.issues
+
+
+def analyze_bpd(bpd: Bpd) -> list[Issue]:
+    """Check every sequence in a bpd.
+
+    Args:
+        bpd: The bpd to check.
+    Returns:
+        The issues found.
+    """
+    return [
+        issue
+        for sequence_idx, sequence in enumerate(bpd.sequences)
+        for issue in analyze_sequence(sequence, sequence_idx)
+    ]
+
+
+def report_to_dict(bpd: Bpd, issues: list[Issue]) -> dict[str, Any]:
+    """Convert the issues found in a bpd into a JSON serializable dict."""
+    return {"path": bpd.path, "issues": [asdict(issue) for issue in issues]}
+
+
+def write_report(
+    bpds: Iterable[Bpd],
+    file: IO[str],
+    *,
+    all_bpds: bool = False,
+    on_issues: Callable[[Bpd, list[Issue]], None] | None = None,
+) -> tuple[int, int, int]:
+    """Analyze bpds and write the results as JSON Lines, one bpd per line.
+
+    Args:
+        bpds: The bpds to analyze.
+        file: The text file to write to.
+        all_bpds: If true, also writes lines for bpds without any issues.
+        on_issues: If given, called with each bpd which has issues.
+    Returns:
+        The number of bpds analyzed, the number of errors, and the number of warnings.
+    """
+    analyzed = errors = warnings = 0
+    for bpd in bpds:
+        issues = analyze_bpd(bpd)
+        analyzed += 1
+        bpd_errors = sum(issue.severity == ERROR for issue in issues)
+        errors += bpd_errors
+        warnings += len(issues) - bpd_errors
+        if issues and on_issues is not None:
+            on_issues(bpd, issues)
+        if issues or all_bpds:
+            file.write(json.dumps(report_to_dict(bpd, issues), separators=(",", ":")) + "\n")
+    return analyzed, errors, warnings
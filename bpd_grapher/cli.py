@@ -0,0 +1,401 @@
+"""Command line interface for working with bpd snapshots outside the game.
+
+Run through `python -m bpd_grapher`, with the folder containing `bpd_grapher` on the path.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from bpd_grapher import analyze, diff, graph, graphviz, script, search, simulate
+from bpd_grapher.model import Bpd, BpdError
+from bpd_grapher.snapshot import Snapshot, find_snapshots
+
+# One task per bpd: the snapshot file, the bpd's index in it, and where to write the output.
+Task = tuple[Path, int, Path]
+
+_open_snapshots: dict[Path, Snapshot] = {}
+
+# Errors which are reported as a single line, instead of a traceback.
+ERRORS = (BpdError, OSError, graphviz.ExecutableNotFound, graphviz.CalledProcessError)
+
+
+def safe_name(path: str) -> str:
+    """Turn a bpd path name into something usable as a file name."""
+    return re.sub(r"[^\w.-]", "_", path)
+
+
+def _load(snapshot_path: Path, idx: int) -> Bpd:
+    # Workers handle many bpds from the same few files, so keep each snapshot mapped.
+    if (snap := _open_snapshots.get(snapshot_path)) is None:
+        snap = _open_snapshots[snapshot_path] = Snapshot(snapshot_path)
+    return snap.load(idx)
+
+
+def _graph_task(task: Task, layout_mode: str, sequences: str, layout_cache: bool) -> str:
+    snapshot_path, idx, directory = task
+    bpd = _load(snapshot_path, idx)
+    if sequences == "split":
+        outfile = graph.render_sequences(
+            bpd,
+            directory,
+            safe_name(bpd.path),
+            layout_mode=layout_mode,
+            layout_cache=layout_cache,
+        )
+    else:
+        outfile = graph.render(
+            graph.build_graph(bpd, clusters=sequences == "cluster"),
+            directory,
+            safe_name(bpd.path),
+            layout_mode=layout_mode,
+            layout_cache=layout_cache,
+        )
+    return str(outfile)
+
+
+def _dump_task(task: Task, sequence: int | None) -> str:
+    snapshot_path, idx, directory = task
+    bpd = _load(snapshot_path, idx)
+    directory.mkdir(parents=True, exist_ok=True)
+    indexes = range(len(bpd.sequences)) if sequence is None else [sequence]
+    written = []
+    for sequence_idx in indexes:
+        outfile = directory / f"{safe_name(bpd.path)}.{sequence_idx}.py"
+        with outfile.open("w", encoding="utf-8") as file:
+            script.write_script(bpd, sequence_idx, file)
+        written.append(str(outfile))
+    return ", ".join(written)
+
+
+def _analyze_task(task: Task) -> str:
+    bpd = _load(task[0], task[1])
+    if not (issues := analyze.analyze_bpd(bpd)):
+        return ""
+    return json.dumps(analyze.report_to_dict(bpd, issues), separators=(",", ":"))
+
+
+def _run_task(func: Callable[..., str], task: Task, *args: object) -> tuple[bool, str]:
+    try:
+        return True, func(task, *args)
+    # Caught here so only the message goes back from a worker, Graphviz's errors don't pickle.
+    except (*ERRORS, IndexError) as e:
+        return False, f"{task[0]}[{task[1]}]: {e}"
+
+
+def iter_tasks(path: Path, output: Path, bpd: str | None) -> Iterator[Task]:
+    """Get a task for each bpd in a snapshot, or in a directory of snapshots.
+
+    When given a directory, each snapshot gets its own output subdirectory.
+    """
+    snapshots = find_snapshots(path)
+    for snapshot_path in snapshots:
+        directory = output / snapshot_path.stem if path.is_dir() else output
+        with Snapshot(snapshot_path) as snap:
+            if bpd is not None:
+                if bpd in snap:
+                    yield snapshot_path, snap.find(bpd), directory
+                continue
+            for idx in range(len(snap)):
+                yield snapshot_path, idx, directory
+
+
+def run_tasks(tasks: list[Task], jobs: int, func: Callable[..., str], *args: object) -> int:
+    """Run a function over every task, in parallel when jobs isn't 1.
+
+    Args:
+        tasks: The tasks to run.
+        jobs: How many processes to use, 0 uses one per cpu.
+        func: The function to run on each task.
+        *args: Extra args to pass to the function.
+    Returns:
+        The number of failed tasks.
+    """
+    if jobs == 1 or len(tasks) <= 1:
+        results: Iterator[tuple[bool, str]] = (_run_task(func, task, *args) for task in tasks)
+        return _report(results)
+
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+        chunksize = max(1, len(tasks) // ((jobs or os.cpu_count() or 1) * 4))
+        results = executor.map(
+            _run_task,
+            [func] * len(tasks),
+            tasks,
+            *([arg] * len(tasks) for arg in args),
+            chunksize=chunksize,
+        )
+        return _report(results)
+
+
+def _report(results: Iterator[tuple[bool, str]]) -> int:
+    failed = 0
+    for ok, message in results:
+        if ok:
+            if message:
+                print(message)
+        else:
+            failed += 1
+            print(f"error: {message}", file=sys.stderr)
+    return failed
+
+
+def check_layout(layout_mode: str) -> None:
+    """Make sure Graphviz is installed, if a layout needs it."""
+    if layout_mode == "graphviz" and not graphviz.backend.discovery.is_available():
+        msg = "Could not find Graphviz, make sure it is installed and on your PATH"
+        raise BpdError(msg)
+
+
+def cmd_list(args: argparse.Namespace) -> int:
+    for snapshot_path in find_snapshots(args.path):
+        with Snapshot(snapshot_path) as snap:
+            for path in snap.paths:
+                print(path)
+    return 0
+
+
+def cmd_graph(args: argparse.Namespace) -> int:
+    check_layout(args.layout)
+    tasks = list(iter_tasks(args.path, args.output, args.bpd))
+    failed = run_tasks(
+        tasks, args.jobs, _graph_task, args.layout, args.sequences, not args.relayout
+    )
+    return 1 if failed else 0
+
+
+def cmd_dump(args: argparse.Namespace) -> int:
+    tasks = list(iter_tasks(args.path, args.output, args.bpd))
+    return 1 if run_tasks(tasks, args.jobs, _dump_task, args.sequence) else 0
+
+
+def cmd_analyze(args: argparse.Namespace) -> int:
+    tasks = list(iter_tasks(args.path, Path(), args.bpd))
+    return 1 if run_tasks(tasks, args.jobs, _analyze_task) else 0
+
+
+def cmd_search(args: argparse.Namespace) -> int:
+    index = search.BpdIndex()
+    for snapshot_path in find_snapshots(args.path):
+        with Snapshot(snapshot_path) as snap:
+            index.update(snap.load(idx) for idx in range(len(snap)))
+    results = index.search(
+        cls=args.cls, object=args.object, event=args.event, custom_event=args.custom_event
+    )
+    for path in sorted(results):
+        print(path)
+    return 0 if results else 1
+
+
+def parse_outcome(text: str) -> tuple[int, int]:
+    """Parse a `behavior=link_id` compare outcome."""
+    behavior, _, link_id = text.partition("=")
+    try:
+        return int(behavior), int(link_id)
+    except ValueError:
+        msg = f"Expected BEHAVIOR=LINK_ID, got {text!r}"
+        raise argparse.ArgumentTypeError(msg) from None
+
+
+def cmd_simulate(args: argparse.Namespace) -> int:
+    with Snapshot(args.path) as snap:
+        bpd = snap.load(snap.find(args.bpd))
+    try:
+        sequence = bpd.sequences[args.sequence]
+    except IndexError:
+        msg = f"{bpd.path} has no sequence {args.sequence}"
+        raise BpdError(msg) from None
+    event_idx = (
+        int(args.event) if args.event.isdigit() else simulate.find_event(sequence, args.event)
+    )
+    if event_idx >= len(sequence.events):
+        msg = f"Sequence {sequence.name} has no event {event_idx}"
+        raise BpdError(msg)
+
+    if args.all:
+        for scenario in simulate.explore(sequence, event_idx):
+            outcomes = " ".join(f"{idx}={link_id}" for idx, link_id in scenario.outcomes.items())
+            path = " -> ".join(sequence.behaviors[idx].name for idx in scenario.critical_path)
+            print(f"{scenario.duration:8.3f}s  [{outcomes}]  {path}")
+        return 0
+
+    timeline = simulate.simulate(sequence, event_idx, dict(args.outcome))
+    print("\n".join(simulate.format_timeline(sequence, timeline)))
+    return 0
+
+
+def cmd_diff(args: argparse.Namespace) -> int:
+    if args.graph is not None:
+        check_layout(args.layout)
+    with Snapshot(args.old) as old_snap, Snapshot(args.new) as new_snap:
+        paths = [args.bpd] if args.bpd else sorted(set(old_snap.paths) | set(new_snap.paths))
+        changed = False
+        for path in paths:
+            if path not in new_snap:
+                print(f"- {path}")
+                changed = True
+                continue
+            if path not in old_snap:
+                print(f"+ {path}")
+                changed = True
+                continue
+            old = old_snap.load(old_snap.find(path))
+            new = new_snap.load(new_snap.find(path))
+            result = diff.diff_bpd(old, new)
+            if not result.changed:
+                continue
+            changed = True
+            print("\n".join(diff.format_diff(result)))
+            if args.graph is not None:
+                outfile = graph.render(
+                    diff.build_diff_graph(old, new, result),
+                    args.graph,
+                    safe_name(path),
+                    layout_mode=args.layout,
+                )
+                print(f"graph: {outfile}")
+    return 1 if changed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m bpd_grapher",
+        description="Work with bpd snapshots saved in game with the snapshot_bpd command.",
+    )
+    subparsers = parser.add_subparsers(required=True)
+
+    list_parser = subparsers.add_parser("list", help="List the bpds in snapshots.")
+    list_parser.add_argument("path", type=Path, help="A snapshot file or directory.")
+    list_parser.set_defaults(func=cmd_list)
+
+    def add_common(sub: argparse.ArgumentParser, output: bool = True) -> None:
+        sub.add_argument("path", type=Path, help="A snapshot file or directory.")
+        sub.add_argument("--bpd", help="Only handle the bpd with this path name.")
+        if output:
+            sub.add_argument(
+                "--output", type=Path, default=Path("bpds"), help="The directory to write to."
+            )
+        sub.add_argument(
+            "--jobs",
+            type=int,
+            default=1,
+            help="How many processes to use, 0 uses one per cpu.",
+        )
+
+    graph_parser = subparsers.add_parser("graph", help="Graph the bpds in snapshots.")
+    add_common(graph_parser)
+    graph_parser.add_argument(
+        "--layout",
+        choices=graph.LAYOUTS,
+        default="auto",
+        help=(
+            "Which layout to use. Auto uses the builtin layout for small bpds, or when Graphviz is"
+            " not installed."
+        ),
+    )
+    graph_parser.add_argument(
+        "--sequences",
+        choices=graph.GROUPINGS,
+        default="flat",
+        help=(
+            "How to lay out multiple sequences. Cluster boxes each sequence, split renders each"
+            " one to its own file, with an html index linking them."
+        ),
+    )
+    graph_parser.add_argument(
+        "--relayout",
+        action="store_true",
+        help="Always do a full Graphviz layout, instead of reusing cached node positions.",
+    )
+    graph_parser.set_defaults(func=cmd_graph)
+
+    dump_parser = subparsers.add_parser("dump", help="Dump the bpds in snapshots as scripts.")
+    add_common(dump_parser)
+    dump_parser.add_argument(
+        "--sequence", type=int, help="Only dump this sequence, instead of all of them."
+    )
+    dump_parser.set_defaults(func=cmd_dump)
+
+    analyze_parser = subparsers.add_parser(
+        "analyze",
+        help="Check the bpds in snapshots for problems, printing one JSON line per broken bpd.",
+    )
+    add_common(analyze_parser, output=False)
+    analyze_parser.set_defaults(func=cmd_analyze)
+
+    search_parser = subparsers.add_parser(
+        "search", help="Find bpds by behavior class, referenced object or event name."
+    )
+    search_parser.add_argument("path", type=Path, help="A snapshot file or directory.")
+    search_parser.add_argument("--class", dest="cls", help="A behavior class.")
+    search_parser.add_argument(
+        "--object", help="An object referenced by a behavior, by full path or just its name."
+    )
+    search_parser.add_argument("--event", help="An event name.")
+    search_parser.add_argument("--custom_event", help="A remote or custom event name.")
+    search_parser.set_defaults(func=cmd_search)
+
+    simulate_parser = subparsers.add_parser(
+        "simulate",
+        help=(
+            "Show which behaviors run when an event fires, and when. Behaviors on the critical"
+            " path are marked with a *."
+        ),
+    )
+    simulate_parser.add_argument("path", type=Path, help="A snapshot file.")
+    simulate_parser.add_argument("bpd", help="The path name of the bpd to simulate.")
+    simulate_parser.add_argument("event", help="The name or index of the event to fire.")
+    simulate_parser.add_argument("--sequence", type=int, default=0, help="The sequence index.")
+    simulate_parser.add_argument(
+        "--outcome",
+        type=parse_outcome,
+        action="append",
+        default=[],
+        metavar="BEHAVIOR=LINK_ID",
+        help="The output link a compare behavior takes, compares default to link 0.",
+    )
+    simulate_parser.add_argument(
+        "--all",
+        action="store_true",
+        help="List every combination of compare outcomes instead, longest first.",
+    )
+    simulate_parser.set_defaults(func=cmd_simulate)
+
+    diff_parser = subparsers.add_parser(
+        "diff", help="Show the structural changes between two snapshots."
+    )
+    diff_parser.add_argument("old", type=Path, help="The old snapshot file.")
+    diff_parser.add_argument("new", type=Path, help="The new snapshot file.")
+    diff_parser.add_argument("--bpd", help="Only diff the bpd with this path name.")
+    diff_parser.add_argument(
+        "--graph",
+        type=Path,
+        metavar="DIR",
+        help="Also graph each changed bpd into this directory, with the changes highlighted.",
+    )
+    diff_parser.add_argument("--layout", choices=graph.LAYOUTS, default="auto")
+    diff_parser.set_defaults(func=cmd_diff)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the command line interface.
+
+    Args:
+        argv: The arguments to parse, defaults to `sys.argv`.
+    Returns:
+        The exit code.
+    """
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except ERRORS as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
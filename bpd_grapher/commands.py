@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import unrealsdk
+from command_extensions.builtins import obj_name_splitter
+from mods_base import SETTINGS_DIR, command
+
+from bpd_grapher import analyze, diff, export, graph, graphviz, model, snapshot
+from bpd_grapher.decode import decode_bpd, find_bpds
+
+OUTPUT_DIR = SETTINGS_DIR / "bpds"
+
+
+@command(splitter=obj_name_splitter, description="Graph a bpd.")
+def graph_bpd(args: argparse.Namespace) -> None:
+    if args.rescan_graphviz:
+        graphviz.backend.discovery.invalidate()
+    if args.layout == "graphviz" and not graphviz.backend.discovery.is_available():
+        unrealsdk.logging.error(
+            "Could not find Graphviz, make sure it is installed and on your PATH then run with"
+            " --rescan_graphviz."
+        )
+        return
+    bpd = decode_bpd(
+        unrealsdk.find_object("BehaviorProviderDefinition", args.bpd), references=False
+    )
+    try:
+        if args.sequences == "split":
+            graph.render_sequences(
+                bpd,
+                OUTPUT_DIR,
+                layout_mode=args.layout,
+                layout_cache=not args.relayout,
+                view=not args.no_view,
+            )
+            return
+        dot = graph.build_graph(bpd, clusters=args.sequences == "cluster")
+    except model.BpdError as e:
+        unrealsdk.logging.error(e)
+        return
+    graph.render(
+        dot,
+        OUTPUT_DIR,
+        layout_mode=args.layout,
+        layout_cache=not args.relayout,
+        view=not args.no_view,
+    )
+
+
+graph_bpd.add_argument("bpd")
+graph_bpd.add_argument("--no_view", action="store_true")
+graph_bpd.add_argument(
+    "--rescan_graphviz",
+    action="store_true",
+    help="Search for the Graphviz executable again instead of using the cached result.",
+)
+graph_bpd.add_argument(
+    "--layout",
+    choices=graph.LAYOUTS,
+    default="auto",
+    help=(
+        "Which layout to use. Auto uses the builtin layout for small bpds, or when Graphviz is"
+        " not installed."
+    ),
+)
+graph_bpd.add_argument(
+    "--sequences",
+    choices=graph.GROUPINGS,
+    default="flat",
+    help=(
+        "How to lay out multiple sequences. Cluster boxes each sequence, split renders each one to"
+        " its own file in parallel, with an html index linking them."
+    ),
+)
+graph_bpd.add_argument(
+    "--relayout",
+    action="store_true",
+    help=(
+        "Always do a full Graphviz layout, instead of reusing the cached positions from a graph"
+        " with the same nodes and edges."
+    ),
+)
+
+
+@command(splitter=obj_name_splitter, description="Export bpds as JSON or GraphML.")
+def export_bpd(args: argparse.Namespace) -> None:
+    def on_error(bpd: model.Bpd, error: model.BpdError) -> None:
+        unrealsdk.logging.error(f"Skipped {bpd.path}: {error}")
+
+    outfile = OUTPUT_DIR / f"export.{args.format}"
+    outfile.parent.mkdir(parents=True, exist_ok=True)
+    bpds = (decode_bpd(obj) for obj in find_bpds(args.bpds, args.package, args.all))
+    with outfile.open("w", encoding="utf-8") as file:
+        if args.format == "graphml":
+            count = export.write_graphml(bpds, file, on_error=on_error)
+        else:
+            count = export.write_json(bpds, file, lines=args.format == "jsonl", on_error=on_error)
+    unrealsdk.logging.info(f"Exported {count} bpds to {outfile}")
+
+
+export_bpd.add_argument("bpds", nargs="*", help="The bpds to export.")
+export_bpd.add_argument(
+    "--format", choices=("json", "jsonl", "graphml"), default="json", help="The format to write."
+)
+export_bpd.add_argument("--package", help="Export every loaded bpd in this package.")
+export_bpd.add_argument("--all", action="store_true", help="Export every loaded bpd.")
+
+
+@command(
+    splitter=obj_name_splitter,
+    description="Save bpds to a snapshot file, which can be used with `python -m bpd_grapher`.",
+)
+def snapshot_bpd(args: argparse.Namespace) -> None:
+    name = args.name or args.package or "snapshot"
+    outfile = OUTPUT_DIR / "snapshots" / f"{name}{snapshot.EXTENSION}"
+    outfile.parent.mkdir(parents=True, exist_ok=True)
+    count = snapshot.write_snapshot(
+        (decode_bpd(obj) for obj in find_bpds(args.bpds, args.package, args.all)), outfile
+    )
+    unrealsdk.logging.info(f"Saved {count} bpds to {outfile}")
+
+
+snapshot_bpd.add_argument("bpds", nargs="*", help="The bpds to save.")
+snapshot_bpd.add_argument("--package", help="Save every loaded bpd in this package.")
+snapshot_bpd.add_argument("--all", action="store_true", help="Save every loaded bpd.")
+snapshot_bpd.add_argument(
+    "--name", help="The snapshot file name, defaults to the package name or 'snapshot'."
+)
+
+
+def find_snapshot(name: str) -> Path:
+    """Resolve a snapshot name relative to the snapshots folder, adding the extension if needed."""
+    path = Path(name)
+    if not path.is_absolute():
+        path = OUTPUT_DIR / "snapshots" / path
+    if not path.suffix:
+        path = path.with_name(path.name + snapshot.EXTENSION)
+    return path
+
+
+@command(
+    splitter=obj_name_splitter,
+    description="Show what changed between two bpds, or between a snapshot and a loaded bpd.",
+)
+def diff_bpd(args: argparse.Namespace) -> None:
+    if args.other is None and args.snapshot is None:
+        unrealsdk.logging.error("Need either a second bpd or a snapshot to compare against.")
+        return
+    new = decode_bpd(
+        unrealsdk.find_object("BehaviorProviderDefinition", args.other or args.bpd)
+    )
+    try:
+        if args.snapshot is None:
+            old = decode_bpd(unrealsdk.find_object("BehaviorProviderDefinition", args.bpd))
+        else:
+            with snapshot.Snapshot(find_snapshot(args.snapshot)) as snap:
+                old = snap.load(snap.find(args.bpd))
+        result = diff.diff_bpd(old, new)
+    except (OSError, model.BpdError) as e:
+        unrealsdk.logging.error(e)
+        return
+
+    for line in diff.format_diff(result):
+        unrealsdk.logging.info(line)
+    if args.graph and result.changed:
+        graph.render(
+            diff.build_diff_graph(old, new, result),
+            OUTPUT_DIR,
+            "diff",
+            layout_mode=args.layout,
+            view=not args.no_view,
+        )
+
+
+diff_bpd.add_argument("bpd", help="The old bpd, or the bpd to find in the snapshot.")
+diff_bpd.add_argument("other", nargs="?", help="The new bpd, defaults to the old one.")
+diff_bpd.add_argument(
+    "--snapshot", help="Read the old bpd from this snapshot file, instead of the loaded objects."
+)
+diff_bpd.add_argument(
+    "--graph",
+    action="store_true",
+    help=(
+        "Also graph the new bpd with the changes highlighted: added in green, modified in orange,"
+        " rewired in blue, removed in dashed red."
+    ),
+)
+diff_bpd.add_argument("--no_view", action="store_true")
+diff_bpd.add_argument("--layout", choices=graph.LAYOUTS, default="auto")
+
+
+@command(
+    splitter=obj_name_splitter,
+    description="Check bpds for bad indexes, unreachable behaviors, zero delay cycles and more.",
+)
+def analyze_bpd(args: argparse.Namespace) -> None:
+    def on_issues(bpd: model.Bpd, issues: list[analyze.Issue]) -> None:
+        for issue in issues:
+            unrealsdk.logging.info(
+                f"{bpd.path} [{issue.sequence}] {issue.severity}: {issue.message}"
+            )
+
+    outfile = OUTPUT_DIR / "analysis.jsonl"
+    outfile.parent.mkdir(parents=True, exist_ok=True)
+    bpds = (
+        decode_bpd(obj, references=False)
+        for obj in find_bpds(args.bpds, args.package, args.all)
+    )
+    with outfile.open("w", encoding="utf-8") as file:
+        analyzed, errors, warnings = analyze.write_report(
+            bpds,
+            file,
+            # Scanning packages easily finds thousands of issues, only log them for single bpds.
+            on_issues=None if args.all or args.package else on_issues,
+        )
+    unrealsdk.logging.info(
+        f"Analyzed {analyzed} bpds, found {errors} errors and {warnings} warnings, see {outfile}"
+    )
+
+
+analyze_bpd.add_argument("bpds", nargs="*", help="The bpds to check.")
+analyze_bpd.add_argument("--package", help="Check every loaded bpd in this package.")
+analyze_bpd.add_argument("--all", action="store_true", help="Check every loaded bpd.")
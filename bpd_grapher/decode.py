@@ -0,0 +1,322 @@
+"""Decode BehaviorProviderDefinitions from the engine into `model.Bpd`."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from enum import IntEnum
+from typing import TYPE_CHECKING, Any
+
+import unrealsdk
+from unrealsdk.unreal import UObject, UObjectProperty
+
+from bpd_grapher import model
+
+if TYPE_CHECKING:
+    from bl2.Engine import AttributeInitializationDefinition
+    from bl2.GearboxFramework import BehaviorProviderDefinition
+
+    EBaseValueMode = AttributeInitializationDefinition.EBaseValueMode
+
+else:
+    EBaseValueMode = unrealsdk.find_enum("EBaseValueMode")
+
+
+class EBinaryMathOperation(IntEnum):
+    BoolBool_XNOR = 2
+    BoolBool_AND = 3
+    BoolBool_OR = 4
+    BoolBool_XOR = 5
+    FloatFloat_Equal = 6
+    FloatFloat_Greater = 7
+    FloatFloat_GreaterEqual = 8
+    FloatFloat_Less = 9
+    FloatFloat_LessEqual = 10
+    FloatFloat_NotEqual = 11
+    IntInt_Equal = 12
+    IntInt_Less = 13
+    IntInt_LessEqual = 14
+    IntInt_Greater = 15
+    IntInt_GreaterEqual = 16
+    IntInt_NotEqual = 17
+    ObjectObject_Equal = 18
+    ObjectObject_NotEqual = 19
+    IntInt_Add = 1000002
+    IntInt_Subtract = 1000003
+    IntInt_Mult = 1000004
+    IntInt_Divide = 1000005
+    IntInt_Power = 1000006
+    IntInt_RandomRange = 1000007
+    IntInt_Average = 1000008
+    IntInt_Min = 1000009
+    IntInt_Max = 1000010
+    FloatFloat_Add = 2000002
+    FloatFloat_Subtract = 2000003
+    FloatFloat_Mult = 2000004
+    FloatFloat_Divide = 2000005
+    FloatFloat_Power = 2000006
+    FloatFloat_RandomRange = 2000007
+    FloatFloat_Average = 2000008
+    FloatFloat_Min = 2000009
+    FloatFloat_Max = 2000010
+    VectorVector_Dot = 2000011
+    VectorVector_Distance = 2000012
+    VectorVector_Add = 3000002
+    VectorVector_Subtract = 3000003
+    VectorVector_Divide = 3000004
+    VectorVector_Multiply = 3000005
+    VectorVector_Project = 3000006
+    VectorVector_Cross = 3000007
+    VectorVector_NormalizeDifference = 3000008
+    VectorVector_Rotate = 3000009
+
+
+def try_get_pathname(obj: UObject | None) -> str:
+    if obj is None:
+        return ""
+    return obj._path_name()
+
+
+def isfloat(string: str) -> bool:
+    try:
+        float(string)
+    except ValueError:
+        return False
+    return True
+
+
+def additional_behaviour_data(behaviour: UObject) -> str:  # noqa: PLR0911, PLR0912, PLR0915
+    if behaviour.Class.Name == "Behavior_ActivateSkill" and behaviour.SkillToActivate:
+        return f"\n{try_get_pathname(behaviour.SkillToActivate)}"
+
+    if behaviour.Class.Name == "Behavior_DeactivateSkill" and behaviour.SkillToDeactivate:
+        return f"\nskill {try_get_pathname(behaviour.SkillToDeactivate)}"
+
+    if behaviour.Class.Name == "Behavior_Delay":
+        return f"\ndelay {behaviour.Delay}"
+
+    if behaviour.Class.Name == "Behavior_ChangeInstanceDataSwitch":
+        return f"\n{behaviour.SwitchName} > {behaviour.NewValue}"
+
+    if behaviour.Class.Name == "Behavior_CustomEvent":
+        return f"\n{behaviour.CustomEventName}"
+
+    if behaviour.Class.Name == "Behavior_SkillCustomEvent":
+        return f"\n{try_get_pathname(behaviour.SkillDef)} {behaviour.EventName}"
+
+    if behaviour.Class.Name == "Behavior_FireCustomSkillEvent":
+        return f"\n{try_get_pathname(behaviour.Skill)} {behaviour.EventName}"
+
+    if behaviour.Class.Name == "Behavior_RemoteEvent":
+        return f"\n{behaviour.EventName}"
+
+    if behaviour.Class.Name == "Behavior_RemoteCustomEvent":
+        components = [
+            comp
+            for comp in behaviour.ProviderDefinitionPathName.PathComponentNames
+            if comp != "None"
+        ]
+        return f"\n{'.'.join(components)} {behaviour.CustomEventName}"
+
+    if behaviour.Class.Name == "Behavior_MissionCustomEvent":
+        return f"\n{try_get_pathname(behaviour.RelatedMission)} {behaviour.EventName}"
+
+    if behaviour.Class.Name == "Behavior_PostAkEvent":
+        return f"\n{try_get_pathname(behaviour.Event)}"
+
+    if behaviour.Class.Name == "Behavior_Metronome":
+        a = f"\ni={round(behaviour.TickInterval, 3)}"
+        b = f" d={round(behaviour.Duration, 3)}" if behaviour.bUseDuration else ""
+        c = f" c={behaviour.MaxTickCount}" if behaviour.bUseTickCount else ""
+        return a + b + c
+
+    if behaviour.Class.Name == "Behavior_ModifyTimer":
+        behavior_timer_function = ["None", "Start", "Pause", "Toggle", "Resume", "Stop", "MAX"]
+        return f"\nTimer_{behaviour.TimerId} {behavior_timer_function[behaviour.Operation]}"
+
+    if behaviour.Class.Name == "Behavior_CallFunction":
+        return f"\n{behaviour.FunctionName}"
+
+    if behaviour.Class.Name == "Behavior_CompareValues":
+        a = f"{round(behaviour.ValueA.BaseValueConstant, 2)}"
+        a_attr = behaviour.ValueA.BaseValueAttribute
+        a_init = behaviour.ValueA.InitializationDefinition
+        a_scale = round(behaviour.ValueA.BaseValueScaleConstant, 2)
+
+        if a_attr is not None:
+            a = a_attr.Name
+
+        if a_init is not None:
+            if a_init.BaseValueMode == EBaseValueMode.BASEVALUE_InitializationDefSetsBaseValue:
+                a: str = a_init.Name
+            elif a_init.BaseValueMode == EBaseValueMode.BASEVALUE_InitializationDefScalesBaseValue:
+                a = f"{a} x {a_init.Name}"
+            elif a_init.BaseValueMode == EBaseValueMode.BASEVALUE_InitializationDefAddsToBaseValue:
+                a = f"{a} + {a_init.Name}"
+            elif (
+                a_init.BaseValueMode == EBaseValueMode.BASEVALUE_InitializationDefOffsetByBaseValue
+            ):
+                return ""
+
+        if a_scale != 1:
+            if isfloat(a):
+                a = f"{round(float(a) * behaviour.ValueA.BaseValueScaleConstant, 2)}"
+            elif "+" in a:
+                a = f"({a}) x {a_scale}"
+            else:
+                a = f"{a} x {a_scale}"
+
+        b = f"{round(behaviour.ValueB.BaseValueConstant, 2)}"
+        b_attr = behaviour.ValueB.BaseValueAttribute
+        b_init = behaviour.ValueB.InitializationDefinition
+        b_scale = round(behaviour.ValueB.BaseValueScaleConstant, 2)
+
+        if b_attr is not None:
+            b = b_attr.Name
+
+        if b_init is not None:
+            if b_init.BaseValueMode == EBaseValueMode.BASEVALUE_InitializationDefSetsBaseValue:
+                b: str = b_init.Name
+            elif b_init.BaseValueMode == EBaseValueMode.BASEVALUE_InitializationDefScalesBaseValue:
+                b = f"{a} x {b_init.Name}"
+            elif b_init.BaseValueMode == EBaseValueMode.BASEVALUE_InitializationDefAddsToBaseValue:
+                b = f"{a} + {b_init.Name}"
+            elif (
+                b_init.BaseValueMode == EBaseValueMode.BASEVALUE_InitializationDefOffsetByBaseValue
+            ):
+                return ""
+
+        if b_scale != 1:
+            if isfloat(b):
+                b = f"{round(float(b) * behaviour.ValueA.BaseValueScaleConstant, 2)}"
+            elif "+" in b:
+                b = f"({b}) x {b_scale}"
+            else:
+                b = f"{b} x {b_scale}"
+
+        return f"\nA= {a}\nB= {b}"
+
+    return ""
+
+
+def get_references(behaviour: UObject) -> dict[str, str]:
+    references: dict[str, str] = {}
+    for prop in behaviour.Class._properties():
+        if not isinstance(prop, UObjectProperty) or prop.ArrayDim != 1:
+            continue
+        # Skip Outer/Class/ObjectArchetype and the like, every object has those.
+        if prop.Outer.Name == "Object":
+            continue
+        if (value := getattr(behaviour, prop.Name)) is not None:
+            references[prop.Name] = value._path_name()
+    return references
+
+
+def decode_bpd(
+    behavior_provider_definition: BehaviorProviderDefinition, references: bool = True
+) -> model.Bpd:
+    """Copy the tables of a bpd into a `model.Bpd`.
+
+    Args:
+        behavior_provider_definition: The bpd to decode.
+        references: If false, skips reading the objects each behavior references, which is the
+                    slowest part of decoding.
+    Returns:
+        The decoded bpd.
+    """
+    bpd = model.Bpd(behavior_provider_definition._path_name())
+    for behavior_sequence in behavior_provider_definition.BehaviorSequences:
+        sequence = model.Sequence(
+            str(behavior_sequence.BehaviorSequenceName),
+            events=[
+                model.EventData(
+                    str(event_data.UserData.EventName),
+                    bool(event_data.UserData.bEnabled),
+                    event_data.OutputVariables.ArrayIndexAndLength,
+                    event_data.OutputLinks.ArrayIndexAndLength,
+                )
+                for event_data in behavior_sequence.EventData2
+            ],
+            variables=[
+                model.VariableData(str(variable.Name), int(variable.Type))
+                for variable in behavior_sequence.VariableData
+            ],
+            output_links=[
+                model.OutputLinkData(link.LinkIdAndLinkedBehavior, link.ActivateDelay)
+                for link in behavior_sequence.ConsolidatedOutputLinkData
+            ],
+            variable_links=[
+                model.VariableLinkData(
+                    str(link.PropertyName),
+                    int(link.VariableLinkType),
+                    link.LinkedVariables.ArrayIndexAndLength,
+                    link.ConnectionIndex,
+                )
+                for link in behavior_sequence.ConsolidatedVariableLinkData
+            ],
+            linked_variables=list(behavior_sequence.ConsolidatedLinkedVariables),
+        )
+        for behavior_data in behavior_sequence.BehaviorData2:
+            behaviour = behavior_data.Behavior
+            sequence.behaviors.append(
+                model.BehaviorData(
+                    None if behaviour is None else behaviour._path_name(),
+                    "None" if behaviour is None else str(behaviour.Class.Name),
+                    "None" if behaviour is None else str(behaviour.Name),
+                    behavior_data.LinkedVariables.ArrayIndexAndLength,
+                    behavior_data.OutputLinks.ArrayIndexAndLength,
+                    "" if behaviour is None else additional_behaviour_data(behaviour),
+                    {} if behaviour is None or not references else get_references(behaviour),
+                )
+            )
+        bpd.sequences.append(sequence)
+    return bpd
+
+
+def fingerprint_bpd(behavior_provider_definition: BehaviorProviderDefinition) -> tuple[Any, ...]:
+    """Cheaply summarize a bpd, to tell if it changed since it was last decoded.
+
+    Only reads the event names, the behavior objects and the size of the link tables, which is far
+    quicker than `decode_bpd`, but still catches sequences being rebuilt by `encode_sequence`.
+
+    Args:
+        behavior_provider_definition: The bpd to fingerprint.
+    Returns:
+        A hashable summary of the bpd.
+    """
+    return tuple(
+        (
+            tuple(
+                str(event_data.UserData.EventName) for event_data in behavior_sequence.EventData2
+            ),
+            tuple(
+                None if behavior_data.Behavior is None else behavior_data.Behavior._path_name()
+                for behavior_data in behavior_sequence.BehaviorData2
+            ),
+            len(behavior_sequence.ConsolidatedOutputLinkData),
+            len(behavior_sequence.ConsolidatedVariableLinkData),
+        )
+        for behavior_sequence in behavior_provider_definition.BehaviorSequences
+    )
+
+
+def find_bpds(
+    names: list[str], package: str | None = None, all_bpds: bool = False
+) -> Iterator[BehaviorProviderDefinition]:
+    """Find bpds by name, or every loaded bpd in a package.
+
+    Args:
+        names: The full names of the bpds to find, used when not given a package.
+        package: If given, yields every loaded bpd inside this package.
+        all_bpds: If true, yields every loaded bpd.
+    Yields:
+        The found bpds.
+    """
+    if not (all_bpds or package):
+        for name in names:
+            yield unrealsdk.find_object("BehaviorProviderDefinition", name)
+        return
+    for obj in unrealsdk.find_all("BehaviorProviderDefinition", exact=False):
+        if obj == obj.Class.ClassDefaultObject:
+            continue
+        if all_bpds or obj._path_name().startswith(f"{package}."):
+            yield obj
@@ -0,0 +1,569 @@
+"""Structural diff between two versions of a bpd.
+
+Every event and behavior gets two content hashes. The local hash covers the node itself: class,
+detail text, referenced objects and variable bindings, but not its name or index. The subtree hash
+adds the link id, delay and subtree hash of every output link, so it changes whenever anything
+reachable from the node changes. Links which loop back into a node still being hashed use that
+node's local hash instead.
+
+Nodes are then paired through hash maps, first by name and subtree hash, which pairs everything
+unchanged, then by name alone, then by subtree and local hash, to pick up behaviors which were
+recreated under a new name. Whatever is left over was added or removed. Everything is linear in
+the size of the bpds.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections import defaultdict, deque
+from collections.abc import Hashable, Iterator
+from dataclasses import dataclass, field
+from typing import Any
+
+from bpd_grapher import graph, graphviz
+from bpd_grapher.model import Bpd, Sequence, parse_arrayindexandlength
+
+# (link id, delay, index of the linked behavior)
+Link = tuple[int, float, int]
+
+
+def _digest(*parts: Any) -> bytes:
+    return hashlib.blake2b(repr(parts).encode("utf8"), digest_size=16).digest()
+
+
+@dataclass
+class SequenceHashes:
+    """The content hashes of every node in a sequence."""
+
+    event_local: list[bytes]
+    event_subtree: list[bytes]
+    behavior_local: list[bytes]
+    behavior_subtree: list[bytes]
+    event_links: list[list[Link]]
+    behavior_links: list[list[Link]]
+
+
+def _bindings(sequence: Sequence, packed: int) -> tuple:
+    return tuple(
+        (
+            link_data.link_type,
+            link_data.property_name,
+            link_data.connection_index,
+            tuple((v, sequence.variables[v].name, sequence.variables[v].type) for v in variables),
+        )
+        for _, link_data, variables in sequence.iter_variable_links(packed)
+    )
+
+
+def _links(sequence: Sequence, packed: int) -> list[Link]:
+    return [
+        (link.link_id, link.activate_delay, link.linked_behavior)
+        for _, link in sequence.iter_output_links(packed)
+    ]
+
+
+def hash_sequence(sequence: Sequence) -> SequenceHashes:
+    """Calculate the content hashes of every event and behavior in a sequence.
+
+    Args:
+        sequence: The sequence to hash.
+    Returns:
+        The hashes, indexed the same as the sequence's events and behaviors.
+    """
+    behavior_local = [
+        _digest(
+            b.cls,
+            b.path is None,
+            b.detail,
+            sorted(b.references.items()),
+            _bindings(sequence, b.linked_variables),
+        )
+        for b in sequence.behaviors
+    ]
+    event_local = [
+        _digest(e.name, e.enabled, _bindings(sequence, e.output_variables))
+        for e in sequence.events
+    ]
+    behavior_links = [_links(sequence, b.output_links) for b in sequence.behaviors]
+    event_links = [_links(sequence, e.output_links) for e in sequence.events]
+
+    subtree: list[bytes | None] = [None] * len(sequence.behaviors)
+    on_stack = [False] * len(sequence.behaviors)
+
+    def link_token(link: Link) -> tuple[int, float, bytes]:
+        link_id, delay, target = link
+        target_hash = subtree[target]
+        if target_hash is None:
+            target_hash = _digest("cycle", behavior_local[target])
+        return link_id, delay, target_hash
+
+    def visit(root: int) -> None:
+        # Iterative post order walk, bpds can easily be deeper than the recursion limit.
+        on_stack[root] = True
+        stack = [(root, 0)]
+        while stack:
+            node, link_idx = stack[-1]
+            links = behavior_links[node]
+            if link_idx < len(links):
+                stack[-1] = (node, link_idx + 1)
+                target = links[link_idx][2]
+                if subtree[target] is None and not on_stack[target]:
+                    on_stack[target] = True
+                    stack.append((target, 0))
+                continue
+            stack.pop()
+            on_stack[node] = False
+            subtree[node] = _digest(behavior_local[node], [link_token(link) for link in links])
+
+    # Start from the events so the point at which cycles get cut doesn't depend on indexes.
+    for links in event_links:
+        for _, _, target in links:
+            if subtree[target] is None:
+                visit(target)
+    for idx in range(len(sequence.behaviors)):
+        if subtree[idx] is None:
+            visit(idx)
+
+    event_subtree = [
+        _digest(local, [link_token(link) for link in links])
+        for local, links in zip(event_local, event_links, strict=True)
+    ]
+    return SequenceHashes(
+        event_local,
+        event_subtree,
+        behavior_local,
+        [h for h in subtree if h is not None],
+        event_links,
+        behavior_links,
+    )
+
+
+def _occurrences(keys: list[Hashable]) -> list[tuple[Hashable, int]]:
+    seen: dict[Hashable, int] = defaultdict(int)
+    out = []
+    for key in keys:
+        out.append((key, seen[key]))
+        seen[key] += 1
+    return out
+
+
+def _pair(
+    old_keys: list[Hashable | None],
+    new_keys: list[Hashable | None],
+    old_to_new: dict[int, int],
+    new_matched: set[int],
+) -> None:
+    # Pairs up still unmatched nodes with equal keys, in index order when keys repeat.
+    buckets: dict[Hashable, deque[int]] = defaultdict(deque)
+    for idx, key in enumerate(new_keys):
+        if key is not None and idx not in new_matched:
+            buckets[key].append(idx)
+    for idx, key in enumerate(old_keys):
+        if key is None or idx in old_to_new:
+            continue
+        if (bucket := buckets.get(key)):
+            new_idx = bucket.popleft()
+            old_to_new[idx] = new_idx
+            new_matched.add(new_idx)
+
+
+def _match(
+    keys: list[tuple[list[Hashable | None], list[Hashable | None]]],
+) -> dict[int, int]:
+    old_to_new: dict[int, int] = {}
+    new_matched: set[int] = set()
+    for old_keys, new_keys in keys:
+        _pair(old_keys, new_keys, old_to_new, new_matched)
+    return old_to_new
+
+
+@dataclass
+class LinkDiff:
+    """An output link only found on one side, by index into that side's `output_links`."""
+
+    index: int
+    description: str
+
+
+@dataclass
+class NodeDiff:
+    """A changed event or behavior.
+
+    `old`/`new` are its indexes in the old and new sequence, None when it was added or removed.
+    `fields` lists which of its own fields changed, and the link lists hold the output links
+    only found on one side.
+    """
+
+    kind: str
+    name: str
+    old: int | None = None
+    new: int | None = None
+    fields: list[str] = field(default_factory=list)
+    added_links: list[LinkDiff] = field(default_factory=list)
+    removed_links: list[LinkDiff] = field(default_factory=list)
+
+    @property
+    def status(self) -> str:
+        """One of "added", "removed", "modified" or "rewired"."""
+        if self.old is None:
+            return "added"
+        if self.new is None:
+            return "removed"
+        if self.fields:
+            return "modified"
+        return "rewired"
+
+
+@dataclass
+class SequenceDiff:
+    """The differences between two versions of a sequence.
+
+    `old_idx`/`new_idx` are None when the whole sequence was added or removed.
+    """
+
+    name: str
+    old_idx: int | None
+    new_idx: int | None
+    nodes: list[NodeDiff] = field(default_factory=list)
+    behavior_matches: dict[int, int] = field(default_factory=dict)
+    event_matches: dict[int, int] = field(default_factory=dict)
+
+    def with_status(self, kind: str, status: str) -> Iterator[NodeDiff]:
+        """Iterate through the changed nodes of one kind with the given status."""
+        return (n for n in self.nodes if n.kind == kind and n.status == status)
+
+
+@dataclass
+class BpdDiff:
+    """The differences between two versions of a bpd."""
+
+    old_path: str
+    new_path: str
+    sequences: list[SequenceDiff] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        """True if anything differs."""
+        return any(
+            seq.nodes or seq.old_idx is None or seq.new_idx is None for seq in self.sequences
+        )
+
+
+def _describe_link(sequence: Sequence, link: Link) -> str:
+    link_id, delay, target = link
+    delay_text = f" d={delay}" if delay else ""
+    return f"({link_id}) -> [{target}] {sequence.behaviors[target].name}{delay_text}"
+
+
+def _compare_links(
+    diff: NodeDiff,
+    old: Sequence,
+    new: Sequence,
+    old_packed: tuple[int, list[Link]],
+    new_packed: tuple[int, list[Link]],
+    matches: dict[int, int],
+) -> None:
+    # Links are compared as multisets, translating old targets into new indexes.
+    (old_output_links, old_links), (new_output_links, new_links) = old_packed, new_packed
+    old_start = parse_arrayindexandlength(old_output_links)[0]
+    new_start = parse_arrayindexandlength(new_output_links)[0]
+    remaining: dict[Link, int] = defaultdict(int)
+    for link in new_links:
+        remaining[link] += 1
+    for offset, link in enumerate(old_links):
+        link_id, delay, target = link
+        mapped = (link_id, delay, matches.get(target, -1))
+        if remaining.get(mapped):
+            remaining[mapped] -= 1
+        else:
+            diff.removed_links.append(LinkDiff(old_start + offset, _describe_link(old, link)))
+    for offset, link in enumerate(new_links):
+        if remaining.get(link):
+            remaining[link] -= 1
+            diff.added_links.append(LinkDiff(new_start + offset, _describe_link(new, link)))
+
+
+def _unmatched(
+    kind: str, idx: int, is_old: bool, sequence: Sequence, hashes: SequenceHashes
+) -> NodeDiff:
+    if kind == "event":
+        data = sequence.events[idx]
+        links = hashes.event_links[idx]
+    else:
+        data = sequence.behaviors[idx]
+        links = hashes.behavior_links[idx]
+    start = parse_arrayindexandlength(data.output_links)[0]
+    link_diffs = [
+        LinkDiff(start + offset, _describe_link(sequence, link))
+        for offset, link in enumerate(links)
+    ]
+    if is_old:
+        return NodeDiff(kind, data.name, old=idx, removed_links=link_diffs)
+    return NodeDiff(kind, data.name, new=idx, added_links=link_diffs)
+
+
+def diff_sequence(
+    old: Sequence,
+    new: Sequence,
+    old_idx: int | None = None,
+    new_idx: int | None = None,
+) -> SequenceDiff:
+    """Diff two versions of a sequence.
+
+    Args:
+        old: The old sequence.
+        new: The new sequence.
+        old_idx: The index of the old sequence in its bpd, None if it's being added.
+        new_idx: The index of the new sequence in its bpd, None if it's being removed.
+    Returns:
+        The differences.
+    """
+    old_hashes = hash_sequence(old)
+    new_hashes = hash_sequence(new)
+    result = SequenceDiff(new.name if new_idx is not None else old.name, old_idx, new_idx)
+
+    # Same name and subtree, same name, same subtree, and finally just the same local content.
+    old_names = [None if b.path is None else (b.cls, b.name) for b in old.behaviors]
+    new_names = [None if b.path is None else (b.cls, b.name) for b in new.behaviors]
+    result.behavior_matches = behavior_matches = _match(
+        [
+            (
+                list(zip(old_hashes.behavior_subtree, old_names, strict=True)),
+                list(zip(new_hashes.behavior_subtree, new_names, strict=True)),
+            ),
+            (old_names, new_names),
+            (old_hashes.behavior_subtree, new_hashes.behavior_subtree),
+            (old_hashes.behavior_local, new_hashes.behavior_local),
+        ]
+    )
+    old_events = _occurrences([e.name for e in old.events])
+    new_events = _occurrences([e.name for e in new.events])
+    result.event_matches = event_matches = _match(
+        [
+            (
+                list(zip(old_hashes.event_subtree, old_events, strict=True)),
+                list(zip(new_hashes.event_subtree, new_events, strict=True)),
+            ),
+            (old_events, new_events),
+            (old_hashes.event_subtree, new_hashes.event_subtree),
+            (old_hashes.event_local, new_hashes.event_local),
+        ]
+    )
+
+    for old_e, new_e in event_matches.items():
+        if old_hashes.event_subtree[old_e] == new_hashes.event_subtree[new_e]:
+            continue
+        old_event = old.events[old_e]
+        new_event = new.events[new_e]
+        node = NodeDiff("event", new_event.name, old_e, new_e)
+        for name, old_value, new_value in (
+            ("name", old_event.name, new_event.name),
+            ("enabled", old_event.enabled, new_event.enabled),
+            (
+                "bindings",
+                _bindings(old, old_event.output_variables),
+                _bindings(new, new_event.output_variables),
+            ),
+        ):
+            if old_value != new_value:
+                node.fields.append(name)
+        _compare_links(
+            node,
+            old,
+            new,
+            (old_event.output_links, old_hashes.event_links[old_e]),
+            (new_event.output_links, new_hashes.event_links[new_e]),
+            behavior_matches,
+        )
+        if node.fields or node.added_links or node.removed_links:
+            result.nodes.append(node)
+
+    for old_b, new_b in behavior_matches.items():
+        old_behavior = old.behaviors[old_b]
+        new_behavior = new.behaviors[new_b]
+        # Names aren't hashed, so a behavior recreated under a new name still needs reporting.
+        if (
+            old_hashes.behavior_subtree[old_b] == new_hashes.behavior_subtree[new_b]
+            and old_behavior.name == new_behavior.name
+        ):
+            continue
+        node = NodeDiff("behavior", new_behavior.name, old_b, new_b)
+        for name, old_value, new_value in (
+            ("class", old_behavior.cls, new_behavior.cls),
+            ("name", old_behavior.name, new_behavior.name),
+            ("detail", old_behavior.detail, new_behavior.detail),
+            ("references", old_behavior.references, new_behavior.references),
+            (
+                "bindings",
+                _bindings(old, old_behavior.linked_variables),
+                _bindings(new, new_behavior.linked_variables),
+            ),
+        ):
+            if old_value != new_value:
+                node.fields.append(name)
+        _compare_links(
+            node,
+            old,
+            new,
+            (old_behavior.output_links, old_hashes.behavior_links[old_b]),
+            (new_behavior.output_links, new_hashes.behavior_links[new_b]),
+            behavior_matches,
+        )
+        # A changed subtree with no changes of its own is just an ancestor of a change.
+        if node.fields or node.added_links or node.removed_links:
+            result.nodes.append(node)
+
+    # Everything left over was added or removed, along with all of its links.
+    for sequence, hashes, is_old in ((old, old_hashes, True), (new, new_hashes, False)):
+        for kind, matches, count in (
+            ("event", event_matches, len(sequence.events)),
+            ("behavior", behavior_matches, len(sequence.behaviors)),
+        ):
+            matched = set(matches.keys() if is_old else matches.values())
+            result.nodes.extend(
+                _unmatched(kind, idx, is_old, sequence, hashes)
+                for idx in range(count)
+                if idx not in matched
+            )
+    return result
+
+
+def diff_bpd(old: Bpd, new: Bpd) -> BpdDiff:
+    """Diff two versions of a bpd.
+
+    Sequences are paired up by name.
+
+    Args:
+        old: The old bpd.
+        new: The new bpd.
+    Returns:
+        The differences.
+    """
+    result = BpdDiff(old.path, new.path)
+    sequence_matches = _match(
+        [
+            (
+                _occurrences([s.name for s in old.sequences]),
+                _occurrences([s.name for s in new.sequences]),
+            )
+        ]
+    )
+    matched = set(sequence_matches.values())
+    for old_idx, old_seq in enumerate(old.sequences):
+        new_idx = sequence_matches.get(old_idx)
+        new_seq = Sequence(old_seq.name) if new_idx is None else new.sequences[new_idx]
+        seq_diff = diff_sequence(old_seq, new_seq, old_idx, new_idx)
+        if seq_diff.nodes or new_idx is None:
+            result.sequences.append(seq_diff)
+    for new_idx, new_seq in enumerate(new.sequences):
+        if new_idx not in matched:
+            result.sequences.append(diff_sequence(Sequence(new_seq.name), new_seq, None, new_idx))
+    return result
+
+
+STATUS_SYMBOLS = {"added": "+", "removed": "-", "modified": "~", "rewired": ">"}
+
+
+def format_diff(diff: BpdDiff) -> list[str]:
+    """Format a diff as lines of text.
+
+    Args:
+        diff: The diff to format.
+    Returns:
+        The lines, without trailing newlines.
+    """
+    if not diff.changed:
+        return [f"{diff.new_path}: no changes"]
+    lines = [f"--- {diff.old_path}", f"+++ {diff.new_path}"]
+    for seq in diff.sequences:
+        if seq.old_idx is None:
+            lines.append(f"+ sequence [{seq.new_idx}] {seq.name}")
+        elif seq.new_idx is None:
+            lines.append(f"- sequence [{seq.old_idx}] {seq.name}")
+        else:
+            lines.append(f"sequence [{seq.old_idx}->{seq.new_idx}] {seq.name}")
+        for node in seq.nodes:
+            if node.old is None or node.new is None:
+                index = f"{node.new if node.old is None else node.old}"
+            else:
+                index = f"{node.old}->{node.new}"
+            line = f"  {STATUS_SYMBOLS[node.status]} {node.kind} [{index}] {node.name}"
+            if node.fields:
+                line += f" ({', '.join(node.fields)})"
+            lines.append(line)
+            lines.extend(f"      - {link.description}" for link in node.removed_links)
+            lines.extend(f"      + {link.description}" for link in node.added_links)
+    return lines
+
+
+HIGHLIGHT_COLORS = {"added": "green4", "modified": "darkorange", "rewired": "blue"}
+REMOVED_COLOR = "red"
+
+
+def _diff_node_name(old: Bpd, new: Bpd, seq: SequenceDiff, kind: str, idx: int) -> str | None:
+    # Gets the graph node name of an old node, which is the new node's name if it was matched.
+    matches = seq.event_matches if kind == "event" else seq.behavior_matches
+    if seq.new_idx is not None and idx in matches:
+        sequence, sequence_idx, prefix = new.sequences[seq.new_idx], seq.new_idx, ""
+        idx = matches[idx]
+    else:
+        sequence, sequence_idx, prefix = old.sequences[seq.old_idx], seq.old_idx, "removed "
+    if kind == "event":
+        return prefix + graph.get_event_name(sequence, idx, sequence_idx)
+    if sequence.behaviors[idx].path is None:
+        return None
+    return prefix + graph.get_behaviour_name(sequence, idx, sequence_idx)
+
+
+def build_diff_graph(old: Bpd, new: Bpd, diff: BpdDiff) -> graphviz.Digraph:
+    """Build the graph of the new bpd, with the differences to the old one highlighted.
+
+    Added, modified and rewired nodes get a thick green, orange or blue outline, added links are
+    drawn in green. Removed nodes and links are drawn dashed in red.
+
+    Args:
+        old: The old bpd.
+        new: The new bpd.
+        diff: The diff between the two.
+    Returns:
+        The graph.
+    """
+    node_attrs: dict[graph.NodeKey, dict[str, str]] = {}
+    edge_attrs: dict[graph.EdgeKey, dict[str, str]] = {}
+    for seq in diff.sequences:
+        if seq.new_idx is None:
+            continue
+        for node in seq.nodes:
+            if node.new is None:
+                continue
+            color = HIGHLIGHT_COLORS[node.status]
+            node_attrs[(seq.new_idx, node.kind, node.new)] = {"color": color, "penwidth": "3"}
+            for link in node.added_links:
+                edge_attrs[(seq.new_idx, link.index)] = {"color": color, "penwidth": "2"}
+
+    dot = graph.build_graph(new, node_attrs, edge_attrs)
+    removed_style = {"color": REMOVED_COLOR, "fontcolor": REMOVED_COLOR, "style": "dashed"}
+    for seq in diff.sequences:
+        if seq.old_idx is None:
+            continue
+        for node in seq.nodes:
+            if node.old is None:
+                continue
+            source = _diff_node_name(old, new, seq, node.kind, node.old)
+            if source is None:
+                continue
+            if node.new is None:
+                dot.node(source, shape="box", **removed_style)
+            for link in node.removed_links:
+                data = old.sequences[seq.old_idx].output_links[link.index]
+                target = _diff_node_name(old, new, seq, "behavior", data.linked_behavior)
+                if target is None:
+                    continue
+                delay = "" if data.activate_delay == 0.0 else f" d={data.activate_delay}"
+                dot.edge(
+                    source,
+                    target,
+                    label=f"({data.link_id},{data.linked_behavior}){delay}",
+                    **removed_style,
+                )
+    return dot
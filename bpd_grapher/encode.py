@@ -0,0 +1,126 @@
+"""Write a `model.Sequence` back into a BehaviorProviderDefinition.
+
+Every table is built up front as a list of fresh structs, then each array is assigned exactly
+once, so a bad sequence never leaves the bpd half written.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import unrealsdk
+from unrealsdk.unreal import UArrayProperty, UScriptStruct, UStructProperty, WrappedStruct
+
+from bpd_grapher import model
+
+if TYPE_CHECKING:
+    from bl2.GearboxFramework import BehaviorProviderDefinition
+
+
+def _element_type(behavior_sequence: WrappedStruct, prop_name: str) -> UScriptStruct:
+    prop = behavior_sequence._type._find_prop(prop_name)
+    if not isinstance(prop, UArrayProperty) or not isinstance(prop.Inner, UStructProperty):
+        msg = f"BehaviorSequenceData.{prop_name} isn't an array of structs"
+        raise model.BpdError(msg)
+    return prop.Inner.Struct
+
+
+def _copy_struct(src: WrappedStruct, dst: WrappedStruct) -> None:
+    for prop in src._type._properties():
+        setattr(dst, prop.Name, getattr(src, prop.Name))
+
+
+def validate_sequence(sequence: model.Sequence) -> None:
+    """Check every index in a sequence is in range, raising a `model.BpdError` if not."""
+    for event in sequence.events:
+        list(sequence.iter_variable_links(event.output_variables))
+        list(sequence.iter_output_links(event.output_links))
+    for behavior in sequence.behaviors:
+        list(sequence.iter_variable_links(behavior.linked_variables))
+        list(sequence.iter_output_links(behavior.output_links))
+
+
+def encode_sequence(
+    behavior_provider_definition: BehaviorProviderDefinition,
+    sequence_idx: int,
+    sequence: model.Sequence,
+) -> None:
+    """Replace the tables of one sequence of a bpd.
+
+    Events are matched up with the existing ones by index and name, so their other settings
+    (trigger counts, filters, etc.) are kept.
+
+    Args:
+        behavior_provider_definition: The bpd to write to.
+        sequence_idx: The index of the sequence to replace.
+        sequence: The new tables.
+    """
+    validate_sequence(sequence)
+    behavior_sequence = behavior_provider_definition.BehaviorSequences[sequence_idx]
+
+    behaviors = []
+    for behavior in sequence.behaviors:
+        obj = None
+        if behavior.path is not None:
+            try:
+                obj = unrealsdk.find_object(behavior.cls, behavior.path)
+            except ValueError:
+                msg = f"Couldn't find behavior {behavior.path}"
+                raise model.BpdError(msg) from None
+        behaviors.append(obj)
+
+    old_events = list(behavior_sequence.EventData2)
+    event_type = _element_type(behavior_sequence, "EventData2")
+    event_data = []
+    for idx, event in enumerate(sequence.events):
+        entry = WrappedStruct(event_type)
+        if idx < len(old_events) and str(old_events[idx].UserData.EventName) == event.name:
+            _copy_struct(old_events[idx], entry)
+        else:
+            entry.UserData.EventName = event.name
+        entry.UserData.bEnabled = event.enabled
+        entry.OutputVariables.ArrayIndexAndLength = event.output_variables
+        entry.OutputLinks.ArrayIndexAndLength = event.output_links
+        event_data.append(entry)
+
+    behavior_type = _element_type(behavior_sequence, "BehaviorData2")
+    behavior_data = []
+    for behavior, obj in zip(sequence.behaviors, behaviors, strict=True):
+        entry = WrappedStruct(behavior_type)
+        entry.Behavior = obj
+        entry.LinkedVariables.ArrayIndexAndLength = behavior.linked_variables
+        entry.OutputLinks.ArrayIndexAndLength = behavior.output_links
+        behavior_data.append(entry)
+
+    variable_type = _element_type(behavior_sequence, "VariableData")
+    variable_data = []
+    for variable in sequence.variables:
+        entry = WrappedStruct(variable_type)
+        entry.Name = variable.name
+        entry.Type = variable.type
+        variable_data.append(entry)
+
+    output_link_type = _element_type(behavior_sequence, "ConsolidatedOutputLinkData")
+    output_link_data = []
+    for link in sequence.output_links:
+        entry = WrappedStruct(output_link_type)
+        entry.LinkIdAndLinkedBehavior = link.link_id_and_linked_behavior
+        entry.ActivateDelay = link.activate_delay
+        output_link_data.append(entry)
+
+    variable_link_type = _element_type(behavior_sequence, "ConsolidatedVariableLinkData")
+    variable_link_data = []
+    for link in sequence.variable_links:
+        entry = WrappedStruct(variable_link_type)
+        entry.PropertyName = link.property_name
+        entry.VariableLinkType = link.link_type
+        entry.LinkedVariables.ArrayIndexAndLength = link.linked_variables
+        entry.ConnectionIndex = link.connection_index
+        variable_link_data.append(entry)
+
+    behavior_sequence.EventData2 = event_data
+    behavior_sequence.BehaviorData2 = behavior_data
+    behavior_sequence.VariableData = variable_data
+    behavior_sequence.ConsolidatedOutputLinkData = output_link_data
+    behavior_sequence.ConsolidatedVariableLinkData = variable_link_data
+    behavior_sequence.ConsolidatedLinkedVariables = sequence.linked_variables
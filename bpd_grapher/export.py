@@ -0,0 +1,229 @@
+"""Export decoded bpds as JSON or GraphML for use in other tools.
+
+Both exporters write one bpd at a time as they pull them from the given iterable, so memory use
+only depends on the largest single bpd, not on how many are exported.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Callable, Iterable
+from typing import IO, Any
+from xml.sax.saxutils import escape, quoteattr
+
+from bpd_grapher.model import Bpd, BpdError, Sequence, link_label
+
+ErrorCallback = Callable[[Bpd, BpdError], None]
+
+GRAPHML_NODE_KEYS = (
+    "kind",
+    "index",
+    "name",
+    "enabled",
+    "class",
+    "path",
+    "detail",
+    "references",
+    "bindings",
+)
+GRAPHML_EDGE_KEYS = ("order", "link_id", "delay", "label")
+GRAPHML_KEY_TYPES = {
+    "index": "int",
+    "enabled": "boolean",
+    "order": "int",
+    "link_id": "int",
+    "delay": "double",
+}
+
+
+def _bindings(sequence: Sequence, packed: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "link": link_idx,
+            "type": link_data.link_type_name,
+            "property": link_data.property_name,
+            "connection": link_data.connection_index,
+            "variables": variables,
+        }
+        for link_idx, link_data, variables in sequence.iter_variable_links(packed)
+    ]
+
+
+def sequence_to_dict(sequence: Sequence, idx: int) -> dict[str, Any]:
+    """Resolve a sequence's packed tables into typed nodes and edges.
+
+    Events get the ids `e{index}` and behaviors `b{index}`.
+
+    Args:
+        sequence: The sequence to resolve.
+        idx: The index of the sequence in its bpd.
+    Returns:
+        A JSON serializable dict.
+    """
+    nodes: list[dict[str, Any]] = []
+    edges: list[dict[str, Any]] = []
+
+    def add_edges(source: str, source_class: str, packed: int) -> None:
+        for order, (_, link) in enumerate(sequence.iter_output_links(packed)):
+            edges.append(
+                {
+                    "source": source,
+                    "target": f"b{link.linked_behavior}",
+                    "order": order,
+                    "link_id": link.link_id,
+                    "delay": link.activate_delay,
+                    "label": link_label(source_class, link.link_id),
+                }
+            )
+
+    for event_idx, event in enumerate(sequence.events):
+        nodes.append(
+            {
+                "id": f"e{event_idx}",
+                "kind": "event",
+                "index": event_idx,
+                "name": event.name,
+                "enabled": event.enabled,
+                "bindings": _bindings(sequence, event.output_variables),
+            }
+        )
+        add_edges(f"e{event_idx}", "", event.output_links)
+
+    for behavior_idx, behavior in enumerate(sequence.behaviors):
+        nodes.append(
+            {
+                "id": f"b{behavior_idx}",
+                "kind": "behavior",
+                "index": behavior_idx,
+                "name": behavior.name,
+                "class": behavior.cls,
+                "path": behavior.path,
+                "detail": behavior.detail.strip(),
+                "references": behavior.references,
+                "bindings": _bindings(sequence, behavior.linked_variables),
+            }
+        )
+        add_edges(f"b{behavior_idx}", behavior.cls, behavior.output_links)
+
+    return {
+        "index": idx,
+        "name": sequence.name,
+        "variables": [
+            {"index": var_idx, "name": var.name, "type": var.type_name}
+            for var_idx, var in enumerate(sequence.variables)
+        ],
+        "nodes": nodes,
+        "edges": edges,
+    }
+
+
+def bpd_to_dict(bpd: Bpd) -> dict[str, Any]:
+    """Resolve a whole bpd into a JSON serializable dict."""
+    return {
+        "path": bpd.path,
+        "sequences": [sequence_to_dict(seq, idx) for idx, seq in enumerate(bpd.sequences)],
+    }
+
+
+def _resolved(
+    bpds: Iterable[Bpd], on_error: ErrorCallback | None
+) -> Iterable[tuple[Bpd, dict[str, Any]]]:
+    # Each bpd is resolved fully before anything is written, so a broken one never leaves a half
+    # written entry in the output.
+    for bpd in bpds:
+        try:
+            yield bpd, bpd_to_dict(bpd)
+        except BpdError as e:
+            if on_error is None:
+                raise
+            on_error(bpd, e)
+
+
+def write_json(
+    bpds: Iterable[Bpd],
+    file: IO[str],
+    *,
+    lines: bool = False,
+    on_error: ErrorCallback | None = None,
+) -> int:
+    """Write bpds as compact JSON.
+
+    Args:
+        bpds: The bpds to write.
+        file: The text file to write to.
+        lines: If true, writes JSON Lines (one bpd per line) instead of a single array.
+        on_error: If given, bpds with bad indexes are passed to this and skipped, instead of
+                  raising.
+    Returns:
+        The number of bpds written.
+    """
+    count = 0
+    if not lines:
+        file.write("[")
+    for _, data in _resolved(bpds, on_error):
+        if count and not lines:
+            file.write(",\n")
+        file.write(json.dumps(data, separators=(",", ":")))
+        if lines:
+            file.write("\n")
+        count += 1
+    if not lines:
+        file.write("]\n")
+    return count
+
+
+def _graphml_data(key: str, value: Any) -> str:
+    if value is None or value in ("", {}, []):
+        return ""
+    if not isinstance(value, str):
+        value = json.dumps(value, separators=(",", ":"))
+    return f'<data key="{key}">{escape(value)}</data>'
+
+
+def write_graphml(
+    bpds: Iterable[Bpd],
+    file: IO[str],
+    *,
+    on_error: ErrorCallback | None = None,
+) -> int:
+    """Write bpds as GraphML, with one graph per behavior sequence.
+
+    Args:
+        bpds: The bpds to write.
+        file: The text file to write to.
+        on_error: If given, bpds with bad indexes are passed to this and skipped, instead of
+                  raising.
+    Returns:
+        The number of bpds written.
+    """
+    file.write(
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+    )
+    for domain, keys in (("node", GRAPHML_NODE_KEYS), ("edge", GRAPHML_EDGE_KEYS)):
+        for key in keys:
+            file.write(
+                f'<key id="{key}" for="{domain}" attr.name="{key}" '
+                f'attr.type="{GRAPHML_KEY_TYPES.get(key, "string")}"/>\n'
+            )
+
+    count = 0
+    for bpd, data in _resolved(bpds, on_error):
+        for sequence in data["sequences"]:
+            graph_id = quoteattr(f"{bpd.path}[{sequence['index']}] {sequence['name']}")
+            file.write(f'<graph id={graph_id} edgedefault="directed">\n')
+            # Node ids have to be unique across the whole document.
+            prefix = f"p{count}s{sequence['index']}"
+            for node in sequence["nodes"]:
+                values = "".join(_graphml_data(key, node.get(key)) for key in GRAPHML_NODE_KEYS)
+                file.write(f'<node id="{prefix}{node["id"]}">{values}</node>\n')
+            for edge in sequence["edges"]:
+                values = "".join(_graphml_data(key, edge[key]) for key in GRAPHML_EDGE_KEYS)
+                file.write(
+                    f'<edge source="{prefix}{edge["source"]}" target="{prefix}{edge["target"]}">'
+                    f"{values}</edge>\n"
+                )
+            file.write("</graph>\n")
+        count += 1
+    file.write("</graphml>\n")
+    return count
@@ -0,0 +1,409 @@
+"""Build and render the Graphviz graph of a decoded bpd.
+
+This only works on `model.Bpd`, so the same graph is drawn in game and from a snapshot.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import html
+import json
+import math
+import threading
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from bpd_grapher import graphviz, layout
+from bpd_grapher.model import REMOTE_EVENT_CLASSES, Bpd, BpdError, Sequence, link_label
+
+LAYOUTS = ("auto", "graphviz", "builtin")
+# How to lay out bpds with multiple sequences: all in one graph, one cluster per sequence, or one
+# file per sequence plus an index.
+GROUPINGS = ("flat", "cluster", "split")
+CLUSTER_PREFIX = "cluster_"
+
+# Where node positions are cached, relative to the output directory, and how many to keep.
+LAYOUT_CACHE_DIR = "layout_cache"
+LAYOUT_CACHE_SIZE = 64
+# `-Tjson` output, which the cached positions are read from, was added in Graphviz 2.40.
+LAYOUT_CACHE_MIN_VERSION = (2, 40)
+
+# (sequence index, "event" or "behavior", index)
+NodeKey = tuple[int, str, int]
+# (sequence index, index into output_links)
+EdgeKey = tuple[int, int]
+
+
+def simple_round(n: float) -> float | int:
+    if n == 0:
+        return 0
+    sgn = -1 if n < 0 else 1
+    scale = int(-math.floor(math.log10(abs(n))))
+    if scale <= 0:
+        scale = 1
+    factor = 10**scale
+    return sgn * math.floor(abs(n) * factor) / factor
+
+
+def get_variable_data(sequence: Sequence, linked_variables: int) -> str:
+    data = ""
+    for var, link_data, variables in sequence.iter_variable_links(linked_variables):
+        data += f"\n{link_data.link_type_name}: "
+        for v_index in variables:
+            d = sequence.variables[v_index]
+            d_name = d.name if d.name != "None" else ""
+            data += f"[{v_index}]{d_name}({d.type_name}) "
+        data += f"via [{var}]{link_data.property_name}"
+
+        data += f" ({link_data.connection_index})" if link_data.connection_index != 0 else ""
+    return data
+
+
+def get_event_name(sequence: Sequence, event_idx: int, sequence_idx: int) -> str:
+    return f"[{sequence_idx}] {sequence.name} [{event_idx}] {sequence.events[event_idx].name}"
+
+
+def get_behaviour_name(sequence: Sequence, idx: int, sequence_idx: int) -> str:
+    behavior = sequence.behaviors[idx]
+    return f"[{sequence_idx}][{idx}] {behavior.name}{behavior.detail}"
+
+
+def link_text(order: int, link_id: int, idx: int, delay: float) -> str:
+    delay_text = "" if delay == 0.0 else f" d={simple_round(delay)}"
+    return f"[{order}] ({link_id},{idx}){delay_text}"
+
+
+def _add_sequence(
+    dot: graphviz.Digraph,
+    event_subgraph: graphviz.Digraph,
+    sequence: Sequence,
+    sequence_idx: int,
+    node_attrs: dict[NodeKey, dict[str, str]],
+    edge_attrs: dict[EdgeKey, dict[str, str]],
+) -> None:
+    for event_idx, event in enumerate(sequence.events):
+        event_name = get_event_name(sequence, event_idx, sequence_idx)
+        try:
+            event_info = event_name + get_variable_data(sequence, event.output_variables)
+        except BpdError as e:
+            msg = f"Error for event [{sequence_idx}][{event_idx}] {event.name}: {e}"
+            raise BpdError(msg) from e
+        event_subgraph.node(
+            event_name,
+            event_info,
+            **{
+                "shape": "box",
+                "style": "filled",
+                "fillcolor": "chartreuse2",
+                "group": "event",
+                **node_attrs.get((sequence_idx, "event", event_idx), {}),
+            },
+        )
+
+    for behavior_idx, behavior in enumerate(sequence.behaviors):
+        if behavior.path is None:
+            continue
+        behavior_name = get_behaviour_name(sequence, behavior_idx, sequence_idx)
+        try:
+            behavior_info = behavior_name + get_variable_data(sequence, behavior.linked_variables)
+        except BpdError as e:
+            msg = f"Error for behavior [{sequence_idx}][{behavior_idx}] {behavior.name}: {e}"
+            raise BpdError(msg) from e
+
+        if behavior.cls in REMOTE_EVENT_CLASSES:
+            attrs = {"shape": "cds", "style": "filled", "fillcolor": "gold1", "margin": "0.15"}
+        else:
+            attrs = {"shape": "box", "style": "rounded"}
+        attrs.update(node_attrs.get((sequence_idx, "behavior", behavior_idx), {}))
+        dot.node(behavior_name, behavior_info, **attrs)
+
+    for event_idx, event in enumerate(sequence.events):
+        for i, (link_idx, link) in enumerate(sequence.iter_output_links(event.output_links)):
+            idx = link.linked_behavior
+            if sequence.behaviors[idx].path is None:
+                continue
+            dot.edge(
+                get_event_name(sequence, event_idx, sequence_idx),
+                get_behaviour_name(sequence, idx, sequence_idx),
+                label=link_text(i, link.link_id, idx, link.activate_delay),
+                **edge_attrs.get((sequence_idx, link_idx), {}),
+            )
+    for behavior_idx, behavior in enumerate(sequence.behaviors):
+        if behavior.path is None:
+            continue
+        for i, (link_idx, link) in enumerate(sequence.iter_output_links(behavior.output_links)):
+            idx = link.linked_behavior
+            if sequence.behaviors[idx].path is None:
+                continue
+            dot.edge(
+                get_behaviour_name(sequence, behavior_idx, sequence_idx),
+                get_behaviour_name(sequence, idx, sequence_idx),
+                label=(
+                    f"{link_text(i, link.link_id, idx, link.activate_delay)} "
+                    f"{link_label(behavior.cls, link.link_id)}"
+                ),
+                **edge_attrs.get((sequence_idx, link_idx), {}),
+            )
+
+
+def build_graph(
+    bpd: Bpd,
+    node_attrs: dict[NodeKey, dict[str, str]] | None = None,
+    edge_attrs: dict[EdgeKey, dict[str, str]] | None = None,
+    *,
+    clusters: bool = False,
+    sequences: Iterable[int] | None = None,
+) -> graphviz.Digraph:
+    """Build the graph of a bpd.
+
+    Args:
+        bpd: The bpd to graph.
+        node_attrs: Extra attributes for specific nodes, overriding the default ones.
+        edge_attrs: Extra attributes for specific edges, overriding the default ones.
+        clusters: If true, draws a box around each sequence, with its events at the top of it.
+        sequences: If given, only graphs the sequences with these indexes.
+    Returns:
+        The graph.
+    """
+    node_attrs = node_attrs or {}
+    edge_attrs = edge_attrs or {}
+    dot = graphviz.Digraph()
+    dot.edge_attr.update(arrowhead="vee")
+    dot.body.append(
+        f"""    labelloc="t";
+		label="{bpd.path}";\n"""
+    )
+    if clusters:
+        # Needed for the rank=min event subgraphs to work inside clusters.
+        dot.attr(newrank="true")
+
+    event_subgraph = graphviz.Digraph()
+    event_subgraph.attr(rank="min")
+    indexes = range(len(bpd.sequences)) if sequences is None else sequences
+    for sequence_idx in indexes:
+        sequence = bpd.sequences[sequence_idx]
+        if not clusters:
+            _add_sequence(dot, event_subgraph, sequence, sequence_idx, node_attrs, edge_attrs)
+            continue
+        cluster = graphviz.Digraph(name=f"{CLUSTER_PREFIX}{sequence_idx}")
+        cluster.attr(label=f"[{sequence_idx}] {sequence.name}", style="rounded", color="grey50")
+        cluster_events = graphviz.Digraph()
+        cluster_events.attr(rank="min")
+        _add_sequence(cluster, cluster_events, sequence, sequence_idx, node_attrs, edge_attrs)
+        cluster.subgraph(cluster_events)
+        dot.subgraph(cluster)
+    dot.subgraph(event_subgraph)
+    return dot
+
+
+def topology_hash(parsed: layout.DotGraph) -> str:
+    """Hash everything the positions of a graph's nodes depend on.
+
+    That's the nodes, the size of their labels, and the edges between them along with their
+    labels, which `dot` makes room for. Colors and styles are left out, so changing only those
+    keeps the same positions.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for name, node in parsed.nodes.items():
+        lines = layout.label_lines(node.attrs.get("label", name))
+        size = f"{len(lines)},{max(map(len, lines), default=0)},{node.attrs.get('shape', '')}"
+        digest.update(f"n\0{name}\0{size}\0".encode())
+    for edge in parsed.edges:
+        label = edge.attrs.get("label", "")
+        digest.update(f"e\0{edge.tail}\0{edge.head}\0{label}\0".encode())
+    return digest.hexdigest()
+
+
+# `render_sequences` renders from several threads at once, only one may touch the cache files at
+# a time. Layouts themselves run outside of it.
+_layout_cache_lock = threading.Lock()
+
+
+def _layout_positions(dot: graphviz.Digraph, cache_dir: Path, key: str) -> dict[str, str]:
+    cache_file = cache_dir / f"{key}.json"
+    with _layout_cache_lock:
+        try:
+            positions = json.loads(cache_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            pass
+        else:
+            cache_file.touch()
+            return positions
+
+    laid_out = json.loads(dot.pipe(format="json", encoding="utf-8"))
+    positions = {
+        obj["name"]: obj["pos"] for obj in laid_out.get("objects", []) if "pos" in obj
+    }
+    with _layout_cache_lock:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        cache_file.write_text(json.dumps(positions), encoding="utf-8")
+        old_files = sorted(cache_dir.glob("*.json"), key=lambda path: path.stat().st_mtime)
+        for path in old_files[:-LAYOUT_CACHE_SIZE]:
+            path.unlink(missing_ok=True)
+    return positions
+
+
+def _can_pin_layout() -> bool:
+    installation = graphviz.backend.discovery.installation()
+    if installation.version < LAYOUT_CACHE_MIN_VERSION:
+        return False
+    # An empty set means dot's list of engines couldn't be read, so just try it.
+    return not installation.engines or "neato" in installation.engines
+
+
+def pinned_source(
+    dot: graphviz.Digraph, parsed: layout.DotGraph, positions: dict[str, str]
+) -> graphviz.Source:
+    """Add fixed positions to a graph's nodes, for `neato -n2` to draw it at.
+
+    Args:
+        dot: The graph.
+        parsed: The parsed graph, nodes which aren't in it are skipped.
+        positions: The position of each node, as `dot -Tjson` gives them.
+    Returns:
+        The graph's source, with the positions added.
+    """
+    pins = "".join(
+        f"\t{graphviz.quoting.quote(name)} [pos={graphviz.quoting.quote(pos)}]\n"
+        for name, pos in positions.items()
+        if name in parsed.nodes
+    )
+    source = dot.source.rstrip()
+    return graphviz.Source(f"{source[:-1]}\tsplines=true\n{pins}}}\n")
+
+
+def _render_graphviz(
+    dot: graphviz.Digraph,
+    parsed: layout.DotGraph,
+    directory: Path,
+    filename: str,
+    *,
+    layout_cache: bool,
+    view: bool,
+) -> Path:
+    # neato can't draw clusters, and old versions can't give the positions to cache, so those
+    # always go through a full dot layout.
+    if (
+        not layout_cache
+        or any(f"subgraph {CLUSTER_PREFIX}" in line for line in dot.body)
+        or not _can_pin_layout()
+    ):
+        return Path(dot.render(filename=filename, format="pdf", directory=directory, view=view))
+
+    positions = _layout_positions(dot, Path(directory) / LAYOUT_CACHE_DIR, topology_hash(parsed))
+    return Path(
+        pinned_source(dot, parsed, positions).render(
+            filename=filename,
+            format="pdf",
+            directory=directory,
+            view=view,
+            engine="neato",
+            neato_no_op=2,
+        )
+    )
+
+
+def render(
+    dot: graphviz.Digraph,
+    directory: Path,
+    filename: str = "bpd",
+    *,
+    layout_mode: str = "auto",
+    layout_cache: bool = True,
+    view: bool = False,
+) -> Path:
+    """Render a graph, picking between Graphviz and the builtin layout.
+
+    Auto uses the builtin layout for small graphs, or when Graphviz is not installed.
+
+    When using Graphviz, the node positions from `dot` are cached by `topology_hash`. Graphs with
+    the same topology are re-drawn at those positions by `neato -n2`, skipping the full layout.
+
+    Args:
+        dot: The graph to render.
+        directory: The directory to write to.
+        filename: The file name to write, without extension.
+        layout_mode: One of `LAYOUTS`.
+        layout_cache: If false, always does a full layout.
+        view: If true, opens the rendered file in the default viewer.
+    Returns:
+        The path of the rendered file, a pdf when Graphviz was used, an svg otherwise.
+    """
+    has_graphviz = graphviz.backend.discovery.is_available()
+    if layout_mode == "graphviz" and not has_graphviz:
+        raise graphviz.ExecutableNotFound([graphviz.DOT_BINARY])
+
+    parsed = layout.parse_dot(dot.source)
+    if layout_mode == "graphviz" or not (
+        layout_mode == "builtin"
+        or not has_graphviz
+        or len(parsed.nodes) <= layout.BUILTIN_LAYOUT_MAX_NODES
+    ):
+        return _render_graphviz(
+            dot, parsed, directory, filename, layout_cache=layout_cache, view=view
+        )
+
+    outfile = layout.render_svg(parsed, Path(directory) / f"{filename}.svg")
+    if view:
+        graphviz.view(outfile)
+    return outfile
+
+
+def render_sequences(
+    bpd: Bpd,
+    directory: Path,
+    filename: str = "bpd",
+    *,
+    layout_mode: str = "auto",
+    layout_cache: bool = True,
+    jobs: int = 0,
+    view: bool = False,
+) -> Path:
+    """Render each sequence of a bpd to its own file, in parallel, and write an index of them.
+
+    Laying out one big graph gets a lot slower the bigger it is, so splitting it up means only the
+    largest sequence really matters.
+
+    Args:
+        bpd: The bpd to render.
+        directory: The directory to write to.
+        filename: The base file name, each sequence is written to `{filename}.{index}`.
+        layout_mode: One of `LAYOUTS`.
+        layout_cache: If false, always does a full layout.
+        jobs: How many sequences to render at once, 0 uses Python's default.
+        view: If true, opens the index in the default viewer.
+    Returns:
+        The path of the html index.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    def render_one(sequence_idx: int) -> Path:
+        dot = build_graph(bpd, sequences=[sequence_idx])
+        return render(
+            dot,
+            directory,
+            f"{filename}.{sequence_idx}",
+            layout_mode=layout_mode,
+            layout_cache=layout_cache,
+        )
+
+    with ThreadPoolExecutor(max_workers=jobs or None) as executor:
+        outfiles = list(executor.map(render_one, range(len(bpd.sequences))))
+
+    rows = "".join(
+        f'<li><a href="{html.escape(outfile.name)}">[{idx}] {html.escape(sequence.name)}</a>'
+        f" - {len(sequence.events)} events, {len(sequence.behaviors)} behaviors</li>\n"
+        for idx, (sequence, outfile) in enumerate(zip(bpd.sequences, outfiles, strict=True))
+    )
+    index = directory / f"{filename}.html"
+    title = html.escape(bpd.path)
+    index.write_text(
+        f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{title}</title></head>\n'
+        f"<body><h1>{title}</h1>\n<ul>\n{rows}</ul></body></html>\n",
+        encoding="utf-8",
+    )
+    if view:
+        graphviz.view(index)
+    return index
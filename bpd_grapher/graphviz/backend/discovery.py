@@ -0,0 +1,161 @@
+"""Discover the Graphviz installation once and cache it for the whole process."""
+
+import logging
+import os
+import pathlib
+import re
+import shutil
+import subprocess
+import threading
+import typing
+
+from .. import _compat
+
+from . import dot_command
+from . import execute
+
+__all__ = ['Installation', 'installation', 'executable',
+           'is_available', 'invalidate']
+
+VERSION_PATTERN = re.compile(r'''
+                             graphviz[ ]
+                             version[ ]
+                             (\d+)\.(\d+)
+                             (?:\.(\d+)
+                               (?:
+                                 ~dev\.\d{8}\.\d{4}
+                                 |
+                                 \.(\d+)
+                               )?
+                             )?
+                             [ ]
+                             ''', re.VERBOSE)
+
+OPTION_LIST_PATTERN = re.compile(r'Use one of:(?P<options>[^\n]*)')
+
+
+log = logging.getLogger(__name__)
+
+
+class Installation(typing.NamedTuple):
+    """Graphviz installation found on the systems' PATH."""
+
+    executable: pathlib.Path
+
+    version: typing.Tuple[int, ...]
+
+    formats: typing.FrozenSet[str]
+
+    engines: typing.FrozenSet[str]
+
+
+_lock = threading.Lock()
+
+_installation: typing.Optional[Installation] = None
+
+_failure: typing.Optional[Exception] = None
+
+# Everything a broken or missing installation can raise while being discovered.
+_DISCOVERY_ERRORS = (execute.ExecutableNotFound, execute.CalledProcessError,
+                     RuntimeError, OSError)
+
+
+def installation() -> Installation:
+    """Return the cached Graphviz installation, discovering it on first use.
+
+    A failed lookup is cached as well, whether ``dot`` is missing or
+    ``dot -V`` fails, so callers pay for at most one failed subprocess launch
+    until :func:`invalidate` is called.
+
+    Returns:
+        The executable path, version, formats and engines of ``dot``.
+
+    Raises:
+        graphviz.ExecutableNotFound: If the Graphviz executable is not found.
+        graphviz.CalledProcessError: If ``dot -V`` exits non-zero.
+        RuntimeError: If the ``dot -V`` output cannot be parsed.
+        OSError: If ``dot`` cannot be run, e.g. a permission error.
+    """
+    global _installation, _failure
+
+    with _lock:
+        if _installation is not None:
+            return _installation
+        if _failure is not None:
+            raise _failure
+
+        try:
+            _installation = _discover()
+        except _DISCOVERY_ERRORS as e:
+            _failure = e
+            raise
+        return _installation
+
+
+def executable() -> pathlib.Path:
+    """Return the resolved path of the cached ``dot`` executable.
+
+    Raises:
+        graphviz.ExecutableNotFound: If the Graphviz executable is not found.
+    """
+    return installation().executable
+
+
+def is_available() -> bool:
+    """Return whether a usable Graphviz installation was found."""
+    try:
+        installation()
+    except _DISCOVERY_ERRORS:
+        return False
+    return True
+
+
+def invalidate() -> None:
+    """Forget the cached installation, the next lookup searches PATH again."""
+    global _installation, _failure
+
+    with _lock:
+        _installation = None
+        _failure = None
+
+
+def _discover() -> Installation:
+    found = shutil.which(dot_command.DOT_BINARY)
+    if found is None:
+        raise execute.ExecutableNotFound([dot_command.DOT_BINARY])
+    path = pathlib.Path(found)
+    log.debug('found graphviz executable %r', path)
+
+    return Installation(executable=path,
+                        version=_run_version(path),
+                        formats=_list_options(path, '-T?'),
+                        engines=_list_options(path, '-K?'))
+
+
+def _run_version(path: typing.Union[os.PathLike, str]) -> typing.Tuple[int, ...]:
+    cmd = [path, '-V']
+    proc = execute.run_check(cmd,
+                             stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                             encoding='ascii')
+
+    ma = VERSION_PATTERN.search(proc.stdout)
+    if ma is None:
+        raise RuntimeError(f'cannot parse {cmd!r} output: {proc.stdout!r}')
+
+    return tuple(int(d) for d in ma.groups() if d is not None)
+
+
+def _list_options(path: typing.Union[os.PathLike, str],
+                  flag: str) -> typing.FrozenSet[str]:
+    """Return the options ``dot`` lists when given an unknown ``-T``/``-K``."""
+    proc = subprocess.run([path, flag],
+                          stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                          encoding='ascii', errors='replace',
+                          startupinfo=_compat.get_startupinfo())
+
+    ma = OPTION_LIST_PATTERN.search(proc.stdout)
+    if ma is None:
+        log.debug('cannot parse %r output: %r', flag, proc.stdout)
+        return frozenset()
+
+    return frozenset(o.partition(':')[0] for o in ma.group('options').split())
@@ -7,6 +7,8 @@ import typing
 from .. import exceptions
 from .. import parameters
 
+from . import discovery
+
 __all__ = ['DOT_BINARY', 'command']
 
 DOT_BINARY = pathlib.Path('dot')
@@ -24,6 +26,10 @@ def command(engine: str, format_: str, *,
         - https://www.graphviz.org/doc/info/command.html#-K
         - https://www.graphviz.org/doc/info/command.html#-T
         - https://www.graphviz.org/doc/info/command.html#-n
+
+    Note:
+        The executable is the resolved path cached by
+        :func:`graphviz.backend.discovery.executable`.
     """
     if formatter is not None and renderer is None:
         raise exceptions.RequiredArgumentError('formatter given without renderer')
@@ -36,7 +42,7 @@ def command(engine: str, format_: str, *,
     output_format = [f for f in (format_, renderer, formatter) if f is not None]
     output_format_flag = ':'.join(output_format)
 
-    cmd = [DOT_BINARY, f'-K{engine}', f'-T{output_format_flag}']
+    cmd = [discovery.executable(), f'-K{engine}', f'-T{output_format_flag}']
 
     if neato_no_op:
         cmd.append(f'-n{neato_no_op:d}')
@@ -1,26 +1,11 @@
 """Return the version number from running ``dot -V``."""
 
 import logging
-import re
-import subprocess
 import typing
 
-from . import dot_command
-from . import execute
+from . import discovery
 
-VERSION_PATTERN = re.compile(r'''
-                             graphviz[ ]
-                             version[ ]
-                             (\d+)\.(\d+)
-                             (?:\.(\d+)
-                               (?:
-                                 ~dev\.\d{8}\.\d{4}
-                                 |
-                                 \.(\d+)
-                               )?
-                             )?
-                             [ ]
-                             ''', re.VERBOSE)
+VERSION_PATTERN = discovery.VERSION_PATTERN
 
 
 log = logging.getLogger(__name__)
@@ -46,17 +31,12 @@ def version() -> typing.Tuple[int, ...]:
     Note:
         Ignores the ``~dev.<YYYYmmdd.HHMM>`` portion of development versions.
 
+    Note:
+        ``dot -V`` only runs on first use, the result is cached process-wide
+        until :func:`graphviz.backend.discovery.invalidate` is called.
+
     See also:
         Upstream release version entry format:
         https://gitlab.com/graphviz/graphviz/-/blob/f94e91ba819cef51a4b9dcb2d76153684d06a913/gen_version.py#L17-20
     """
-    cmd = [dot_command.DOT_BINARY, '-V']
-    proc = execute.run_check(cmd,
-                             stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                             encoding='ascii')
-
-    ma = VERSION_PATTERN.search(proc.stdout)
-    if ma is None:
-        raise RuntimeError(f'cannot parse {cmd!r} output: {proc.stdout!r}')
-
-    return tuple(int(d) for d in ma.groups() if d is not None)
+    return discovery.installation().version
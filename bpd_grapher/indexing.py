@@ -0,0 +1,122 @@
+"""Keeps a search index of every loaded bpd up to date as maps load."""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import TYPE_CHECKING, Any
+
+import unrealsdk
+from command_extensions.builtins import obj_name_splitter
+from mods_base import command, hook
+from unrealsdk.hooks import Type
+
+from bpd_grapher import search
+from bpd_grapher.decode import decode_bpd, find_bpds, fingerprint_bpd
+
+if TYPE_CHECKING:
+    from bl2.GearboxFramework import BehaviorProviderDefinition
+
+index = search.BpdIndex()
+_built = False
+# The fingerprint of each indexed bpd when it was decoded, see `decode.fingerprint_bpd`.
+_fingerprints: dict[str, tuple[Any, ...]] = {}
+
+
+def _index_bpd(path: str, obj: BehaviorProviderDefinition) -> bool:
+    fingerprint = fingerprint_bpd(obj)
+    if path in index and _fingerprints.get(path) == fingerprint:
+        return False
+    index.add(decode_bpd(obj))
+    _fingerprints[path] = fingerprint
+    return True
+
+
+def refresh(rebuild: bool = False) -> tuple[int, int]:
+    """Bring the index in line with the currently loaded bpds.
+
+    Only bpds which are new, or whose fingerprint changed since they were indexed, get decoded, so
+    this is cheap after the first run.
+
+    Args:
+        rebuild: If true, throws away the existing index and decodes everything again.
+    Returns:
+        The number of bpds decoded and the number removed.
+    """
+    global _built
+    if rebuild:
+        index.clear()
+        _fingerprints.clear()
+    loaded = {obj._path_name(): obj for obj in find_bpds([], all_bpds=True)}
+    removed = [path for path in index.paths if path not in loaded]
+    for path in removed:
+        index.discard(path)
+        _fingerprints.pop(path, None)
+    decoded = sum(_index_bpd(path, obj) for path, obj in loaded.items())
+    _built = True
+    return decoded, len(removed)
+
+
+def reindex(obj: BehaviorProviderDefinition) -> None:
+    """Index a single bpd again after it was modified, if the index has been built."""
+    if _built:
+        _index_bpd(obj._path_name(), obj)
+
+
+def find(**criteria: str | None) -> set[str]:
+    """Search the loaded bpds, building the index on first use.
+
+    Args:
+        **criteria: Keys to look for, by field name, see `search.FIELDS`.
+    Returns:
+        The paths of the matching bpds.
+    """
+    if not _built:
+        refresh()
+    return index.search(**criteria)
+
+
+@hook("WillowGame.WillowGameInfo:PostCommitMapChange", Type.POST)
+def map_change(*_: Any) -> None:
+    # Don't pay for decoding every bpd on each map load until someone actually searches.
+    if _built:
+        refresh()
+
+
+@command(
+    splitter=obj_name_splitter,
+    description="Find loaded bpds by behavior class, referenced object or event name.",
+)
+def search_bpd(args: argparse.Namespace) -> None:
+    criteria = {
+        "cls": args.cls,
+        "object": args.object,
+        "event": args.event,
+        "custom_event": args.custom_event,
+    }
+    if all(value is None for value in criteria.values()):
+        unrealsdk.logging.error(
+            "Need at least one of --class, --object, --event or --custom_event."
+        )
+        return
+    if args.rebuild or not _built:
+        decoded, _ = refresh(rebuild=args.rebuild)
+        unrealsdk.logging.info(f"Indexed {decoded} bpds")
+
+    start = time.perf_counter()
+    results = index.search(**criteria)
+    elapsed = (time.perf_counter() - start) * 1000
+    for path in sorted(results):
+        unrealsdk.logging.info(path)
+    unrealsdk.logging.info(f"Found {len(results)} bpds in {elapsed:.2f}ms")
+
+
+search_bpd.add_argument("--class", dest="cls", help="A behavior class, e.g. Behavior_Delay.")
+search_bpd.add_argument(
+    "--object", help="An object referenced by a behavior, by full path or just its name."
+)
+search_bpd.add_argument("--event", help="An event name.")
+search_bpd.add_argument("--custom_event", help="A remote or custom event name.")
+search_bpd.add_argument(
+    "--rebuild", action="store_true", help="Decode every loaded bpd again before searching."
+)
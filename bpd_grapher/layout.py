@@ -0,0 +1,791 @@
+"""Pure python layered (Sugiyama style) layout which renders a Digraph straight to SVG.
+
+Used instead of Graphviz for small graphs, where starting `dot` costs more than the layout
+itself, and as a fallback when Graphviz is not installed.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from html import escape
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from bpd_grapher import graphviz
+
+# Graphs with at most this many nodes are laid out in python when the layout is left on auto.
+BUILTIN_LAYOUT_MAX_NODES = 40
+
+FONT_SIZE = 14
+CHAR_WIDTH = 7.2
+LINE_HEIGHT = 17
+NODE_SEP = 24
+RANK_SEP = 40
+GRAPH_MARGIN = 16
+DEFAULT_MARGIN = (8.0, 4.0)
+ORDERING_ITERATIONS = 8
+POSITIONING_ITERATIONS = 6
+
+# Graphviz uses X11 colour names, only the ones which aren't valid SVG colours need mapping.
+X11_COLORS = {
+    "chartreuse2": "#76ee00",
+    "gold1": "#ffd700",
+    "green4": "#008b00",
+    "grey": "#c0c0c0",
+}
+
+TOKEN_PATTERN = re.compile(
+    r"""
+    \s*(?:
+        //[^\n]*
+      | "(?P<quoted>(?:[^"\\]|\\.)*)"
+      | (?P<arrow>->|--)
+      | (?P<punct>[{}\[\];,=])
+      | (?P<ident>[^\s{}\[\];,="]+)
+    )
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+PLAIN_TOKEN_PATTERN = re.compile(
+    r"""
+    "(?P<quoted>(?:[^"\\]|\\.)*)"
+  | (?P<newline>\n)
+  | (?P<word>[^\s"]+)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+# The SVG dash patterns of Graphviz's line styles.
+DASH_ARRAYS = {"dashed": "5,2", "dotted": "1,5"}
+LABEL_LINE_SPLIT = re.compile(r"\n|\\[nlr]")
+ATTR_KEYWORDS = {"graph", "node", "edge"}
+MIN_RANKS = {"min", "source"}
+
+
+@dataclass
+class DotNode:
+    """A node statement parsed out of DOT source."""
+
+    name: str
+    attrs: dict[str, str]
+
+
+@dataclass
+class DotEdge:
+    """An edge statement parsed out of DOT source."""
+
+    tail: str
+    head: str
+    attrs: dict[str, str]
+
+
+@dataclass
+class DotGraph:
+    """The nodes, edges and attributes of a DOT graph."""
+
+    attrs: dict[str, str] = field(default_factory=dict)
+    nodes: dict[str, DotNode] = field(default_factory=dict)
+    edges: list[DotEdge] = field(default_factory=list)
+    min_rank: set[str] = field(default_factory=set)
+
+
+@dataclass
+class _Scope:
+    graph_attrs: dict[str, str]
+    node_attrs: dict[str, str]
+    edge_attrs: dict[str, str]
+    nodes: list[str] = field(default_factory=list)
+
+    def child(self) -> _Scope:
+        return _Scope({}, dict(self.node_attrs), dict(self.edge_attrs))
+
+
+def _tokenize(source: str) -> list[str | tuple[str]]:
+    """Split DOT source into tokens, quoted ids are wrapped in a tuple to tell them apart."""
+    tokens: list[str | tuple[str]] = []
+    pos = 0
+    source = source.rstrip()
+    while pos < len(source):
+        match = TOKEN_PATTERN.match(source, pos)
+        if match is None or match.end() == pos:
+            msg = f"Unexpected character {source[pos]!r} in DOT source at {pos}"
+            raise ValueError(msg)
+        pos = match.end()
+        if (quoted := match.group("quoted")) is not None:
+            tokens.append((quoted.replace('\\"', '"').replace("\\\n", ""),))
+        elif (token := match.group("arrow") or match.group("punct") or match.group("ident")):
+            tokens.append(token)
+    return tokens
+
+
+def _read_attr_list(tokens: list[str | tuple[str]], idx: int) -> tuple[dict[str, str], int]:
+    attrs: dict[str, str] = {}
+    while idx < len(tokens) and tokens[idx] == "[":
+        idx += 1
+        while tokens[idx] != "]":
+            if tokens[idx] in (",", ";"):
+                idx += 1
+                continue
+            key = _token_value(tokens[idx])
+            if tokens[idx + 1] == "=":
+                attrs[key] = _token_value(tokens[idx + 2])
+                idx += 3
+            else:
+                attrs[key] = "true"
+                idx += 1
+        idx += 1
+    return attrs, idx
+
+
+def _token_value(token: str | tuple[str]) -> str:
+    return token[0] if isinstance(token, tuple) else token
+
+
+def _is_id(token: str | tuple[str]) -> bool:
+    return isinstance(token, tuple) or token not in ("{", "}", "[", "]", ";", ",", "=", "->", "--")
+
+
+def parse_dot(source: str) -> DotGraph:
+    """Parse the subset of DOT that the graphviz library emits.
+
+    Args:
+        source: The DOT source, usually `Digraph.source`.
+    Returns:
+        The parsed graph.
+    """
+    tokens = _tokenize(source)
+    graph = DotGraph()
+    idx = 0
+    while idx < len(tokens) and tokens[idx] != "{":
+        idx += 1
+    root = _Scope(graph.attrs, {}, {})
+    scopes = [root]
+    idx += 1
+
+    while idx < len(tokens):
+        token = tokens[idx]
+        scope = scopes[-1]
+        if token in (";", ","):
+            idx += 1
+        elif token == "}":
+            closed = scopes.pop()
+            if closed.graph_attrs.get("rank") in MIN_RANKS:
+                graph.min_rank.update(closed.nodes)
+            if scopes:
+                scopes[-1].nodes.extend(closed.nodes)
+            idx += 1
+        elif token == "{" or token == "subgraph":
+            while tokens[idx] != "{":
+                idx += 1
+            scopes.append(scope.child())
+            idx += 1
+        elif token in ATTR_KEYWORDS and idx + 1 < len(tokens) and tokens[idx + 1] == "[":
+            attrs, idx = _read_attr_list(tokens, idx + 1)
+            getattr(scope, f"{token}_attrs").update(attrs)
+        elif _is_id(token) and idx + 1 < len(tokens) and tokens[idx + 1] == "=":
+            scope.graph_attrs[_token_value(token)] = _token_value(tokens[idx + 2])
+            idx += 3
+        elif _is_id(token):
+            chain = [_token_value(token)]
+            idx += 1
+            while idx < len(tokens) and tokens[idx] in ("->", "--"):
+                chain.append(_token_value(tokens[idx + 1]))
+                idx += 2
+            attrs, idx = _read_attr_list(tokens, idx)
+            for name in chain:
+                if name not in graph.nodes:
+                    graph.nodes[name] = DotNode(name, dict(scope.node_attrs))
+                scope.nodes.append(name)
+            if len(chain) == 1:
+                graph.nodes[chain[0]].attrs.update(attrs)
+            for tail, head in zip(chain, chain[1:]):
+                graph.edges.append(DotEdge(tail, head, {**scope.edge_attrs, **attrs}))
+        else:
+            msg = f"Unexpected token {token!r} in DOT source"
+            raise ValueError(msg)
+
+    # `dot -Tdot` output sets the default label to the node's name.
+    for node in graph.nodes.values():
+        if "label" in node.attrs:
+            node.attrs["label"] = node.attrs["label"].replace("\\N", node.name)
+    return graph
+
+
+@dataclass
+class PlainNode:
+    """A node of a `dot -Tplain` layout, its centre and size are in points."""
+
+    name: str
+    x: float
+    y: float
+    width: float
+    height: float
+    label: str
+
+
+@dataclass
+class PlainEdge:
+    """An edge of a `dot -Tplain` layout, `points` are the control points of its spline."""
+
+    tail: str
+    head: str
+    points: list[tuple[float, float]]
+    label: str | None
+
+
+@dataclass
+class PlainLayout:
+    """A layout read from `dot -Tplain` output, flipped so the origin is at the top left."""
+
+    width: float
+    height: float
+    nodes: dict[str, PlainNode]
+    edges: list[PlainEdge]
+
+
+def parse_plain(text: str) -> PlainLayout:
+    """Parse the output of `dot -Tplain`, to compare the builtin layout against Graphviz's.
+
+    Args:
+        text: The plain output.
+    Returns:
+        The layout, converted from inches to points.
+    """
+    # Quoted labels may span several lines, so only split into records after tokenizing.
+    records: list[list[str]] = [[]]
+    for match in PLAIN_TOKEN_PATTERN.finditer(text):
+        if match.group("newline") is not None:
+            records.append([])
+        elif (quoted := match.group("quoted")) is not None:
+            records[-1].append(quoted.replace('\\"', '"').replace("\\\n", ""))
+        else:
+            records[-1].append(match.group("word"))
+
+    result = PlainLayout(0, 0, {}, [])
+    height = 0.0
+    for record in records:
+        if not record:
+            continue
+        kind, args = record[0], record[1:]
+        if kind == "graph":
+            scale = float(args[0])
+            result.width = float(args[1]) * scale * 72
+            height = float(args[2]) * scale
+            result.height = height * 72
+        elif kind == "node":
+            name, x, y, width, node_height, label = args[:6]
+            result.nodes[name] = PlainNode(
+                name,
+                float(x) * 72,
+                (height - float(y)) * 72,
+                float(width) * 72,
+                float(node_height) * 72,
+                label,
+            )
+        elif kind == "edge":
+            tail, head, count = args[0], args[1], int(args[2])
+            coords = args[3 : 3 + 2 * count]
+            points = [
+                (float(x) * 72, (height - float(y)) * 72)
+                for x, y in zip(coords[::2], coords[1::2])
+            ]
+            # An edge label comes with its position, before the trailing style and color.
+            rest = args[3 + 2 * count :]
+            label = rest[0] if len(rest) > 2 else None  # noqa: PLR2004
+            result.edges.append(PlainEdge(tail, head, points, label))
+        elif kind == "stop":
+            break
+        else:
+            msg = f"Unexpected {kind!r} line in plain output"
+            raise ValueError(msg)
+    return result
+
+
+def label_lines(label: str) -> list[str]:
+    """Split a Graphviz label into its lines."""
+    lines = LABEL_LINE_SPLIT.split(label)
+    if len(lines) > 1 and lines[-1] == "":
+        lines.pop()
+    return lines
+
+
+def _text_size(lines: list[str]) -> tuple[float, float]:
+    return (
+        max((len(line) for line in lines), default=0) * CHAR_WIDTH,
+        len(lines) * LINE_HEIGHT,
+    )
+
+
+def _margin(attrs: dict[str, str]) -> tuple[float, float]:
+    if "margin" not in attrs:
+        return DEFAULT_MARGIN
+    x, _, y = attrs["margin"].partition(",")
+    return float(x) * 72, float(y or x) * 72
+
+
+@dataclass
+class _Vertex:
+    name: str | None
+    width: float
+    height: float
+    layer: int = 0
+    order: int = 0
+    x: float = 0
+    y: float = 0
+    up: list[int] = field(default_factory=list)
+    down: list[int] = field(default_factory=list)
+
+
+@dataclass
+class _Route:
+    edge: DotEdge
+    path: list[int]
+    reversed: bool
+
+
+@dataclass
+class Layout:
+    """A finished layout, all coordinates are in points with the origin at the top left."""
+
+    graph: DotGraph
+    width: float
+    height: float
+    title_height: float
+    vertices: list[_Vertex]
+    routes: list[_Route]
+    self_loops: list[DotEdge]
+    index: dict[str, int]
+
+
+def _remove_cycles(graph: DotGraph) -> set[int]:
+    """Find a set of edges to reverse which makes the graph acyclic, using a DFS."""
+    successors: dict[str, list[tuple[int, str]]] = {name: [] for name in graph.nodes}
+    reversed_edges: set[int] = set()
+    for edge_idx, edge in enumerate(graph.edges):
+        if edge.tail == edge.head:
+            continue
+        if edge.head in graph.min_rank and edge.tail not in graph.min_rank:
+            # Nothing may sit above a min rank node, so edges into one always point upwards.
+            reversed_edges.add(edge_idx)
+            continue
+        successors[edge.tail].append((edge_idx, edge.head))
+
+    state: dict[str, int] = {}
+    roots = [name for name in graph.nodes if name in graph.min_rank]
+    roots += [name for name in graph.nodes if name not in graph.min_rank]
+    for root in roots:
+        if root in state:
+            continue
+        state[root] = 1
+        stack = [(root, iter(successors[root]))]
+        while stack:
+            name, children = stack[-1]
+            for edge_idx, child in children:
+                child_state = state.get(child)
+                if child_state is None:
+                    state[child] = 1
+                    stack.append((child, iter(successors[child])))
+                    break
+                if child_state == 1:
+                    reversed_edges.add(edge_idx)
+            else:
+                state[name] = 2
+                stack.pop()
+    return reversed_edges
+
+
+def _assign_layers(graph: DotGraph, reversed_edges: set[int]) -> dict[str, int]:
+    """Longest path layering over the acyclic graph."""
+    successors: dict[str, list[str]] = {name: [] for name in graph.nodes}
+    in_degree = dict.fromkeys(graph.nodes, 0)
+    for edge_idx, edge in enumerate(graph.edges):
+        if edge.tail == edge.head:
+            continue
+        tail, head = (
+            (edge.head, edge.tail) if edge_idx in reversed_edges else (edge.tail, edge.head)
+        )
+        successors[tail].append(head)
+        in_degree[head] += 1
+
+    layers = dict.fromkeys(graph.nodes, 0)
+    queue = [name for name, degree in in_degree.items() if degree == 0]
+    while queue:
+        name = queue.pop()
+        for child in successors[name]:
+            layers[child] = max(layers[child], layers[name] + 1)
+            in_degree[child] -= 1
+            if in_degree[child] == 0:
+                queue.append(child)
+    return layers
+
+
+def _count_crossings(vertices: list[_Vertex], upper: list[int]) -> int:
+    """Count the crossings between a layer and the one below it."""
+    pairs = sorted(
+        (vertices[u].order, vertices[d].order) for u in upper for d in vertices[u].down
+    )
+    # Count inversions of the lower positions with a fenwick tree.
+    size = max((lower for _, lower in pairs), default=0) + 2
+    tree = [0] * size
+    crossings = 0
+    for seen, (_, lower) in enumerate(pairs):
+        pos = lower + 1
+        smaller_or_equal = 0
+        while pos > 0:
+            smaller_or_equal += tree[pos]
+            pos -= pos & -pos
+        crossings += seen - smaller_or_equal
+        pos = lower + 1
+        while pos < size:
+            tree[pos] += 1
+            pos += pos & -pos
+    return crossings
+
+
+def _total_crossings(vertices: list[_Vertex], layers: list[list[int]]) -> int:
+    return sum(_count_crossings(vertices, layer) for layer in layers[:-1])
+
+
+def _order_layers(vertices: list[_Vertex], layers: list[list[int]]) -> None:
+    """Reduce crossings with alternating barycentric sweeps, keeping the best ordering."""
+
+    def reorder(layer: list[int], neighbours_of: str) -> None:
+        def barycenter(v: int) -> float:
+            neighbours = getattr(vertices[v], neighbours_of)
+            if not neighbours:
+                return vertices[v].order
+            return sum(vertices[n].order for n in neighbours) / len(neighbours)
+
+        layer.sort(key=barycenter)
+        for order, v in enumerate(layer):
+            vertices[v].order = order
+
+    best = [list(layer) for layer in layers]
+    best_crossings = _total_crossings(vertices, layers)
+    for iteration in range(ORDERING_ITERATIONS):
+        if best_crossings == 0:
+            break
+        if iteration % 2 == 0:
+            for layer in layers[1:]:
+                reorder(layer, "up")
+        else:
+            for layer in reversed(layers[:-1]):
+                reorder(layer, "down")
+        crossings = _total_crossings(vertices, layers)
+        if crossings < best_crossings:
+            best_crossings = crossings
+            best = [list(layer) for layer in layers]
+
+    for layer_idx, layer in enumerate(best):
+        layers[layer_idx] = layer
+        for order, v in enumerate(layer):
+            vertices[v].order = order
+
+
+def _place(vertices: list[_Vertex], layer: list[int], desired: list[float]) -> None:
+    """Move a layer as close to the desired centres as possible without overlapping."""
+    left = list(desired)
+    for i in range(1, len(layer)):
+        gap = (vertices[layer[i - 1]].width + vertices[layer[i]].width) / 2 + NODE_SEP
+        left[i] = max(left[i], left[i - 1] + gap)
+    right = list(desired)
+    for i in range(len(layer) - 2, -1, -1):
+        gap = (vertices[layer[i + 1]].width + vertices[layer[i]].width) / 2 + NODE_SEP
+        right[i] = min(right[i], right[i + 1] - gap)
+    # Both passes satisfy the separation constraints, so their average does too.
+    for i, v in enumerate(layer):
+        vertices[v].x = (left[i] + right[i]) / 2
+
+
+def _assign_x(vertices: list[_Vertex], layers: list[list[int]]) -> None:
+    for layer in layers:
+        x = 0.0
+        for v in layer:
+            vertices[v].x = x + vertices[v].width / 2
+            x += vertices[v].width + NODE_SEP
+
+    for iteration in range(POSITIONING_ITERATIONS):
+        downwards = iteration % 2 == 0
+        ordered_layers = layers[1:] if downwards else list(reversed(layers[:-1]))
+        for layer in ordered_layers:
+            desired = []
+            for v in layer:
+                neighbours = vertices[v].up if downwards else vertices[v].down
+                if not neighbours:
+                    neighbours = vertices[v].down if downwards else vertices[v].up
+                if neighbours:
+                    desired.append(sum(vertices[n].x for n in neighbours) / len(neighbours))
+                else:
+                    desired.append(vertices[v].x)
+            _place(vertices, layer, desired)
+
+
+def layout(graph: DotGraph) -> Layout:
+    """Lay out a graph.
+
+    Args:
+        graph: The parsed graph to lay out.
+    Returns:
+        The finished layout.
+    """
+    reversed_edges = _remove_cycles(graph)
+    node_layers = _assign_layers(graph, reversed_edges)
+
+    vertices: list[_Vertex] = []
+    index: dict[str, int] = {}
+    for name, node in graph.nodes.items():
+        text_width, text_height = _text_size(label_lines(node.attrs.get("label", name)))
+        margin_x, margin_y = _margin(node.attrs)
+        width = text_width + 2 * margin_x
+        if node.attrs.get("shape") == "cds":
+            width += LINE_HEIGHT
+        index[name] = len(vertices)
+        vertices.append(
+            _Vertex(name, width, text_height + 2 * margin_y, layer=node_layers[name])
+        )
+
+    routes: list[_Route] = []
+    self_loops: list[DotEdge] = []
+    for edge_idx, edge in enumerate(graph.edges):
+        if edge.tail == edge.head:
+            self_loops.append(edge)
+            continue
+        is_reversed = edge_idx in reversed_edges
+        top, bottom = (edge.head, edge.tail) if is_reversed else (edge.tail, edge.head)
+        path = [index[top]]
+        # Long edges are split up with dummy vertices, one per layer they pass through.
+        for layer in range(vertices[index[top]].layer + 1, vertices[index[bottom]].layer):
+            path.append(len(vertices))
+            vertices.append(_Vertex(None, 0, 0, layer=layer))
+        path.append(index[bottom])
+        for upper, lower in zip(path, path[1:]):
+            vertices[upper].down.append(lower)
+            vertices[lower].up.append(upper)
+        routes.append(_Route(edge, path, is_reversed))
+
+    layers: list[list[int]] = [[] for _ in range(max(node_layers.values(), default=-1) + 1)]
+    for v_idx, vertex in enumerate(vertices):
+        vertex.order = len(layers[vertex.layer])
+        layers[vertex.layer].append(v_idx)
+
+    _order_layers(vertices, layers)
+    _assign_x(vertices, layers)
+
+    # Edge labels sit in the gap below the first layer of their edge, so size gaps to fit them.
+    label_space = [0.0] * len(layers)
+    for route in routes:
+        if "label" in route.edge.attrs:
+            _, text_height = _text_size(label_lines(route.edge.attrs["label"]))
+            layer = vertices[route.path[0]].layer
+            label_space[layer] = max(label_space[layer], text_height)
+
+    title_height = 0.0
+    if "label" in graph.attrs:
+        title_height = _text_size(label_lines(graph.attrs["label"]))[1] + GRAPH_MARGIN
+
+    y = GRAPH_MARGIN + title_height
+    for layer_idx, layer in enumerate(layers):
+        layer_height = max((vertices[v].height for v in layer), default=0)
+        for v in layer:
+            vertices[v].y = y + layer_height / 2
+        y += layer_height + RANK_SEP + label_space[layer_idx]
+
+    min_x = min((v.x - v.width / 2 for v in vertices), default=0)
+    for vertex in vertices:
+        vertex.x += GRAPH_MARGIN - min_x
+    width = max((v.x + v.width / 2 for v in vertices), default=0) + GRAPH_MARGIN
+    # Leave room for self loops and edge labels hanging off the right side.
+    width += LINE_HEIGHT * 2 if self_loops else 0
+    width += max(
+        (_text_size(label_lines(r.edge.attrs.get("label", "")))[0] for r in routes), default=0
+    ) / 2
+    if title_height:
+        width = max(width, _text_size(label_lines(graph.attrs["label"]))[0] + 2 * GRAPH_MARGIN)
+
+    return Layout(
+        graph,
+        width,
+        y - RANK_SEP + GRAPH_MARGIN,
+        title_height,
+        vertices,
+        routes,
+        self_loops,
+        index,
+    )
+
+
+def _color(name: str) -> str:
+    return X11_COLORS.get(name, name)
+
+
+def _marker_id(attrs: dict[str, str]) -> str:
+    # Markers don't pick up the colour of the line using them, so there's one per colour.
+    return "vee-" + re.sub(r"[^0-9A-Za-z]", "", _color(attrs.get("color", "black")))
+
+
+def _svg_stroke(attrs: dict[str, str]) -> str:
+    """Get the SVG stroke attributes matching a node or edge's color, penwidth and style."""
+    stroke = f'stroke="{escape(_color(attrs.get("color", "black")))}"'
+    if "penwidth" in attrs:
+        stroke += f' stroke-width="{float(attrs["penwidth"]):g}"'
+    style = attrs.get("style", "")
+    for name, dash_array in DASH_ARRAYS.items():
+        if name in style:
+            stroke += f' stroke-dasharray="{dash_array}"'
+            break
+    return stroke
+
+
+def _svg_text(
+    lines: list[str],
+    x: float,
+    top: float,
+    anchor: str = "middle",
+    color: str | None = None,
+) -> str:
+    spans = "".join(
+        f'<tspan x="{x:.1f}" y="{top + (i + 0.8) * LINE_HEIGHT:.1f}">{escape(line)}</tspan>'
+        for i, line in enumerate(lines)
+    )
+    fill = "" if color is None else f' fill="{escape(_color(color))}"'
+    return (
+        f'<text text-anchor="{anchor}" font-family="Times,serif" font-size="{FONT_SIZE}"{fill}>'
+        f"{spans}</text>"
+    )
+
+
+def _svg_node(vertex: _Vertex, attrs: dict[str, str]) -> str:
+    left = vertex.x - vertex.width / 2
+    top = vertex.y - vertex.height / 2
+    style = attrs.get("style", "")
+    fill = _color(attrs.get("fillcolor", "lightgrey")) if "filled" in style else "none"
+    common = f'fill="{fill}" {_svg_stroke(attrs)}'
+    if attrs.get("shape") == "cds":
+        tip = LINE_HEIGHT
+        right = left + vertex.width
+        bottom = top + vertex.height
+        points = (
+            f"{left:.1f},{top:.1f} {right - tip:.1f},{top:.1f} {right:.1f},{vertex.y:.1f} "
+            f"{right - tip:.1f},{bottom:.1f} {left:.1f},{bottom:.1f}"
+        )
+        shape = f'<polygon points="{points}" {common}/>'
+    else:
+        radius = ' rx="8" ry="8"' if "rounded" in style else ""
+        shape = (
+            f'<rect x="{left:.1f}" y="{top:.1f}" width="{vertex.width:.1f}" '
+            f'height="{vertex.height:.1f}"{radius} {common}/>'
+        )
+    lines = label_lines(attrs.get("label", vertex.name or ""))
+    text_top = vertex.y - len(lines) * LINE_HEIGHT / 2
+    return shape + _svg_text(lines, vertex.x, text_top, color=attrs.get("fontcolor"))
+
+
+def _svg_route(result: Layout, route: _Route) -> str:
+    vertices = result.vertices
+    points: list[tuple[float, float]] = []
+    for pos, v_idx in enumerate(route.path):
+        vertex = vertices[v_idx]
+        if pos == 0:
+            points.append((vertex.x, vertex.y + vertex.height / 2))
+        elif pos == len(route.path) - 1:
+            points.append((vertex.x, vertex.y - vertex.height / 2))
+        else:
+            points.append((vertex.x, vertex.y))
+    label_anchor = (
+        (points[0][0] + points[1][0]) / 2,
+        (points[0][1] + points[1][1]) / 2,
+    )
+    if route.reversed:
+        points.reverse()
+
+    path = f"M{points[0][0]:.1f},{points[0][1]:.1f}"
+    for (x1, y1), (x2, y2) in zip(points, points[1:]):
+        mid = (y1 + y2) / 2
+        path += f" C{x1:.1f},{mid:.1f} {x2:.1f},{mid:.1f} {x2:.1f},{y2:.1f}"
+    attrs = route.edge.attrs
+    svg = (
+        f'<path d="{path}" fill="none" {_svg_stroke(attrs)} '
+        f'marker-end="url(#{_marker_id(attrs)})"/>'
+    )
+
+    if label := attrs.get("label"):
+        lines = label_lines(label)
+        svg += _svg_text(
+            lines,
+            label_anchor[0] + 4,
+            label_anchor[1] - len(lines) * LINE_HEIGHT / 2,
+            anchor="start",
+            color=attrs.get("fontcolor"),
+        )
+    return svg
+
+
+def _svg_self_loop(result: Layout, edge: DotEdge) -> str:
+    vertex = result.vertices[result.index[edge.tail]]
+    right = vertex.x + vertex.width / 2
+    top = vertex.y - vertex.height / 4
+    bottom = vertex.y + vertex.height / 4
+    loop = LINE_HEIGHT * 1.5
+    svg = (
+        f'<path d="M{right:.1f},{top:.1f} C{right + loop:.1f},{top - loop / 2:.1f} '
+        f"{right + loop:.1f},{bottom + loop / 2:.1f} {right:.1f},{bottom:.1f}\" "
+        f'fill="none" {_svg_stroke(edge.attrs)} marker-end="url(#{_marker_id(edge.attrs)})"/>'
+    )
+    if label := edge.attrs.get("label"):
+        lines = label_lines(label)
+        svg += _svg_text(
+            lines,
+            right + loop,
+            vertex.y - len(lines) * LINE_HEIGHT / 2,
+            "start",
+            edge.attrs.get("fontcolor"),
+        )
+    return svg
+
+
+def to_svg(result: Layout) -> str:
+    """Draw a finished layout as an SVG document."""
+    edge_attrs = [route.edge.attrs for route in result.routes]
+    edge_attrs.extend(edge.attrs for edge in result.self_loops)
+    markers = {_marker_id(attrs): _color(attrs.get("color", "black")) for attrs in edge_attrs}
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{result.width:.0f}pt" '
+        f'height="{result.height:.0f}pt" viewBox="0 0 {result.width:.1f} {result.height:.1f}">\n'
+        "<defs>",
+        *(
+            f'<marker id="{marker_id}" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="8" '
+            'markerHeight="8" orient="auto-start-reverse">'
+            f'<path d="M0,0 L10,5 L0,10 L4,5 Z" fill="{escape(color)}"/></marker>'
+            for marker_id, color in sorted(markers.items())
+        ),
+        "</defs>\n",
+        '<rect width="100%" height="100%" fill="white"/>\n',
+    ]
+    if result.title_height:
+        parts.append(
+            _svg_text(label_lines(result.graph.attrs["label"]), result.width / 2, GRAPH_MARGIN)
+            + "\n"
+        )
+    parts.extend(_svg_route(result, route) + "\n" for route in result.routes)
+    parts.extend(_svg_self_loop(result, edge) + "\n" for edge in result.self_loops)
+    for name, node in result.graph.nodes.items():
+        parts.append(_svg_node(result.vertices[result.index[name]], node.attrs) + "\n")
+    parts.append("</svg>\n")
+    return "".join(parts)
+
+
+def render_svg(dot: graphviz.Digraph | DotGraph, outfile: Path) -> Path:
+    """Lay out a graph and write it to an SVG file.
+
+    Args:
+        dot: The Digraph, or an already parsed graph, to render.
+        outfile: The file to write to, parent directories are created as needed.
+    Returns:
+        The path of the written file.
+    """
+    graph = dot if isinstance(dot, DotGraph) else parse_dot(dot.source)
+    outfile.parent.mkdir(parents=True, exist_ok=True)
+    outfile.write_text(to_svg(layout(graph)), encoding="utf-8")
+    return outfile
@@ -0,0 +1,249 @@
+"""Plain python copy of the tables in a BehaviorProviderDefinition.
+
+Nothing in here touches unrealsdk, so everything built on top of it also works outside the game.
+The packed `ArrayIndexAndLength`/`LinkIdAndLinkedBehavior` ints are kept as is, so a decoded bpd
+is a faithful copy which can be checked, compared or written back to the engine.
+"""
+
+from __future__ import annotations
+
+import struct
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+
+EBehaviorVariableLinkType = ["Unknown", "Context", "Input", "Output", "MAX"]
+EBehaviorVariableType = [
+    "None",
+    "Bool",
+    "Int",
+    "Float",
+    "Vector",
+    "Object",
+    "AllPlayers",
+    "Attribute",
+    "InstanceData",
+    "NamedVariable",
+    "NamedKismetVariable",
+    "DirectionVector",
+    "AttachmentLocation",
+    "UnaryMath",
+    "BinaryMath",
+    "Flag",
+    "MAX",
+]
+
+REMOTE_EVENT_CLASSES = [
+    "Behavior_CustomEvent",
+    "Behavior_SkillCustomEvent",
+    "Behavior_FireCustomSkillEvent",
+    "Behavior_RemoteEvent",
+    "Behavior_RemoteCustomEvent",
+    "Behavior_MissionCustomEvent",
+]
+
+
+class BpdError(Exception):  # noqa: D101
+    pass
+
+
+def parse_arrayindexandlength(number: int) -> tuple[int, int]:
+    """Return an array index and length tuple for the given number."""
+    # Could just use >> and & for this, but since we have to be more
+    # careful with LinkIdAndLinkedBehavior anyway, since that one's
+    # weirder, we may as well just use struct here, as well.
+    number = int(number)
+    byteval = struct.pack(">i", number)
+    return struct.unpack(">HH", byteval)
+
+
+def parse_linkidandlinkedbehavior(number: int) -> tuple[int, int]:
+    """Return a link ID index and behavior tuple for the given number."""
+    number = int(number)
+    byteval = struct.pack(">i", number)
+    (linkid, _, behavior) = struct.unpack(">bbH", byteval)
+    return (linkid, behavior)
+
+
+def link_label(behavior_class: str, link_id: int) -> str:  # noqa: PLR0911
+    """Get the comparison an output link of a compare behavior is taken on."""
+    if behavior_class == "Behavior_CompareObject":
+        return "==" if link_id == 0 else "!="
+    if behavior_class == "Behavior_CompareValues":
+        if link_id == 0:
+            return "<="
+        if link_id == 1:
+            return ">"
+        if link_id == 2:
+            return "=="
+        if link_id == 3:
+            return "<"
+        if link_id == 4:
+            return ">="
+    if behavior_class == "Behavior_CompareFloat":
+        if link_id == 0:
+            return "<"
+        if link_id == 1:
+            return "=="
+        if link_id == 2:
+            return ">"
+    if behavior_class == "Behavior_CompareBool":
+        if link_id == 0:
+            return "True"
+        if link_id == 1:
+            return "False"
+    return ""
+
+
+def custom_event_name(behavior: BehaviorData) -> str | None:
+    """Get the name of the event a remote/custom event behavior fires, if it is one."""
+    if behavior.cls not in REMOTE_EVENT_CLASSES or not behavior.detail.strip():
+        return None
+    # The event name is always the last part of the detail text of these classes.
+    return behavior.detail.split()[-1]
+
+
+@dataclass
+class VariableData:
+    """A `VariableData` entry."""
+
+    name: str
+    type: int
+
+    @property
+    def type_name(self) -> str:
+        """The name of the variable's EBehaviorVariableType."""
+        return EBehaviorVariableType[self.type]
+
+
+@dataclass
+class OutputLinkData:
+    """A `ConsolidatedOutputLinkData` entry."""
+
+    link_id_and_linked_behavior: int
+    activate_delay: float
+
+    @property
+    def link_id(self) -> int:
+        """The output link of the source behavior this link is taken on."""
+        return parse_linkidandlinkedbehavior(self.link_id_and_linked_behavior)[0]
+
+    @property
+    def linked_behavior(self) -> int:
+        """The index of the behavior this link activates."""
+        return parse_linkidandlinkedbehavior(self.link_id_and_linked_behavior)[1]
+
+
+@dataclass
+class VariableLinkData:
+    """A `ConsolidatedVariableLinkData` entry."""
+
+    property_name: str
+    link_type: int
+    linked_variables: int
+    connection_index: int
+
+    @property
+    def link_type_name(self) -> str:
+        """The name of the link's EBehaviorVariableLinkType."""
+        return EBehaviorVariableLinkType[self.link_type]
+
+
+@dataclass
+class EventData:
+    """A `BehaviorEventData2` entry."""
+
+    name: str
+    enabled: bool
+    output_variables: int
+    output_links: int
+
+
+@dataclass
+class BehaviorData:
+    """A `BehaviorSequenceActionData2` entry.
+
+    `path` is None when the entry has no behavior object. `detail` is the extra text shown under
+    the behavior's name when graphing, and `references` holds the path names of the objects the
+    behavior points at, keyed by property name.
+    """
+
+    path: str | None
+    cls: str
+    name: str
+    linked_variables: int
+    output_links: int
+    detail: str = ""
+    references: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class Sequence:
+    """A `BehaviorSequenceData` entry."""
+
+    name: str
+    events: list[EventData] = field(default_factory=list)
+    behaviors: list[BehaviorData] = field(default_factory=list)
+    variables: list[VariableData] = field(default_factory=list)
+    output_links: list[OutputLinkData] = field(default_factory=list)
+    variable_links: list[VariableLinkData] = field(default_factory=list)
+    linked_variables: list[int] = field(default_factory=list)
+
+    def iter_output_links(self, packed: int) -> Iterator[tuple[int, OutputLinkData]]:
+        """Iterate through the output links selected by an `ArrayIndexAndLength`.
+
+        Args:
+            packed: The packed `OutputLinks` value of an event or behavior.
+        Yields:
+            Tuples of the index into `output_links`, and the link data.
+        """
+        idx, length = parse_arrayindexandlength(packed)
+        for link_idx in range(idx, idx + length):
+            try:
+                link = self.output_links[link_idx]
+            except IndexError:
+                msg = f"Index {link_idx} is out of range for ConsolidatedOutputLinkData"
+                raise BpdError(msg) from None
+            if link.linked_behavior >= len(self.behaviors):
+                msg = f"Index {link.linked_behavior} is out of range for BehaviorData2"
+                raise BpdError(msg)
+            yield link_idx, link
+
+    def iter_variable_links(
+        self, packed: int
+    ) -> Iterator[tuple[int, VariableLinkData, list[int]]]:
+        """Iterate through the variable links selected by an `ArrayIndexAndLength`.
+
+        Args:
+            packed: The packed `OutputVariables`/`LinkedVariables` value of an event or behavior.
+        Yields:
+            Tuples of the index into `variable_links`, the link data, and the indexes of the
+            linked variables.
+        """
+        idx, length = parse_arrayindexandlength(packed)
+        for var in range(idx, idx + length):
+            try:
+                link_data = self.variable_links[var]
+            except IndexError:
+                msg = f"Index {var} is out of range for ConsolidatedVariableLinkData"
+                raise BpdError(msg) from None
+            variables = []
+            v_idx, v_length = parse_arrayindexandlength(link_data.linked_variables)
+            for v in range(v_idx, v_idx + v_length):
+                try:
+                    v_index = self.linked_variables[v]
+                except IndexError:
+                    msg = f"Index {v} is out of range for ConsolidatedLinkedVariables"
+                    raise BpdError(msg) from None
+                if v_index >= len(self.variables):
+                    msg = f"Index {v_index} is out of range for VariableData"
+                    raise BpdError(msg)
+                variables.append(v_index)
+            yield var, link_data, variables
+
+
+@dataclass
+class Bpd:
+    """A decoded BehaviorProviderDefinition."""
+
+    path: str
+    sequences: list[Sequence] = field(default_factory=list)
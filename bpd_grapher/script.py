@@ -0,0 +1,346 @@
+"""Write a behavior sequence as a `bpd_dump.py` style script, and read one back.
+
+The script lists every variable, event and behavior of the sequence, followed by the output links
+of each event, walking through the behaviors they reach in order. Output links of behaviors which
+no event reaches come last, so reading the script back keeps every link.
+"""
+
+from __future__ import annotations
+
+import re
+import struct
+from dataclasses import dataclass, field
+from typing import IO, Any
+
+from bpd_grapher.model import (
+    BehaviorData,
+    Bpd,
+    BpdError,
+    EBehaviorVariableLinkType,
+    EBehaviorVariableType,
+    EventData,
+    OutputLinkData,
+    Sequence,
+    VariableData,
+    VariableLinkData,
+    parse_arrayindexandlength,
+)
+
+
+def get_var_name(sequence: Sequence, idx: int) -> str:
+    variable_data = sequence.variables[idx]
+    name = f"{variable_data.name.upper()}_" if variable_data.name != "None" else ""
+    t = variable_data.type_name.upper()
+    return f"VAR_{name}{t}_{idx}"
+
+
+def get_behavior_name(sequence: Sequence, idx: int) -> str:
+    behavior_path = sequence.behaviors[idx].path or "None"
+    return behavior_path.rsplit(".", maxsplit=1)[-1] + f"_{idx}"
+
+
+def get_event_name(sequence: Sequence, idx: int) -> str:
+    event_name = sequence.events[idx].name.split(" ")
+    if len(event_name) > 1:
+        event_name = [s[0].upper() + (s[1:].lower() if len(s) > 1 else "") for s in event_name]
+    return "".join(event_name) + f"_{idx}"
+
+
+def format_variable_links(sequence: Sequence, packed: int) -> list[str]:
+    links = []
+    idx, length = parse_arrayindexandlength(packed)
+    for link_data in sequence.variable_links[idx : idx + length]:
+        start, count = parse_arrayindexandlength(link_data.linked_variables)
+        variables = ", ".join(
+            get_var_name(sequence, v) for v in sequence.linked_variables[start : start + count]
+        )
+        links.append(
+            f"VariableLinkData([{variables}],{link_data.property_name!r},"
+            f"EBehaviorVariableLinkType.BVARLINK_{link_data.link_type_name},"
+            f"{link_data.connection_index})"
+        )
+    return links
+
+
+def format_behavior_link(name: str, link_id: int, delay: float) -> str:
+    args = [name]
+    if link_id != 0 or delay != 0:
+        args.append(str(link_id))
+    if delay != 0:
+        args.append(repr(delay))
+    return f"BehaviorLink({','.join(args)})"
+
+
+def write_output_links(
+    sequence: Sequence,
+    name: str,
+    packed: int,
+    handled: set[int],
+    file: IO[str],
+) -> None:
+    behaviors: list[int] = []
+    idx, length = parse_arrayindexandlength(packed)
+    for link in sequence.output_links[idx : idx + length]:
+        i = link.linked_behavior
+        if i not in handled:
+            behaviors.append(i)
+            handled.add(i)
+        b_link = format_behavior_link(
+            get_behavior_name(sequence, i), link.link_id, link.activate_delay
+        )
+        file.write(f"{name} += {b_link}\n")
+    for i in behaviors:
+        write_output_links(
+            sequence,
+            get_behavior_name(sequence, i),
+            sequence.behaviors[i].output_links,
+            handled,
+            file,
+        )
+
+
+def write_script(bpd: Bpd, sequence_idx: int, file: IO[str]) -> None:
+    """Write one sequence of a bpd as a script.
+
+    Args:
+        bpd: The bpd to dump.
+        sequence_idx: The index of the sequence to dump.
+        file: The text file to write to.
+    """
+    sequence = bpd.sequences[sequence_idx]
+    file.write(f"generate_variables({len(sequence.variables)})\n\n")
+    for idx in range(len(sequence.variables)):
+        print(f"{get_var_name(sequence, idx)} = {idx}", file=file)
+    file.write("\n\n")
+    for idx, event in enumerate(sequence.events):
+        links = format_variable_links(sequence, event.output_variables)
+        output_variables = f", output_variables=[{', '.join(links)}]" if links else ""
+        print(
+            f"{get_event_name(sequence, idx)} = EventData(event_name={event.name!r}"
+            f"{output_variables})",
+            file=file,
+        )
+    file.write("\n\n")
+    for idx, behavior in enumerate(sequence.behaviors):
+        links = format_variable_links(sequence, behavior.linked_variables)
+        linked_variables = f", linked_variables=[{', '.join(links)}]" if links else ""
+        print(
+            f"{get_behavior_name(sequence, idx)} = Behavior(behavior={behavior.path!r}"
+            f"{linked_variables})",
+            file=file,
+        )
+    file.write("\n\n")
+
+    handled: set[int] = set()
+    for idx, event in enumerate(sequence.events):
+        write_output_links(
+            sequence, get_event_name(sequence, idx), event.output_links, handled, file
+        )
+        file.write("\n")
+    for idx, behavior in enumerate(sequence.behaviors):
+        if idx in handled or parse_arrayindexandlength(behavior.output_links)[1] == 0:
+            continue
+        handled.add(idx)
+        write_output_links(
+            sequence, get_behavior_name(sequence, idx), behavior.output_links, handled, file
+        )
+        file.write("\n")
+    file.write("\n")
+    file.write(f"generate_bpd({bpd.path!r})")
+
+
+def pack_arrayindexandlength(idx: int, length: int) -> int:
+    """Pack an array index and length back into an `ArrayIndexAndLength`."""
+    return struct.unpack(">i", struct.pack(">HH", idx, length))[0]
+
+
+def pack_linkidandlinkedbehavior(link_id: int, behavior: int) -> int:
+    """Pack a link id and behavior index back into a `LinkIdAndLinkedBehavior`."""
+    return struct.unpack(">i", struct.pack(">bbH", link_id, 0, behavior))[0]
+
+
+@dataclass
+class _VariableLink:
+    variables: list[int]
+    property_name: str
+    link_type: int
+    connection_index: int
+
+
+@dataclass
+class _Link:
+    target: _Node
+    link_id: int = 0
+    delay: float = 0
+
+
+@dataclass
+class _Node:
+    links: list[_Link] = field(default_factory=list)
+
+    def __iadd__(self, link: _Link) -> _Node:
+        self.links.append(link)
+        return self
+
+
+@dataclass
+class _Event(_Node):
+    name: str = ""
+    variable_links: list[_VariableLink] = field(default_factory=list)
+
+
+@dataclass
+class _Behavior(_Node):
+    path: str | None = None
+    variable_links: list[_VariableLink] = field(default_factory=list)
+
+
+class _ScriptReader:
+    def __init__(self) -> None:
+        self.variable_count = 0
+        self.events: list[_Event] = []
+        self.behaviors: list[_Behavior] = []
+        self.path: str | None = None
+
+    def namespace(self) -> dict[str, Any]:
+        def generate_variables(count: int) -> None:
+            self.variable_count = count
+
+        def event_data(
+            event_name: str, output_variables: list[_VariableLink] | None = None
+        ) -> _Event:
+            event = _Event(name=event_name, variable_links=output_variables or [])
+            self.events.append(event)
+            return event
+
+        def behavior(
+            behavior: str | None, linked_variables: list[_VariableLink] | None = None
+        ) -> _Behavior:
+            node = _Behavior(path=behavior, variable_links=linked_variables or [])
+            self.behaviors.append(node)
+            return node
+
+        def generate_bpd(path: str) -> None:
+            self.path = path
+
+        link_types = type(
+            "EBehaviorVariableLinkType",
+            (),
+            {f"BVARLINK_{name}": idx for idx, name in enumerate(EBehaviorVariableLinkType)},
+        )
+        return {
+            "generate_variables": generate_variables,
+            "EventData": event_data,
+            "Behavior": behavior,
+            "BehaviorLink": _Link,
+            "VariableLinkData": _VariableLink,
+            "EBehaviorVariableLinkType": link_types,
+            "generate_bpd": generate_bpd,
+        }
+
+
+def _parse_variables(namespace: dict[str, Any], count: int) -> list[VariableData]:
+    type_names = {name.upper(): idx for idx, name in enumerate(EBehaviorVariableType)}
+    variables = [VariableData("None", 0) for _ in range(count)]
+    for key, value in namespace.items():
+        match = re.fullmatch(r"VAR_(?:(\w+)_)?([A-Z]+)_(\d+)", key)
+        if match is None or not isinstance(value, int) or not 0 <= value < count:
+            continue
+        name, type_name, _ = match.groups()
+        variables[value] = VariableData(name or "None", type_names.get(type_name, 0))
+    return variables
+
+
+def read_script(source: str) -> tuple[str | None, Sequence]:
+    """Rebuild a sequence from a script written by `write_script`.
+
+    The script only keeps uppercased variable names, and doesn't hold whether events are enabled
+    or the details of each behavior, see `restore_details`.
+
+    Args:
+        source: The text of the script.
+    Returns:
+        The path name passed to `generate_bpd`, and the rebuilt sequence.
+    """
+    reader = _ScriptReader()
+    namespace = reader.namespace()
+    try:
+        exec(compile(source, "<bpd script>", "exec"), namespace)  # noqa: S102
+    except Exception as e:
+        msg = f"Failed to run script: {e}"
+        raise BpdError(msg) from e
+
+    sequence = Sequence("Default")
+    sequence.variables = _parse_variables(namespace, reader.variable_count)
+
+    def add_variable_links(links: list[_VariableLink]) -> int:
+        start = len(sequence.variable_links)
+        for link in links:
+            sequence.variable_links.append(
+                VariableLinkData(
+                    link.property_name,
+                    link.link_type,
+                    pack_arrayindexandlength(len(sequence.linked_variables), len(link.variables)),
+                    link.connection_index,
+                )
+            )
+            sequence.linked_variables.extend(link.variables)
+        return pack_arrayindexandlength(start, len(links))
+
+    behavior_indexes = {id(node): idx for idx, node in enumerate(reader.behaviors)}
+
+    def add_output_links(node: _Node) -> int:
+        start = len(sequence.output_links)
+        for link in node.links:
+            if (target := behavior_indexes.get(id(link.target))) is None:
+                msg = f"Output link to something which isn't a behavior: {link.target!r}"
+                raise BpdError(msg)
+            sequence.output_links.append(
+                OutputLinkData(pack_linkidandlinkedbehavior(link.link_id, target), link.delay)
+            )
+        return pack_arrayindexandlength(start, len(node.links))
+
+    for event in reader.events:
+        sequence.events.append(
+            EventData(
+                event.name,
+                True,
+                add_variable_links(event.variable_links),
+                add_output_links(event),
+            )
+        )
+    for node in reader.behaviors:
+        name = "None" if node.path is None else re.split(r"[.:]", node.path)[-1]
+        sequence.behaviors.append(
+            BehaviorData(
+                node.path,
+                "None" if node.path is None else name.rsplit("_", 1)[0],
+                name,
+                add_variable_links(node.variable_links),
+                add_output_links(node),
+            )
+        )
+
+    return reader.path, sequence
+
+
+def restore_details(sequence: Sequence, base: Sequence) -> None:
+    """Copy what a script doesn't hold over from the sequence it was dumped from.
+
+    Entries are matched by index, and only copied from if they still line up.
+
+    Args:
+        sequence: A sequence rebuilt by `read_script`, modified in place.
+        base: The sequence the script was originally dumped from.
+    """
+    sequence.name = base.name
+    for old, new in zip(base.variables, sequence.variables, strict=False):
+        if old.name.upper() == new.name.upper() and old.type == new.type:
+            new.name = old.name
+    for old, new in zip(base.events, sequence.events, strict=False):
+        if old.name == new.name:
+            new.enabled = old.enabled
+    for old, new in zip(base.behaviors, sequence.behaviors, strict=False):
+        if old.path == new.path:
+            new.cls, new.name = old.cls, old.name
+            new.detail, new.references = old.detail, dict(old.references)
@@ -0,0 +1,120 @@
+"""Inverted index over bpds, to find every bpd using a behavior class, object or event.
+
+Keys are matched case insensitively, same as unreal names. Referenced objects can be searched for
+either by full path name or by just their object name.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+from collections.abc import Iterable
+
+from bpd_grapher.model import Bpd, custom_event_name
+
+FIELDS = ("cls", "object", "event", "custom_event")
+
+_EMPTY: frozenset[str] = frozenset()
+
+
+def index_keys(bpd: Bpd) -> set[tuple[str, str]]:
+    """Get every (field, key) pair a bpd should be found under."""
+    keys: set[tuple[str, str]] = set()
+    for sequence in bpd.sequences:
+        for event in sequence.events:
+            keys.add(("event", event.name.lower()))
+        for behavior in sequence.behaviors:
+            if behavior.path is None:
+                continue
+            keys.add(("cls", behavior.cls.lower()))
+            for ref in behavior.references.values():
+                ref = ref.lower()  # noqa: PLW2901
+                keys.add(("object", ref))
+                keys.add(("object", re.split(r"[.:]", ref)[-1]))
+            if (name := custom_event_name(behavior)) is not None:
+                keys.add(("custom_event", name.lower()))
+    return keys
+
+
+class BpdIndex:
+    """Maps behavior classes, referenced objects and event names to the bpds using them.
+
+    Bpds are stored by path name, adding a bpd which is already indexed replaces it.
+    """
+
+    def __init__(self) -> None:  # noqa: D107
+        self._postings: dict[str, defaultdict[str, set[str]]] = {
+            name: defaultdict(set) for name in FIELDS
+        }
+        self._keys: dict[str, set[tuple[str, str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, path: object) -> bool:
+        return path in self._keys
+
+    @property
+    def paths(self) -> Iterable[str]:
+        """The paths of every indexed bpd."""
+        return self._keys.keys()
+
+    def add(self, bpd: Bpd) -> None:
+        """Add a bpd to the index, replacing any existing entry with the same path."""
+        self.discard(bpd.path)
+        keys = index_keys(bpd)
+        for name, key in keys:
+            self._postings[name][key].add(bpd.path)
+        self._keys[bpd.path] = keys
+
+    def update(self, bpds: Iterable[Bpd]) -> None:
+        """Add multiple bpds to the index."""
+        for bpd in bpds:
+            self.add(bpd)
+
+    def discard(self, path: str) -> None:
+        """Remove a bpd from the index, if it's in it."""
+        for name, key in self._keys.pop(path, ()):
+            postings = self._postings[name]
+            postings[key].discard(path)
+            if not postings[key]:
+                del postings[key]
+
+    def clear(self) -> None:
+        """Remove everything from the index."""
+        for postings in self._postings.values():
+            postings.clear()
+        self._keys.clear()
+
+    def query(self, name: str, value: str) -> frozenset[str] | set[str]:
+        """Find the bpds with a single key.
+
+        Args:
+            name: The field to search, one of `FIELDS`.
+            value: The key to look for.
+        Returns:
+            The paths of the matching bpds. This may be the index's own set, don't modify it.
+        """
+        return self._postings[name].get(value.lower(), _EMPTY)
+
+    def search(self, **criteria: str | None) -> set[str]:
+        """Find the bpds matching all the given keys.
+
+        Args:
+            **criteria: Keys to look for, by field name. None values are ignored.
+        Returns:
+            The paths of the matching bpds.
+        """
+        matches = sorted(
+            (self.query(name, value) for name, value in criteria.items() if value is not None),
+            key=len,
+        )
+        if not matches:
+            return set()
+        # Start from the rarest key, so each intersection only touches a few paths.
+        results = set(matches[0])
+        for other in matches[1:]:
+            if not results:
+                break
+            results &= other
+        return results
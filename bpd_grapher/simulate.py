@@ -0,0 +1,357 @@
+"""Predict what a sequence does when one of its events fires, without running the game.
+
+Firing an event activates the behaviors its output links point at, after each link's
+`ActivateDelay`. An activated behavior runs, then in turn activates its own links. Delays add up
+along the way, and `Behavior_Delay`/`Behavior_Metronome` add their own delay before firing their
+outputs. Compare behaviors only fire the links matching the outcome of their comparison, which
+can't be known offline, so the outcome is picked by the caller, or every combination is explored.
+
+Links which lead back into a behavior which is already running higher up the chain are cut, so
+loops are only walked once.
+"""
+
+from __future__ import annotations
+
+import heapq
+import re
+from collections.abc import Callable, Iterator, Mapping
+from dataclasses import dataclass, field
+
+from bpd_grapher.model import BehaviorData, BpdError, Sequence
+
+# How many outcomes each compare behavior has, every output link id is one of them.
+BRANCH_OUTCOMES = {
+    "Behavior_CompareBool": 2,
+    "Behavior_CompareFloat": 3,
+    "Behavior_CompareObject": 2,
+    "Behavior_CompareValues": 5,
+}
+
+# Picks which link id a compare behavior fires, given its index and data.
+Outcomes = Mapping[int, int] | Callable[[int, BehaviorData], int]
+
+# The link ids a set of compare behaviors took, as sorted (behavior, link id) pairs.
+Assignment = tuple[tuple[int, int], ...]
+# The outcomes of a subtree: how long it takes to finish and the behaviors on its critical path,
+# for every combination of compare outcomes in it.
+Variants = dict[Assignment, tuple[float, tuple[int, ...]]]
+
+
+def behavior_delay(behavior: BehaviorData) -> float:
+    """Get how long a behavior waits before firing its outputs, from its detail text.
+
+    Metronomes are treated as firing once, on their first tick.
+    """
+    if behavior.cls == "Behavior_Delay":
+        match = re.search(r"delay (\S+)", behavior.detail)
+    elif behavior.cls == "Behavior_Metronome":
+        match = re.search(r"i=(\S+)", behavior.detail)
+    else:
+        return 0
+    try:
+        return float(match[1]) if match else 0
+    except ValueError:
+        return 0
+
+
+def find_event(sequence: Sequence, name: str) -> int:
+    """Get the index of an event by name, ignoring case."""
+    for idx, event in enumerate(sequence.events):
+        if event.name.lower() == name.lower():
+            return idx
+    msg = f"Sequence {sequence.name} has no event {name}"
+    raise BpdError(msg)
+
+
+@dataclass
+class Step:
+    """A single behavior activation.
+
+    Args:
+        time: When the behavior runs, in seconds after the event fired.
+        behavior: The index of the behavior.
+        parent: The index of the step which activated this one, or -1 if the event did.
+        link: The index of the output link this step came through.
+    """
+
+    time: float
+    behavior: int
+    parent: int
+    link: int
+
+
+@dataclass
+class Timeline:
+    """Every behavior activation caused by firing an event, ordered by time.
+
+    `critical_path` holds the indexes of the steps leading to the last activation, `outcomes`
+    the link ids taken by the compare behaviors which were reached, and `cut_links` the links
+    which were skipped because they loop back on themselves.
+    """
+
+    event: int
+    steps: list[Step] = field(default_factory=list)
+    critical_path: list[int] = field(default_factory=list)
+    outcomes: dict[int, int] = field(default_factory=dict)
+    cut_links: list[int] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        """When the last behavior runs."""
+        return self.steps[-1].time if self.steps else 0
+
+
+@dataclass
+class Scenario:
+    """One combination of compare outcomes, found by `explore`.
+
+    `outcomes` only holds the compare behaviors which are actually reached, and `critical_path`
+    holds behavior indexes rather than steps.
+    """
+
+    outcomes: dict[int, int]
+    duration: float
+    critical_path: list[int]
+
+
+def merge_variants(
+    left: Variants, right: Variants, offset: float, root: int | None, limit: int
+) -> Variants:
+    """Combine the outcomes of a behavior with those of one of the subtrees it starts.
+
+    Args:
+        left: The outcomes so far.
+        right: The outcomes of the subtree.
+        offset: How long after the behavior the subtree starts.
+        root: The behavior to put at the start of the critical path, if any.
+        limit: Gives up once there are more combinations than this.
+    Returns:
+        Every consistent combination of the two.
+    """
+    merged_variants: Variants = {}
+    for assignment, (finish, critical) in left.items():
+        outcomes = dict(assignment)
+        for child_assignment, (child_finish, child_critical) in right.items():
+            # The same compare reached twice must take the same outcome both times.
+            if any(outcomes.get(b, link_id) != link_id for b, link_id in child_assignment):
+                continue
+            merged = tuple(sorted({**outcomes, **dict(child_assignment)}.items()))
+            if offset + child_finish >= finish or not critical:
+                variant = (
+                    offset + child_finish,
+                    child_critical if root is None else (root, *child_critical),
+                )
+            else:
+                variant = (finish, critical)
+            merged_variants.setdefault(merged, variant)
+        if len(merged_variants) > limit:
+            msg = f"More than {limit} outcome combinations"
+            raise BpdError(msg)
+    return merged_variants
+
+
+class _Walker:
+    """Holds the per sequence state shared by simulating and exploring."""
+
+    def __init__(self, sequence: Sequence, limit: int = 0) -> None:
+        self.sequence = sequence
+        self.limit = limit
+        # Output links of each behavior, as (link idx, link id, target, delay).
+        self.links: list[list[tuple[int, int, int, float]]] = []
+        for behavior in sequence.behaviors:
+            self.links.append(
+                [
+                    (link_idx, link.link_id, link.linked_behavior, link.activate_delay)
+                    for link_idx, link in sequence.iter_output_links(behavior.output_links)
+                ]
+            )
+        self.delays = [behavior_delay(behavior) for behavior in sequence.behaviors]
+        self.cut: set[int] = set()
+        self.memo: dict[int, Variants] = {}
+
+    def event_links(self, event_idx: int) -> list[tuple[int, int, int, float]]:
+        event = self.sequence.events[event_idx]
+        return [
+            (link_idx, link.link_id, link.linked_behavior, link.activate_delay)
+            for link_idx, link in self.sequence.iter_output_links(event.output_links)
+        ]
+
+    def find_cut_links(self, event_idx: int) -> None:
+        # Iterative DFS from the event, any link to a behavior still on the stack is a back edge.
+        state = [0] * len(self.sequence.behaviors)  # 0 = unvisited, 1 = on stack, 2 = done
+        for _, _, root, _ in self.event_links(event_idx):
+            if state[root]:
+                continue
+            state[root] = 1
+            work: list[tuple[int, Iterator[tuple[int, int, int, float]]]] = [
+                (root, iter(self.links[root]))
+            ]
+            while work:
+                node, links = work[-1]
+                for link_idx, _, target, _ in links:
+                    if state[target] == 1:
+                        self.cut.add(link_idx)
+                    elif state[target] == 0:
+                        state[target] = 1
+                        work.append((target, iter(self.links[target])))
+                        break
+                else:
+                    state[node] = 2
+                    work.pop()
+
+    def branch_ids(self, idx: int) -> range | None:
+        count = BRANCH_OUTCOMES.get(self.sequence.behaviors[idx].cls)
+        return None if count is None else range(count)
+
+    def explore(self, root: int) -> Variants:
+        """Get every distinct outcome of the subtree starting at a behavior.
+
+        Returns:
+            A dict mapping the outcomes of the compares reached in the subtree, to how long after
+            the behavior runs the subtree finishes and the critical path through it.
+        """
+        # Fill in the memo bottom up, bpds can easily be deeper than the recursion limit.
+        work = [root]
+        while work:
+            idx = work[-1]
+            if idx in self.memo:
+                work.pop()
+                continue
+            missing = [
+                target
+                for link_idx, _, target, _ in self.links[idx]
+                if link_idx not in self.cut and target not in self.memo
+            ]
+            if missing:
+                work.extend(missing)
+                continue
+            work.pop()
+            self.memo[idx] = self.explore_behavior(idx)
+        return self.memo[root]
+
+    def explore_behavior(self, idx: int) -> Variants:
+        ids = self.branch_ids(idx)
+        choices = [None] if ids is None else list(ids)
+        results: Variants = {}
+        for choice in choices:
+            own: Assignment = () if choice is None else ((idx, choice),)
+            variants: Variants = {own: (0, (idx,))}
+            for link_idx, link_id, target, delay in self.links[idx]:
+                if link_idx in self.cut or (choice is not None and link_id != choice):
+                    continue
+                variants = merge_variants(
+                    variants, self.memo[target], self.delays[idx] + delay, idx, self.limit
+                )
+            for assignment, variant in variants.items():
+                results.setdefault(assignment, variant)
+        if len(results) > self.limit:
+            msg = f"More than {self.limit} outcome combinations"
+            raise BpdError(msg)
+        return results
+
+
+def simulate(
+    sequence: Sequence,
+    event_idx: int,
+    outcomes: Outcomes | None = None,
+    max_steps: int = 100_000,
+) -> Timeline:
+    """Walk through everything that happens when an event fires.
+
+    Args:
+        sequence: The sequence containing the event.
+        event_idx: The index of the event to fire.
+        outcomes: Which link id each compare behavior fires, either as a dict from behavior index
+                  to link id, or a function taking the behavior index and data. Compares missing
+                  from a dict take link id 0.
+        max_steps: Gives up after this many activations, a behavior reached through several
+                   paths runs once per path, which quickly adds up.
+    Returns:
+        The timeline of behavior activations.
+    """
+    walker = _Walker(sequence)
+    walker.find_cut_links(event_idx)
+    timeline = Timeline(event_idx, cut_links=sorted(walker.cut))
+
+    def choose(idx: int) -> int:
+        if outcomes is None:
+            return 0
+        if isinstance(outcomes, Mapping):
+            return outcomes.get(idx, 0)
+        return outcomes(idx, sequence.behaviors[idx])
+
+    # (time, order, behavior, parent step, link), order keeps ties in the order links fire.
+    queue: list[tuple[float, int, int, int, int]] = []
+    order = 0
+    for link_idx, _, target, delay in walker.event_links(event_idx):
+        queue.append((delay, order, target, -1, link_idx))
+        order += 1
+    heapq.heapify(queue)
+
+    while queue:
+        time, _, idx, parent, link = heapq.heappop(queue)
+        step_idx = len(timeline.steps)
+        if step_idx >= max_steps:
+            msg = f"More than {max_steps} behavior activations"
+            raise BpdError(msg)
+        timeline.steps.append(Step(time, idx, parent, link))
+
+        choice = None
+        if walker.branch_ids(idx) is not None:
+            choice = timeline.outcomes.setdefault(idx, choose(idx))
+        for link_idx, link_id, target, delay in walker.links[idx]:
+            if link_idx in walker.cut or (choice is not None and link_id != choice):
+                continue
+            start = time + walker.delays[idx] + delay
+            heapq.heappush(queue, (start, order, target, step_idx, link_idx))
+            order += 1
+
+    if timeline.steps:
+        step_idx = len(timeline.steps) - 1
+        while step_idx != -1:
+            timeline.critical_path.append(step_idx)
+            step_idx = timeline.steps[step_idx].parent
+        timeline.critical_path.reverse()
+    return timeline
+
+
+def explore(sequence: Sequence, event_idx: int, max_scenarios: int = 4096) -> list[Scenario]:
+    """Find every distinct combination of compare outcomes reachable from an event.
+
+    Subtrees shared between several paths are only explored once.
+
+    Args:
+        sequence: The sequence containing the event.
+        event_idx: The index of the event to fire.
+        max_scenarios: Gives up once there are more combinations than this.
+    Returns:
+        The scenarios, longest first.
+    """
+    walker = _Walker(sequence, max_scenarios)
+    walker.find_cut_links(event_idx)
+
+    scenarios: Variants = {(): (0, ())}
+    for _, _, target, delay in walker.event_links(event_idx):
+        scenarios = merge_variants(scenarios, walker.explore(target), delay, None, max_scenarios)
+
+    results = [
+        Scenario(dict(assignment), finish, list(critical))
+        for assignment, (finish, critical) in scenarios.items()
+        if critical
+    ]
+    results.sort(key=lambda scenario: -scenario.duration)
+    return results
+
+
+def format_timeline(sequence: Sequence, timeline: Timeline) -> Iterator[str]:
+    """Format a timeline as human readable lines."""
+    on_critical = set(timeline.critical_path)
+    for step_idx, step in enumerate(timeline.steps):
+        marker = "*" if step_idx in on_critical else " "
+        behavior = sequence.behaviors[step.behavior]
+        yield f"{marker} {step.time:8.3f}s  [{step.behavior}] {behavior.name}"
+    for idx, link_id in sorted(timeline.outcomes.items()):
+        yield f"outcome: [{idx}] {sequence.behaviors[idx].name} -> {link_id}"
+    for link_idx in timeline.cut_links:
+        yield f"cut loop at output link {link_idx}"
+    yield f"duration: {timeline.duration:.3f}s"
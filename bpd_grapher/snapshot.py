@@ -0,0 +1,346 @@
+"""Versioned binary snapshots of decoded bpds, so they can be worked on outside the game.
+
+A snapshot holds any number of bpds. All integers are little endian.
+
+    header:  magic b"BPDS", u16 version, u16 reserved, u32 bpd count, u32 string count,
+             u64 string table offset, u64 index offset
+    records: one per bpd, back to back, see `_write_bpd`
+    strings: per string, u32 byte length then the utf8 bytes
+    index:   per bpd, u32 path string, u64 record offset, u32 record length
+
+Strings are deduplicated through the string table, which is why it comes after the records - it
+is only complete once everything is written. Opening a snapshot only reads the header, string
+table and index out of a memory map, each bpd record is decoded on demand.
+"""
+
+from __future__ import annotations
+
+import mmap
+import struct
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import IO, Self
+
+from bpd_grapher.model import (
+    BehaviorData,
+    Bpd,
+    BpdError,
+    EventData,
+    OutputLinkData,
+    Sequence,
+    VariableData,
+    VariableLinkData,
+)
+
+MAGIC = b"BPDS"
+VERSION = 1
+EXTENSION = ".bpds"
+
+HEADER = struct.Struct("<4sHHIIQQ")
+INDEX_ENTRY = struct.Struct("<IQI")
+U32 = struct.Struct("<I")
+
+EVENT = struct.Struct("<IBii")
+BEHAVIOR = struct.Struct("<iIIiiII")
+VARIABLE = struct.Struct("<IB")
+OUTPUT_LINK = struct.Struct("<if")
+VARIABLE_LINK = struct.Struct("<IBii")
+REFERENCE = struct.Struct("<II")
+
+NO_STRING = -1
+
+
+class SnapshotError(BpdError):  # noqa: D101
+    pass
+
+
+class _StringTable:
+    def __init__(self) -> None:
+        self.ids: dict[str, int] = {}
+
+    def __call__(self, string: str) -> int:
+        if (idx := self.ids.get(string)) is None:
+            idx = self.ids[string] = len(self.ids)
+        return idx
+
+
+def _write_array(file: IO[bytes], fmt: struct.Struct, rows: list[tuple]) -> None:
+    file.write(U32.pack(len(rows)))
+    file.write(b"".join(fmt.pack(*row) for row in rows))
+
+
+def _write_bpd(file: IO[bytes], bpd: Bpd, string: _StringTable) -> None:
+    file.write(U32.pack(len(bpd.sequences)))
+    for sequence in bpd.sequences:
+        file.write(U32.pack(string(sequence.name)))
+        _write_array(
+            file,
+            EVENT,
+            [
+                (string(e.name), e.enabled, e.output_variables, e.output_links)
+                for e in sequence.events
+            ],
+        )
+        _write_array(
+            file,
+            BEHAVIOR,
+            [
+                (
+                    NO_STRING if b.path is None else string(b.path),
+                    string(b.cls),
+                    string(b.name),
+                    b.linked_variables,
+                    b.output_links,
+                    string(b.detail),
+                    len(b.references),
+                )
+                for b in sequence.behaviors
+            ],
+        )
+        _write_array(
+            file,
+            REFERENCE,
+            [
+                (string(prop), string(path))
+                for b in sequence.behaviors
+                for prop, path in b.references.items()
+            ],
+        )
+        _write_array(file, VARIABLE, [(string(v.name), v.type) for v in sequence.variables])
+        _write_array(
+            file,
+            OUTPUT_LINK,
+            [(o.link_id_and_linked_behavior, o.activate_delay) for o in sequence.output_links],
+        )
+        _write_array(
+            file,
+            VARIABLE_LINK,
+            [
+                (string(v.property_name), v.link_type, v.linked_variables, v.connection_index)
+                for v in sequence.variable_links
+            ],
+        )
+        file.write(U32.pack(len(sequence.linked_variables)))
+        file.write(struct.pack(f"<{len(sequence.linked_variables)}i", *sequence.linked_variables))
+
+
+def write_snapshot(bpds: Iterable[Bpd], path: Path) -> int:
+    """Write bpds to a snapshot file.
+
+    Each bpd is written as soon as it's pulled from the iterable, only the string table is kept
+    in memory.
+
+    Args:
+        bpds: The bpds to write.
+        path: The file to write to.
+    Returns:
+        The number of bpds written.
+    """
+    string = _StringTable()
+    index: list[tuple[int, int, int]] = []
+    with path.open("wb") as file:
+        file.write(bytes(HEADER.size))
+        for bpd in bpds:
+            start = file.tell()
+            _write_bpd(file, bpd, string)
+            index.append((string(bpd.path), start, file.tell() - start))
+
+        string_offset = file.tell()
+        for value in string.ids:
+            encoded = value.encode("utf8")
+            file.write(U32.pack(len(encoded)))
+            file.write(encoded)
+
+        index_offset = file.tell()
+        file.write(b"".join(INDEX_ENTRY.pack(*entry) for entry in index))
+
+        file.seek(0)
+        file.write(
+            HEADER.pack(
+                MAGIC, VERSION, 0, len(index), len(string.ids), string_offset, index_offset
+            )
+        )
+    return len(index)
+
+
+class Snapshot:
+    """A memory mapped snapshot file.
+
+    Can be used as a context manager, iterating yields every bpd in the order they were written.
+    """
+
+    path: Path
+    paths: list[str]
+
+    def __init__(self, path: Path) -> None:
+        """Open a snapshot.
+
+        Args:
+            path: The snapshot file.
+        """
+        self.path = path
+        with path.open("rb") as file:
+            try:
+                self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                msg = f"{path} is empty"
+                raise SnapshotError(msg) from None
+
+        try:
+            self._read_tables()
+        except struct.error:
+            self.close()
+            msg = f"{path} is truncated"
+            raise SnapshotError(msg) from None
+        except SnapshotError:
+            self.close()
+            raise
+
+    def _read_tables(self) -> None:
+        data = self._data
+        magic, version, _, bpd_count, string_count, string_offset, index_offset = (
+            HEADER.unpack_from(data)
+        )
+        if magic != MAGIC:
+            msg = f"{self.path} is not a bpd snapshot"
+            raise SnapshotError(msg)
+        if version != VERSION:
+            msg = f"{self.path} has snapshot version {version}, expected {VERSION}"
+            raise SnapshotError(msg)
+
+        self._strings: list[str] = []
+        offset = string_offset
+        for _ in range(string_count):
+            (length,) = U32.unpack_from(data, offset)
+            offset += U32.size
+            self._strings.append(str(data[offset : offset + length], "utf8"))
+            offset += length
+
+        self._records: list[tuple[int, int]] = []
+        self.paths = []
+        for path_id, record_offset, record_length in INDEX_ENTRY.iter_unpack(
+            data[index_offset : index_offset + bpd_count * INDEX_ENTRY.size]
+        ):
+            self.paths.append(self._strings[path_id])
+            self._records.append((record_offset, record_length))
+        if len(self.paths) != bpd_count:
+            raise struct.error
+        self._by_path = {path: idx for idx, path in enumerate(self.paths)}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[Bpd]:
+        for idx in range(len(self._records)):
+            yield self.load(idx)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the memory map, bpds which were already loaded stay valid."""
+        self._data.close()
+
+    def find(self, path: str) -> int:
+        """Find the index of a bpd by path name.
+
+        Args:
+            path: The full path name of the bpd.
+        Returns:
+            The index of the bpd in this snapshot.
+        """
+        try:
+            return self._by_path[path]
+        except KeyError:
+            msg = f"{self.path} does not contain {path}"
+            raise SnapshotError(msg) from None
+
+    def __contains__(self, path: object) -> bool:
+        return path in self._by_path
+
+    def load(self, idx: int) -> Bpd:
+        """Decode a single bpd.
+
+        Args:
+            idx: The index of the bpd in this snapshot.
+        Returns:
+            The decoded bpd.
+        """
+        offset, _ = self._records[idx]
+        try:
+            return self._read_bpd(self.paths[idx], offset)
+        except (struct.error, IndexError):
+            msg = f"Record for {self.paths[idx]} in {self.path} is corrupt"
+            raise SnapshotError(msg) from None
+
+    def _read_bpd(self, path: str, offset: int) -> Bpd:
+        data = self._data
+        strings = self._strings
+
+        def read_array(fmt: struct.Struct) -> Iterator[tuple]:
+            nonlocal offset
+            (count,) = U32.unpack_from(data, offset)
+            start = offset + U32.size
+            offset = start + count * fmt.size
+            if offset > len(data):
+                raise struct.error
+            return fmt.iter_unpack(data[start:offset])
+
+        bpd = Bpd(path)
+        (sequence_count,) = U32.unpack_from(data, offset)
+        offset += U32.size
+        for _ in range(sequence_count):
+            (name_id,) = U32.unpack_from(data, offset)
+            offset += U32.size
+            sequence = Sequence(strings[name_id])
+            sequence.events = [
+                EventData(strings[name], bool(enabled), output_variables, output_links)
+                for name, enabled, output_variables, output_links in read_array(EVENT)
+            ]
+            behaviors = list(read_array(BEHAVIOR))
+            references = list(read_array(REFERENCE))
+            ref_start = 0
+            for b_path, cls, name, linked_variables, output_links, detail, ref_count in behaviors:
+                ref_end = ref_start + ref_count
+                sequence.behaviors.append(
+                    BehaviorData(
+                        None if b_path == NO_STRING else strings[b_path],
+                        strings[cls],
+                        strings[name],
+                        linked_variables,
+                        output_links,
+                        strings[detail],
+                        {
+                            strings[prop]: strings[ref]
+                            for prop, ref in references[ref_start:ref_end]
+                        },
+                    )
+                )
+                ref_start = ref_end
+            sequence.variables = [
+                VariableData(strings[name], var_type) for name, var_type in read_array(VARIABLE)
+            ]
+            sequence.output_links = [
+                OutputLinkData(packed, delay) for packed, delay in read_array(OUTPUT_LINK)
+            ]
+            sequence.variable_links = [
+                VariableLinkData(strings[prop], link_type, linked_variables, connection_index)
+                for prop, link_type, linked_variables, connection_index in read_array(
+                    VARIABLE_LINK
+                )
+            ]
+            (count,) = U32.unpack_from(data, offset)
+            sequence.linked_variables = list(struct.unpack_from(f"<{count}i", data, offset + 4))
+            offset += U32.size + count * 4
+            bpd.sequences.append(sequence)
+        return bpd
+
+
+def find_snapshots(path: Path) -> list[Path]:
+    """Get the snapshot files at a path, which may be a single file or a directory of them."""
+    if path.is_dir():
+        return sorted(path.rglob(f"*{EXTENSION}"))
+    return [path]
@@ -0,0 +1,129 @@
+"""Benchmarks the builtin layout against Graphviz's `dot` on the synthetic bpd corpus.
+
+Run with `python -m bpd_grapher.tests.bench_layout`. The dot columns are left out when Graphviz
+isn't installed.
+
+Both sides are timed from the graph's source to a finished SVG, since that's what `render` picks
+between. The first row is an empty graph, which is just the cost of starting `dot`. Crossings are
+counted between the straight segments through each edge's points, through the dummy vertices for
+the builtin layout, and through the spline control points for dot.
+
+Last results, with the Graphviz 8.0.10 libraries run through a small python wrapper, so starting
+`dot` costs more than it would normally. The largest bpd didn't finish in dot within 10 minutes.
+
+     nodes  edges  builtin ms  crossings    dot ms  crossings
+         0      0        0.04          0    161.08          0
+         6      6        0.82          0    167.29          0
+        13     22        7.11          3    187.90          2
+        27     28        7.93          2    219.32          1
+        44     66       38.77         65    383.04         32
+        88    111       46.41        132    460.96         88
+       165    236      230.72        990   8267.45        632
+       330    456      484.34       3780         -          -
+"""
+
+from __future__ import annotations
+
+import statistics
+import time
+from collections.abc import Callable
+from itertools import combinations
+
+from bpd_grapher import graph, graphviz, layout
+from bpd_grapher.tests.synthetic import corpus
+
+Point = tuple[float, float]
+Segment = tuple[Point, Point, str, str]
+
+BUILTIN_REPEATS = 5
+DOT_REPEATS = 3
+
+
+def _ccw(a: Point, b: Point, c: Point) -> float:
+    return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+
+
+def _segments(polylines: list[tuple[str, str, list[Point]]]) -> list[Segment]:
+    return [
+        (start, end, tail, head)
+        for tail, head, points in polylines
+        for start, end in zip(points, points[1:])
+    ]
+
+
+def count_crossings(polylines: list[tuple[str, str, list[Point]]]) -> int:
+    """Count how many times edges cross each other.
+
+    Edges sharing a node aren't counted, since they always meet there.
+
+    Args:
+        polylines: Tuples of each edge's tail, head, and the points it passes through.
+    Returns:
+        The number of crossings.
+    """
+    crossings = 0
+    for (a, b, tail1, head1), (c, d, tail2, head2) in combinations(_segments(polylines), 2):
+        if {tail1, head1} & {tail2, head2}:
+            continue
+        if _ccw(a, b, c) * _ccw(a, b, d) < 0 and _ccw(c, d, a) * _ccw(c, d, b) < 0:
+            crossings += 1
+    return crossings
+
+
+def builtin_polylines(result: layout.Layout) -> list[tuple[str, str, list[Point]]]:
+    """Get the points each edge passes through in a builtin layout."""
+    return [
+        (
+            route.edge.tail,
+            route.edge.head,
+            [(result.vertices[v].x, result.vertices[v].y) for v in route.path],
+        )
+        for route in result.routes
+    ]
+
+
+def plain_polylines(result: layout.PlainLayout) -> list[tuple[str, str, list[Point]]]:
+    """Get the points each edge passes through in a `dot -Tplain` layout."""
+    return [(edge.tail, edge.head, edge.points) for edge in result.edges if edge.tail != edge.head]
+
+
+def _median_time(func: Callable[[], object], repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main() -> None:
+    """Print the benchmark table."""
+    has_dot = graphviz.backend.discovery.is_available()
+    header = f"{'nodes':>6} {'edges':>6} {'builtin ms':>11} {'crossings':>10}"
+    if has_dot:
+        header += f" {'dot ms':>9} {'crossings':>10}"
+    print(header)
+
+    sources = [graphviz.Digraph().source]
+    sources.extend(graph.build_graph(bpd).source for bpd in corpus())
+    for source in sources:
+        parsed = layout.parse_dot(source)
+        builtin_time = _median_time(
+            lambda source=source: layout.to_svg(layout.layout(layout.parse_dot(source))),
+            BUILTIN_REPEATS,
+        )
+        crossings = count_crossings(builtin_polylines(layout.layout(parsed)))
+        line = (
+            f"{len(parsed.nodes):>6} {len(parsed.edges):>6} {builtin_time * 1000:>11.2f}"
+            f" {crossings:>10}"
+        )
+        if has_dot:
+            dot = graphviz.Source(source)
+            dot_time = _median_time(lambda dot=dot: dot.pipe(format="svg"), DOT_REPEATS)
+            plain = layout.parse_plain(dot.pipe(format="plain", encoding="utf-8"))
+            line += f" {dot_time * 1000:>9.2f} {count_crossings(plain_polylines(plain)):>10}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
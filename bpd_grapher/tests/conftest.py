@@ -0,0 +1,315 @@
+"""Stand-ins for the game's modules and object model, to test the modules which touch unrealsdk.
+
+Only the parts of a BehaviorProviderDefinition which `decode` and `encode` use are modelled.
+Structs copy on assignment, like the real ones, while objects are always shared.
+"""
+
+from __future__ import annotations
+
+import copy
+import importlib
+import re
+import sys
+from collections.abc import Callable, Iterator
+from types import ModuleType, SimpleNamespace
+from typing import Any
+
+import pytest
+
+from bpd_grapher import model
+
+# The modules which need the stand-ins, imported fresh by each test.
+GAME_MODULES = ("decode", "dump_bpd", "encode", "indexing")
+
+# Properties shown as the detail of a behavior, by class.
+BEHAVIOR_PROPERTIES: dict[str, dict[str, Any]] = {
+    "Behavior_CustomEvent": {"CustomEventName": "OnCustom"},
+    "Behavior_Delay": {"Delay": 0.5},
+}
+
+
+class ArrayOf:
+    """Marks a struct field as an array, of the given struct type or of plain values."""
+
+    def __init__(self, inner: FakeScriptStruct | None = None) -> None:
+        self.inner = inner
+
+
+class FakeProperty:
+    def __init__(self, name: str) -> None:
+        self.Name = name
+
+
+class FakeStructProperty(FakeProperty):
+    def __init__(self, name: str, struct: FakeScriptStruct) -> None:
+        super().__init__(name)
+        self.Struct = struct
+
+
+class FakeObjectProperty(FakeProperty):
+    pass
+
+
+class FakeArrayProperty(FakeProperty):
+    def __init__(self, name: str, inner: FakeProperty) -> None:
+        super().__init__(name)
+        self.Inner = inner
+
+
+class FakeScriptStruct:
+    """A struct type, holding the default value of each field."""
+
+    def __init__(self, name: str, **fields: Any) -> None:
+        self.Name = name
+        self.fields = fields
+
+    def _properties(self) -> list[FakeProperty]:
+        return [FakeProperty(name) for name in self.fields]
+
+    def _find_prop(self, name: str) -> FakeProperty:
+        value = self.fields[name]
+        if isinstance(value, ArrayOf):
+            inner = (
+                FakeProperty(name) if value.inner is None else FakeStructProperty(name, value.inner)
+            )
+            return FakeArrayProperty(name, inner)
+        if isinstance(value, FakeScriptStruct):
+            return FakeStructProperty(name, value)
+        return FakeProperty(name)
+
+
+class FakeStruct:
+    """A `WrappedStruct`, assigning a struct or an array copies it."""
+
+    def __init__(self, struct_type: FakeScriptStruct) -> None:
+        object.__setattr__(self, "_type", struct_type)
+        for name, default in struct_type.fields.items():
+            if isinstance(default, FakeScriptStruct):
+                default = FakeStruct(default)  # noqa: PLW2901
+            elif isinstance(default, ArrayOf):
+                default = []  # noqa: PLW2901
+            object.__setattr__(self, name, default)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name not in self._type.fields:
+            msg = f"{self._type.Name} has no field {name}"
+            raise AttributeError(msg)
+        object.__setattr__(self, name, copy.deepcopy(value))
+
+
+class FakeObject:
+    """A `UObject`, properties which were never set read as None."""
+
+    def __init__(self, cls: str, path: str, **properties: Any) -> None:
+        self.Class = SimpleNamespace(Name=cls, ClassDefaultObject=None, _properties=list)
+        self.Name = re.split(r"[.:]", path)[-1]
+        self.path = path
+        self.__dict__.update(properties)
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return None
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> FakeObject:
+        return self
+
+    def _path_name(self) -> str:
+        return self.path
+
+
+ARRAY_INDEX_AND_LENGTH = FakeScriptStruct(
+    "BehaviorConsolidatedArrayIndexAndLength", ArrayIndexAndLength=0
+)
+EVENT_DATA = FakeScriptStruct(
+    "BehaviorEventData2",
+    UserData=FakeScriptStruct(
+        "BehaviorEventUserData", EventName="None", bEnabled=True, MaxTriggerCount=0
+    ),
+    OutputVariables=ARRAY_INDEX_AND_LENGTH,
+    OutputLinks=ARRAY_INDEX_AND_LENGTH,
+)
+BEHAVIOR_DATA = FakeScriptStruct(
+    "BehaviorSequenceActionData2",
+    Behavior=None,
+    LinkedVariables=ARRAY_INDEX_AND_LENGTH,
+    OutputLinks=ARRAY_INDEX_AND_LENGTH,
+)
+VARIABLE_DATA = FakeScriptStruct("BehaviorVariableData", Name="None", Type=0)
+OUTPUT_LINK_DATA = FakeScriptStruct(
+    "BehaviorOutputLinkData", LinkIdAndLinkedBehavior=0, ActivateDelay=0.0
+)
+VARIABLE_LINK_DATA = FakeScriptStruct(
+    "BehaviorVariableLinkData",
+    PropertyName="None",
+    VariableLinkType=0,
+    LinkedVariables=ARRAY_INDEX_AND_LENGTH,
+    ConnectionIndex=0,
+)
+SEQUENCE_DATA = FakeScriptStruct(
+    "BehaviorSequenceData",
+    BehaviorSequenceName="None",
+    EventData2=ArrayOf(EVENT_DATA),
+    BehaviorData2=ArrayOf(BEHAVIOR_DATA),
+    VariableData=ArrayOf(VARIABLE_DATA),
+    ConsolidatedOutputLinkData=ArrayOf(OUTPUT_LINK_DATA),
+    ConsolidatedVariableLinkData=ArrayOf(VARIABLE_LINK_DATA),
+    ConsolidatedLinkedVariables=ArrayOf(),
+)
+
+
+class FakeCommand:
+    def __init__(self, func: Callable[..., Any]) -> None:
+        self.func = func
+
+    def add_argument(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+
+class FakeHook:
+    def __init__(self, func: Callable[..., Any]) -> None:
+        self.func = func
+
+    def __call__(self, *args: Any) -> Any:
+        return self.func(*args)
+
+
+class FakeEnum:
+    def __getattr__(self, name: str) -> str:
+        return name
+
+
+class FakeGame:
+    """The loaded objects, and everything logged."""
+
+    def __init__(self) -> None:
+        self.objects: dict[str, FakeObject] = {}
+        self.logged: list[tuple[str, str]] = []
+
+    def add(self, obj: FakeObject) -> FakeObject:
+        self.objects[obj.path.lower()] = obj
+        return obj
+
+    def add_bpd(self, bpd: model.Bpd) -> FakeObject:
+        """Load a bpd, along with its behaviors, with the same tables as a decoded one."""
+        sequences = []
+        for sequence in bpd.sequences:
+            data = FakeStruct(SEQUENCE_DATA)
+            data.BehaviorSequenceName = sequence.name
+            events = []
+            for event in sequence.events:
+                entry = FakeStruct(EVENT_DATA)
+                entry.UserData.EventName = event.name
+                entry.UserData.bEnabled = event.enabled
+                entry.UserData.MaxTriggerCount = 3
+                entry.OutputVariables.ArrayIndexAndLength = event.output_variables
+                entry.OutputLinks.ArrayIndexAndLength = event.output_links
+                events.append(entry)
+            data.EventData2 = events
+            behaviors = []
+            for behavior in sequence.behaviors:
+                entry = FakeStruct(BEHAVIOR_DATA)
+                if behavior.path is not None:
+                    properties = BEHAVIOR_PROPERTIES.get(behavior.cls, {})
+                    entry.Behavior = self.add(FakeObject(behavior.cls, behavior.path, **properties))
+                entry.LinkedVariables.ArrayIndexAndLength = behavior.linked_variables
+                entry.OutputLinks.ArrayIndexAndLength = behavior.output_links
+                behaviors.append(entry)
+            data.BehaviorData2 = behaviors
+            variables = []
+            for variable in sequence.variables:
+                entry = FakeStruct(VARIABLE_DATA)
+                entry.Name = variable.name
+                entry.Type = variable.type
+                variables.append(entry)
+            data.VariableData = variables
+            output_links = []
+            for link in sequence.output_links:
+                entry = FakeStruct(OUTPUT_LINK_DATA)
+                entry.LinkIdAndLinkedBehavior = link.link_id_and_linked_behavior
+                entry.ActivateDelay = link.activate_delay
+                output_links.append(entry)
+            data.ConsolidatedOutputLinkData = output_links
+            variable_links = []
+            for link in sequence.variable_links:
+                entry = FakeStruct(VARIABLE_LINK_DATA)
+                entry.PropertyName = link.property_name
+                entry.VariableLinkType = link.link_type
+                entry.LinkedVariables.ArrayIndexAndLength = link.linked_variables
+                entry.ConnectionIndex = link.connection_index
+                variable_links.append(entry)
+            data.ConsolidatedVariableLinkData = variable_links
+            data.ConsolidatedLinkedVariables = list(sequence.linked_variables)
+            sequences.append(data)
+        return self.add(
+            FakeObject("BehaviorProviderDefinition", bpd.path, BehaviorSequences=sequences)
+        )
+
+    def find_object(self, _cls: Any, name: str) -> FakeObject:
+        try:
+            return self.objects[name.lower()]
+        except KeyError:
+            msg = f"Couldn't find object '{name}'"
+            raise ValueError(msg) from None
+
+    def find_all(self, cls: str, exact: bool = True) -> list[FakeObject]:  # noqa: ARG002
+        return [obj for obj in self.objects.values() if obj.Class.Name == cls]
+
+    def module(self, name: str) -> ModuleType:
+        """Import one of the `GAME_MODULES`."""
+        return importlib.import_module(f"bpd_grapher.{name}")
+
+
+def _module(name: str, **attrs: Any) -> ModuleType:
+    module = ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+def _forget_game_modules() -> None:
+    for name in GAME_MODULES:
+        sys.modules.pop(f"bpd_grapher.{name}", None)
+
+
+@pytest.fixture
+def game(monkeypatch: pytest.MonkeyPatch) -> Iterator[FakeGame]:
+    """Install the stand-ins, the game modules then import against them."""
+    fake = FakeGame()
+    logging = SimpleNamespace(
+        info=lambda msg: fake.logged.append(("info", str(msg))),
+        error=lambda msg: fake.logged.append(("error", str(msg))),
+    )
+    stand_ins = {
+        "unrealsdk": _module(
+            "unrealsdk",
+            find_all=fake.find_all,
+            find_enum=lambda _: FakeEnum(),
+            find_object=fake.find_object,
+            logging=logging,
+        ),
+        "unrealsdk.hooks": _module("unrealsdk.hooks", Type=SimpleNamespace(PRE=0, POST=1)),
+        "unrealsdk.unreal": _module(
+            "unrealsdk.unreal",
+            UArrayProperty=FakeArrayProperty,
+            UObject=FakeObject,
+            UObjectProperty=FakeObjectProperty,
+            UScriptStruct=FakeScriptStruct,
+            UStructProperty=FakeStructProperty,
+            WrappedStruct=FakeStruct,
+        ),
+        "mods_base": _module(
+            "mods_base",
+            command=lambda **_: FakeCommand,
+            hook=lambda *_: FakeHook,
+        ),
+        "command_extensions": _module("command_extensions"),
+        "command_extensions.builtins": _module(
+            "command_extensions.builtins", obj_name_splitter=str.split
+        ),
+    }
+    for name, module in stand_ins.items():
+        monkeypatch.setitem(sys.modules, name, module)
+
+    _forget_game_modules()
+    yield fake
+    _forget_game_modules()
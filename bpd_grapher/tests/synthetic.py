@@ -0,0 +1,122 @@
+"""Builds synthetic bpds, shaped like real ones, for tests and benchmarks."""
+
+from __future__ import annotations
+
+import random
+
+from bpd_grapher.model import (
+    BehaviorData,
+    Bpd,
+    EventData,
+    OutputLinkData,
+    Sequence,
+    VariableData,
+    VariableLinkData,
+)
+from bpd_grapher.script import pack_arrayindexandlength, pack_linkidandlinkedbehavior
+
+# Behavior counts of the bpds in the corpus, from a tiny skill up to a big mission bpd.
+CORPUS_SIZES = (5, 12, 25, 40, 80, 150, 300)
+
+BEHAVIOR_CLASSES = (
+    "Behavior_ActivateSkill",
+    "Behavior_CompareBool",
+    "Behavior_CompareFloat",
+    "Behavior_CustomEvent",
+    "Behavior_Delay",
+    "Behavior_SimpleMath",
+)
+PROPERTY_NAMES = ("A", "B", "Context", "Result")
+VARIABLE_TYPES = (3, 5, 7, 9)
+
+# (link id, index of the linked behavior, delay)
+LinkSpec = tuple[int, int, float]
+
+
+def synthetic_bpd(behaviors: int, seed: int = 0) -> Bpd:
+    """Build a single sequence bpd with random links between its behaviors.
+
+    Args:
+        behaviors: How many behaviors to add, there's one event per ten of them.
+        seed: The seed of the random generator, the same seed always gives the same bpd.
+    Returns:
+        The bpd.
+    """
+    rng = random.Random(seed)
+    sequence = Sequence("Default")
+    for idx in range(max(1, behaviors // 4)):
+        name = f"Var{idx}" if idx % 3 else "None"
+        sequence.variables.append(VariableData(name, rng.choice(VARIABLE_TYPES)))
+
+    def variable_links() -> int:
+        start = len(sequence.variable_links)
+        for _ in range(rng.randrange(3)):
+            sequence.linked_variables.append(rng.randrange(len(sequence.variables)))
+            sequence.variable_links.append(
+                VariableLinkData(
+                    rng.choice(PROPERTY_NAMES),
+                    rng.choice((1, 2, 3)),
+                    pack_arrayindexandlength(len(sequence.linked_variables) - 1, 1),
+                    0,
+                )
+            )
+        return pack_arrayindexandlength(start, len(sequence.variable_links) - start)
+
+    for idx in range(behaviors):
+        cls = rng.choice(BEHAVIOR_CLASSES)
+        sequence.behaviors.append(
+            BehaviorData(f"Pkg.Obj:BPD_0.{cls}_{idx}", cls, f"{cls}_{idx}", variable_links(), 0)
+        )
+    for idx in range(max(1, behaviors // 10)):
+        sequence.events.append(EventData(f"Event{idx}", True, variable_links(), 0))
+
+    for source in (*sequence.events, *sequence.behaviors):
+        start = len(sequence.output_links)
+        count = rng.choice((0, 1, 1, 2, 3))
+        for link_id in range(count):
+            sequence.output_links.append(
+                OutputLinkData(
+                    pack_linkidandlinkedbehavior(link_id, rng.randrange(behaviors)),
+                    rng.choice((0.0, 0.0, 0.5)),
+                )
+            )
+        source.output_links = pack_arrayindexandlength(start, count)
+    return Bpd(f"Pkg.Obj{seed}:BehaviorProviderDefinition_0", [sequence])
+
+
+def corpus() -> list[Bpd]:
+    """Build one synthetic bpd of each of the `CORPUS_SIZES`."""
+    return [synthetic_bpd(size, seed) for seed, size in enumerate(CORPUS_SIZES)]
+
+
+def build_sequence(
+    behaviors: list[tuple[str, str]],
+    events: dict[str, list[LinkSpec]],
+    links: dict[int, list[LinkSpec]] | None = None,
+) -> Sequence:
+    """Build a small sequence by hand, without any variables.
+
+    Args:
+        behaviors: The class and name of each behavior. Behaviors of class "None" get no path.
+        events: The output links of each event, by name.
+        links: The output links of each behavior, by index.
+    Returns:
+        The sequence.
+    """
+    sequence = Sequence("Default")
+    for cls, name in behaviors:
+        path = None if cls == "None" else f"Pkg.Obj:BPD_0.{name}"
+        sequence.behaviors.append(BehaviorData(path, cls, name, 0, 0))
+    sequence.events.extend(EventData(name, True, 0, 0) for name in events)
+
+    sources = [
+        *zip(sequence.events, events.values(), strict=True),
+        *((sequence.behaviors[idx], specs) for idx, specs in (links or {}).items()),
+    ]
+    for source, specs in sources:
+        source.output_links = pack_arrayindexandlength(len(sequence.output_links), len(specs))
+        sequence.output_links.extend(
+            OutputLinkData(pack_linkidandlinkedbehavior(link_id, target), delay)
+            for link_id, target, delay in specs
+        )
+    return sequence
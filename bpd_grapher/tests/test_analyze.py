@@ -0,0 +1,123 @@
+"""Tests of the static checks over a bpd's tables."""
+
+from __future__ import annotations
+
+from bpd_grapher import analyze
+from bpd_grapher.model import OutputLinkData, VariableData
+from bpd_grapher.script import pack_arrayindexandlength, pack_linkidandlinkedbehavior
+from bpd_grapher.tests.synthetic import build_sequence, corpus
+
+
+def _kinds(issues: list[analyze.Issue]) -> list[tuple[str, list[int]]]:
+    return [(issue.kind, issue.behaviors) for issue in issues]
+
+
+def test_clean_sequence() -> None:
+    sequence = build_sequence(
+        [("Behavior_Delay", "Delay_0"), ("Behavior_ActivateSkill", "Skill_1")],
+        {"OnStart": [(0, 0, 0.0)]},
+        {0: [(0, 1, 0.0)]},
+    )
+    assert analyze.analyze_sequence(sequence) == []
+
+
+def test_out_of_range_index() -> None:
+    sequence = build_sequence(
+        [("Behavior_Delay", "Delay_0")], {"OnStart": [(0, 0, 0.0)]}, {0: [(0, 0, 0.5)]}
+    )
+    # A link to a behavior which doesn't exist, and a link range past the end of the table.
+    sequence.output_links.append(OutputLinkData(pack_linkidandlinkedbehavior(0, 7), 0))
+    sequence.behaviors[0].output_links = pack_arrayindexandlength(1, 3)
+
+    issues = analyze.analyze_sequence(sequence, 2)
+
+    assert [issue.message for issue in issues] == [
+        "behavior [0] Delay_0: Index 7 is out of range for BehaviorData2",
+        "behavior [0] Delay_0: Index 3 is out of range for ConsolidatedOutputLinkData",
+    ]
+    assert all(issue.kind == analyze.DANGLING_INDEX for issue in issues)
+    assert all(issue.severity == analyze.ERROR for issue in issues)
+    assert all(issue.sequence == 2 for issue in issues)  # noqa: PLR2004
+
+
+def test_unreachable() -> None:
+    sequence = build_sequence(
+        [
+            ("Behavior_Delay", "Delay_0"),
+            ("Behavior_ActivateSkill", "Skill_1"),
+            ("Behavior_ActivateSkill", "Skill_2"),
+            ("None", "None"),
+        ],
+        {"OnStart": [(0, 0, 0.0)]},
+        # Only reachable from another unreachable behavior.
+        {1: [(0, 2, 0.0)]},
+    )
+
+    assert _kinds(analyze.analyze_sequence(sequence)) == [
+        (analyze.NONE_BEHAVIOR, [3]),
+        (analyze.UNREACHABLE, [1]),
+        (analyze.UNREACHABLE, [2]),
+    ]
+
+
+def test_zero_delay_cycle() -> None:
+    sequence = build_sequence(
+        [
+            ("Behavior_ActivateSkill", "Skill_0"),
+            ("Behavior_CompareBool", "Compare_1"),
+            ("Behavior_ActivateSkill", "Skill_2"),
+            ("Behavior_ActivateSkill", "Skill_3"),
+            ("Behavior_Delay", "Delay_4"),
+            ("Behavior_ActivateSkill", "Skill_5"),
+        ],
+        {"OnStart": [(0, 0, 0.0)]},
+        {
+            0: [(0, 1, 0.0)],
+            1: [(0, 2, 0.0), (1, 3, 0.0)],
+            # Loops straight back.
+            2: [(0, 0, 0.0)],
+            # Loops back through a delay behavior, or with a delayed link, which is fine.
+            3: [(0, 4, 0.0), (0, 0, 0.5)],
+            4: [(0, 0, 0.0), (0, 5, 0.0)],
+            # Links to itself.
+            5: [(0, 5, 0.0)],
+        },
+    )
+
+    issues = [
+        issue
+        for issue in analyze.analyze_sequence(sequence)
+        if issue.kind == analyze.ZERO_DELAY_CYCLE
+    ]
+    assert [(issue.message, issue.behaviors) for issue in issues] == [
+        ("Zero delay cycle: Skill_0 -> Compare_1 -> Skill_2 -> Skill_0", [0, 1, 2]),
+        ("Zero delay cycle: Skill_5 -> Skill_5", [5]),
+    ]
+
+
+def test_deep_cycle() -> None:
+    # Deeper than the recursion limit.
+    count = 5000
+    sequence = build_sequence(
+        [("Behavior_ActivateSkill", f"Skill_{idx}") for idx in range(count)],
+        {"OnStart": [(0, 0, 0.0)]},
+        {idx: [(0, (idx + 1) % count, 0.0)] for idx in range(count)},
+    )
+
+    (issue,) = analyze.analyze_sequence(sequence)
+    assert issue.kind == analyze.ZERO_DELAY_CYCLE
+    assert issue.behaviors == list(range(count))
+
+
+def test_unused_variable() -> None:
+    sequence = build_sequence([], {})
+    sequence.variables.append(VariableData("Target", 5))
+
+    (issue,) = analyze.analyze_sequence(sequence)
+    assert issue.kind == analyze.UNUSED_VARIABLE
+    assert issue.message == "variable [0] Target (Object) is never linked"
+
+
+def test_corpus_has_no_dangling_indexes() -> None:
+    for bpd in corpus():
+        assert all(issue.kind != analyze.DANGLING_INDEX for issue in analyze.analyze_bpd(bpd))
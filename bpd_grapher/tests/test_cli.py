@@ -0,0 +1,90 @@
+"""Tests of the command line interface's error handling."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from bpd_grapher import cli, graph, graphviz
+from bpd_grapher.graphviz.backend import discovery
+from bpd_grapher.snapshot import write_snapshot
+from bpd_grapher.tests.synthetic import synthetic_bpd
+
+
+@pytest.fixture
+def snapshot(tmp_path: Path) -> Path:
+    path = tmp_path / "test.bpds"
+    write_snapshot([synthetic_bpd(12, seed) for seed in range(2)], path)
+    return path
+
+
+def _error_line(capsys: pytest.CaptureFixture[str]) -> str:
+    lines = capsys.readouterr().err.splitlines()
+    assert len(lines) == 1
+    assert lines[0].startswith("error: ")
+    return lines[0]
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["list", "missing.bpds"],
+        ["simulate", "missing.bpds", "path", "0"],
+        ["diff", "missing.bpds", "missing.bpds"],
+        ["graph", "missing.bpds"],
+    ],
+)
+def test_missing_snapshot(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], argv: list[str]
+) -> None:
+    argv[1] = str(tmp_path / argv[1])
+    assert cli.main(argv) == 2  # noqa: PLR2004
+    assert "No such file" in _error_line(capsys)
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_graph_without_graphviz(
+    snapshot: Path,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+    jobs: str,
+) -> None:
+    monkeypatch.setattr(discovery, "is_available", lambda: False)
+    argv = ["graph", str(snapshot), "--layout", "graphviz", "--output", str(tmp_path / "out")]
+
+    assert cli.main([*argv, "--jobs", jobs]) == 2  # noqa: PLR2004
+    assert "Graphviz" in _error_line(capsys)
+    assert not (tmp_path / "out").exists()
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        graphviz.ExecutableNotFound(["dot", "-Tpdf"]),
+        graphviz.CalledProcessError(1, ["dot", "-Tpdf"], stderr=b"Error: syntax error\nline 2"),
+    ],
+)
+def test_graph_task_graphviz_error(
+    snapshot: Path,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+    error: Exception,
+) -> None:
+    def render(*_: object, **__: object) -> Path:
+        raise error
+
+    monkeypatch.setattr(graph, "render", render)
+    tasks = list(cli.iter_tasks(snapshot, tmp_path, None))
+
+    assert cli.run_tasks(tasks, 1, cli._graph_task, "auto", "flat", True) == len(tasks)
+    lines = capsys.readouterr().err.splitlines()
+    assert len(lines) == len(tasks)
+    assert all(line.startswith(f"error: {snapshot}[") for line in lines)
+    # Only the message goes back from a worker process, Graphviz's errors don't pickle.
+    assert cli._run_task(cli._graph_task, tasks[0], "auto", "flat", True) == (
+        False,
+        f"{snapshot}[0]: {error}",
+    )
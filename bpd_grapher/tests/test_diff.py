@@ -0,0 +1,132 @@
+"""Tests of pairing up and classifying the changes between two versions of a bpd."""
+
+from __future__ import annotations
+
+from bpd_grapher import diff
+from bpd_grapher.model import Bpd, Sequence
+from bpd_grapher.tests.synthetic import LinkSpec, build_sequence
+
+BEHAVIORS = [
+    ("Behavior_Delay", "Delay_0"),
+    ("Behavior_ActivateSkill", "Skill_1"),
+    ("Behavior_CustomEvent", "Custom_2"),
+]
+LINKS: dict[int, list[LinkSpec]] = {0: [(0, 1, 0.0)], 1: [(0, 2, 0.5)]}
+
+
+def _sequence(
+    behaviors: list[tuple[str, str]] = BEHAVIORS, links: dict[int, list[LinkSpec]] = LINKS
+) -> Sequence:
+    return build_sequence(behaviors, {"OnStart": [(0, 0, 0.0)]}, links)
+
+
+def _diff(old: Sequence, new: Sequence) -> diff.BpdDiff:
+    return diff.diff_bpd(Bpd("Pkg.Obj:BPD_0", [old]), Bpd("Pkg.Obj:BPD_0", [new]))
+
+
+def _changes(result: diff.BpdDiff) -> set[tuple[str, str, str]]:
+    return {(node.kind, node.name, node.status) for node in result.sequences[0].nodes}
+
+
+def _node(result: diff.BpdDiff, name: str) -> diff.NodeDiff:
+    return next(node for node in result.sequences[0].nodes if node.name == name)
+
+
+def test_unchanged() -> None:
+    result = _diff(_sequence(), _sequence())
+
+    assert not result.changed
+    assert diff.format_diff(result) == ["Pkg.Obj:BPD_0: no changes"]
+
+
+def test_added() -> None:
+    new = _sequence([*BEHAVIORS, ("Behavior_Delay", "Delay_3")], {**LINKS, 2: [(0, 3, 0.0)]})
+    result = _diff(_sequence(), new)
+
+    # Nodes which only changed through their descendants aren't reported.
+    assert _changes(result) == {
+        ("behavior", "Delay_3", "added"),
+        ("behavior", "Custom_2", "rewired"),
+    }
+    assert [link.description for link in _node(result, "Custom_2").added_links] == [
+        "(0) -> [3] Delay_3"
+    ]
+    assert _node(result, "Delay_3").new == 3  # noqa: PLR2004
+
+
+def test_removed() -> None:
+    old = _sequence([*BEHAVIORS, ("Behavior_Delay", "Delay_3")], {**LINKS, 2: [(0, 3, 0.0)]})
+    result = _diff(old, _sequence())
+
+    assert _changes(result) == {
+        ("behavior", "Delay_3", "removed"),
+        ("behavior", "Custom_2", "rewired"),
+    }
+    assert [link.description for link in _node(result, "Custom_2").removed_links] == [
+        "(0) -> [3] Delay_3"
+    ]
+
+
+def test_modified() -> None:
+    new = _sequence()
+    new.behaviors[1].detail = "skill GD_Skills.Other"
+    result = _diff(_sequence(), new)
+
+    assert _changes(result) == {("behavior", "Skill_1", "modified")}
+    node = _node(result, "Skill_1")
+    assert node.fields == ["detail"]
+    assert (node.old, node.new) == (1, 1)
+    assert not node.added_links
+    assert not node.removed_links
+
+
+def test_rewired() -> None:
+    result = _diff(_sequence(), _sequence(links={**LINKS, 1: [(0, 2, 1.0)]}))
+
+    assert _changes(result) == {("behavior", "Skill_1", "rewired")}
+    node = _node(result, "Skill_1")
+    assert [link.description for link in node.removed_links] == ["(0) -> [2] Custom_2 d=0.5"]
+    assert [link.description for link in node.added_links] == ["(0) -> [2] Custom_2 d=1.0"]
+
+
+def test_renamed_behavior_matched_by_content() -> None:
+    renamed = [*BEHAVIORS[:2], ("Behavior_CustomEvent", "Custom_9")]
+    result = _diff(_sequence(), _sequence(renamed))
+
+    assert _changes(result) == {("behavior", "Custom_9", "modified")}
+    assert _node(result, "Custom_9").fields == ["name"]
+    assert result.sequences[0].behavior_matches == {0: 0, 1: 1, 2: 2}
+
+
+def test_duplicate_subtrees() -> None:
+    # Three identical skills recreated under new names, with one of them dropped.
+    old = _sequence(
+        [
+            ("Behavior_Delay", "Delay_0"),
+            ("Behavior_ActivateSkill", "Skill_a"),
+            ("Behavior_ActivateSkill", "Skill_b"),
+            ("Behavior_ActivateSkill", "Skill_c"),
+        ],
+        {0: [(0, 1, 0.0), (0, 2, 0.0), (0, 3, 0.0)]},
+    )
+    new = _sequence(
+        [
+            ("Behavior_Delay", "Delay_0"),
+            ("Behavior_ActivateSkill", "Skill_x"),
+            ("Behavior_ActivateSkill", "Skill_y"),
+        ],
+        {0: [(0, 1, 0.0), (0, 2, 0.0)]},
+    )
+    result = _diff(old, new)
+
+    # Equal hashes are paired up in index order.
+    assert result.sequences[0].behavior_matches == {0: 0, 1: 1, 2: 2}
+    assert _changes(result) == {
+        ("behavior", "Skill_x", "modified"),
+        ("behavior", "Skill_y", "modified"),
+        ("behavior", "Skill_c", "removed"),
+        ("behavior", "Delay_0", "rewired"),
+    }
+    assert [link.description for link in _node(result, "Delay_0").removed_links] == [
+        "(0) -> [3] Skill_c"
+    ]
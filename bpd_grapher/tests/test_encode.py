@@ -0,0 +1,156 @@
+"""Tests of decoding bpds from, and encoding them back into, stand-in engine objects."""
+
+from __future__ import annotations
+
+import argparse
+import io
+from pathlib import Path
+
+import pytest
+
+from bpd_grapher import model
+from bpd_grapher.script import read_script, restore_details, write_script
+from bpd_grapher.tests.conftest import FakeGame
+from bpd_grapher.tests.synthetic import CORPUS_SIZES, build_sequence, synthetic_bpd
+
+
+def _round_trip(game: FakeGame, bpd: model.Bpd) -> model.Bpd:
+    """Dump a loaded bpd as a script, then apply the script back onto it."""
+    decode = game.module("decode")
+    encode = game.module("encode")
+    obj = game.find_object("BehaviorProviderDefinition", bpd.path)
+
+    base = decode.decode_bpd(obj, references=False)
+    file = io.StringIO()
+    write_script(base, 0, file)
+    _, sequence = read_script(file.getvalue())
+    restore_details(sequence, base.sequences[0])
+    encode.encode_sequence(obj, 0, sequence)
+    return decode.decode_bpd(obj, references=False)
+
+
+def test_decode(game: FakeGame) -> None:
+    bpd = synthetic_bpd(40, 1)
+    obj = game.add_bpd(bpd)
+
+    decoded = game.module("decode").decode_bpd(obj, references=False)
+
+    assert decoded.path == bpd.path
+    (sequence,) = decoded.sequences
+    (original,) = bpd.sequences
+    for field in ("events", "variables", "output_links", "variable_links", "linked_variables"):
+        assert getattr(sequence, field) == getattr(original, field)
+    assert [
+        (b.path, b.cls, b.name, b.linked_variables, b.output_links) for b in sequence.behaviors
+    ] == [(b.path, b.cls, b.name, b.linked_variables, b.output_links) for b in original.behaviors]
+    delays = [b.detail for b in sequence.behaviors if b.cls == "Behavior_Delay"]
+    assert delays
+    assert all(detail == "\ndelay 0.5" for detail in delays)
+
+
+@pytest.mark.parametrize("size", CORPUS_SIZES)
+def test_round_trip(game: FakeGame, size: int) -> None:
+    bpd = synthetic_bpd(size, size)
+    game.add_bpd(bpd)
+    # The script packs the tables in its own order, so start from a bpd already written by one.
+    first = _round_trip(game, bpd)
+
+    assert _round_trip(game, bpd) == first
+
+
+def test_round_trip_keeps_event_settings(game: FakeGame) -> None:
+    bpd = synthetic_bpd(40, 2)
+    obj = game.add_bpd(bpd)
+
+    _round_trip(game, bpd)
+
+    events = obj.BehaviorSequences[0].EventData2
+    assert [str(e.UserData.EventName) for e in events] == [e.name for e in bpd.sequences[0].events]
+    assert all(e.UserData.MaxTriggerCount == 3 for e in events)
+
+
+def test_encode_empty_slot(game: FakeGame) -> None:
+    sequence = build_sequence(
+        [("Behavior_Delay", "Delay_0"), ("None", "None"), ("Behavior_Delay", "Delay_2")],
+        {"OnSpawn": [(0, 0, 0.0), (0, 2, 0.5)]},
+    )
+    bpd = model.Bpd("Pkg.Obj:BehaviorProviderDefinition_0", [sequence])
+    obj = game.add_bpd(bpd)
+
+    game.module("encode").encode_sequence(obj, 0, sequence)
+
+    decoded = game.module("decode").decode_bpd(obj, references=False)
+    assert [b.path for b in decoded.sequences[0].behaviors] == [b.path for b in sequence.behaviors]
+    assert decoded.sequences[0].output_links == sequence.output_links
+
+
+def test_encode_missing_behavior(game: FakeGame) -> None:
+    bpd = synthetic_bpd(25, 4)
+    obj = game.add_bpd(bpd)
+    decode = game.module("decode")
+    before = decode.decode_bpd(obj, references=False)
+
+    sequence = decode.decode_bpd(obj, references=False).sequences[0]
+    sequence.behaviors[3].path = "Pkg.Obj:BPD_0.Missing"
+    with pytest.raises(model.BpdError, match="Couldn't find behavior Pkg.Obj:BPD_0.Missing"):
+        game.module("encode").encode_sequence(obj, 0, sequence)
+
+    assert decode.decode_bpd(obj, references=False) == before
+
+
+def test_encode_out_of_range(game: FakeGame) -> None:
+    bpd = synthetic_bpd(25, 5)
+    obj = game.add_bpd(bpd)
+    decode = game.module("decode")
+    before = decode.decode_bpd(obj, references=False)
+
+    sequence = decode.decode_bpd(obj, references=False).sequences[0]
+    sequence.output_links.clear()
+    with pytest.raises(model.BpdError):
+        game.module("encode").encode_sequence(obj, 0, sequence)
+
+    assert decode.decode_bpd(obj, references=False) == before
+
+
+def test_dump_and_apply(game: FakeGame, monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    bpd = synthetic_bpd(40, 6)
+    obj = game.add_bpd(bpd)
+    dump_bpd = game.module("dump_bpd")
+    monkeypatch.setattr(dump_bpd, "outfile", tmp_path / "bpd_dump.py")
+
+    dump_bpd.dump_bpd.func(argparse.Namespace(bpd=bpd.path, idx=0))
+    dump_bpd.apply_bpd.func(argparse.Namespace(bpd=None, idx=0, file=None))
+
+    assert game.logged == [
+        (
+            "info",
+            f"Applied {len(bpd.sequences[0].behaviors)} behaviors and"
+            f" {len(obj.BehaviorSequences[0].ConsolidatedOutputLinkData)} links to {bpd.path} [0]",
+        )
+    ]
+
+
+@pytest.mark.parametrize(
+    ("bpd", "idx", "message"),
+    [
+        ("Pkg.Missing:BehaviorProviderDefinition_0", 0, "Couldn't find bpd Pkg.Missing"),
+        (None, 5, "list index out of range"),
+    ],
+)
+def test_apply_error(
+    game: FakeGame, tmp_path: Path, bpd: str | None, idx: int, message: str
+) -> None:
+    original = synthetic_bpd(12, 7)
+    obj = game.add_bpd(original)
+    decode = game.module("decode")
+    before = decode.decode_bpd(obj, references=False)
+    file = tmp_path / "bpd_dump.py"
+    with file.open("w") as stream:
+        write_script(before, 0, stream)
+
+    game.module("dump_bpd").apply_bpd.func(argparse.Namespace(bpd=bpd, idx=idx, file=str(file)))
+
+    ((level, logged),) = game.logged
+    assert level == "error"
+    assert logged.startswith(message)
+    assert decode.decode_bpd(obj, references=False) == before
@@ -0,0 +1,118 @@
+"""Tests of rendering graphs through Graphviz, and of caching their layouts."""
+
+from __future__ import annotations
+
+import copy
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+from bpd_grapher import graph, layout
+from bpd_grapher.graphviz.backend import discovery
+from bpd_grapher.tests.synthetic import synthetic_bpd
+
+needs_graphviz = pytest.mark.skipif(not discovery.is_available(), reason="needs Graphviz")
+
+
+class _FakeDigraph:
+    def __init__(self, key: int) -> None:
+        self.key = key
+
+    def pipe(self, format: str, encoding: str) -> str:  # noqa: A002
+        assert (format, encoding) == ("json", "utf-8")
+        return json.dumps({"objects": [{"name": f"node{self.key}", "pos": f"{self.key},0"}]})
+
+
+def test_layout_cache_threads(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(graph, "LAYOUT_CACHE_SIZE", 4)
+    errors: list[BaseException] = []
+
+    def worker(offset: int) -> None:
+        try:
+            for key in range(offset, offset + 50):
+                positions = graph._layout_positions(
+                    _FakeDigraph(key % 20),  # type: ignore[arg-type]
+                    tmp_path,
+                    f"key{key % 20}",
+                )
+                assert positions == {f"node{key % 20}": f"{key % 20},0"}
+        except BaseException as e:  # noqa: BLE001
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(list(tmp_path.glob("*.json"))) <= 4  # noqa: PLR2004
+
+
+@pytest.mark.parametrize(
+    ("version", "engines", "expected"),
+    [
+        ((2, 38, 0), frozenset({"dot", "neato"}), False),
+        ((2, 40, 1), frozenset({"dot", "neato"}), True),
+        ((8, 0, 10), frozenset({"dot"}), False),
+        ((8, 0, 10), frozenset(), True),
+    ],
+)
+def test_can_pin_layout(
+    monkeypatch: pytest.MonkeyPatch,
+    version: tuple[int, ...],
+    engines: frozenset[str],
+    expected: bool,
+) -> None:
+    installation = discovery.Installation(Path("dot"), version, frozenset({"json"}), engines)
+    monkeypatch.setattr(discovery, "installation", lambda: installation)
+    assert graph._can_pin_layout() is expected
+
+
+def test_topology_hash() -> None:
+    parsed = layout.parse_dot(graph.build_graph(synthetic_bpd(25, 2)).source)
+    edge = next(idx for idx, edge in enumerate(parsed.edges) if "label" in edge.attrs)
+
+    recolored = copy.deepcopy(parsed)
+    recolored.edges[edge].attrs["color"] = "red"
+    relabeled = copy.deepcopy(parsed)
+    relabeled.edges[edge].attrs["label"] += " (changed)"
+
+    assert graph.topology_hash(recolored) == graph.topology_hash(parsed)
+    assert graph.topology_hash(relabeled) != graph.topology_hash(parsed)
+
+
+@needs_graphviz
+def test_pinned_layout_keeps_positions(tmp_path: Path) -> None:
+    dot = graph.build_graph(synthetic_bpd(25, 2))
+    parsed = layout.parse_dot(dot.source)
+    full = layout.parse_plain(dot.pipe(format="plain", encoding="utf-8"))
+
+    positions = graph._layout_positions(dot, tmp_path, graph.topology_hash(parsed))
+    pinned = graph.pinned_source(dot, parsed, positions)
+    redrawn = layout.parse_plain(
+        pinned.pipe(format="plain", engine="neato", neato_no_op=2, encoding="utf-8")
+    )
+
+    assert redrawn.nodes.keys() == full.nodes.keys()
+    for name, node in full.nodes.items():
+        assert redrawn.nodes[name].x == pytest.approx(node.x, abs=0.5)
+        assert redrawn.nodes[name].y == pytest.approx(node.y, abs=0.5)
+    assert len(redrawn.edges) == len(full.edges)
+    # Edges are still routed as splines, with their labels.
+    assert all(len(edge.points) >= 4 for edge in redrawn.edges)  # noqa: PLR2004
+    assert all(edge.label is not None for edge in redrawn.edges)
+
+
+@needs_graphviz
+def test_render_uses_layout_cache(tmp_path: Path) -> None:
+    dot = graph.build_graph(synthetic_bpd(25, 2))
+
+    first = graph.render(dot, tmp_path, "first", layout_mode="graphviz")
+    second = graph.render(dot, tmp_path, "second", layout_mode="graphviz")
+
+    assert first.read_bytes().startswith(b"%PDF")
+    assert second.read_bytes().startswith(b"%PDF")
+    assert len(list((tmp_path / graph.LAYOUT_CACHE_DIR).glob("*.json"))) == 1
@@ -0,0 +1,79 @@
+"""Tests of keeping the search index in line with the loaded bpds."""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from bpd_grapher import model
+from bpd_grapher.script import write_script
+from bpd_grapher.tests.conftest import FakeGame
+from bpd_grapher.tests.synthetic import build_sequence
+
+
+def _bpd(path: str, event: str) -> model.Bpd:
+    sequence = build_sequence(
+        [("Behavior_Delay", "Delay_0"), ("Behavior_ActivateSkill", "Skill_1")],
+        {event: [(0, 0, 0.0)]},
+        {0: [(0, 1, 0.5)]},
+    )
+    return model.Bpd(path, [sequence])
+
+
+def test_refresh_only_decodes_changes(game: FakeGame) -> None:
+    indexing = game.module("indexing")
+    first = game.add_bpd(_bpd("Pkg.A:BehaviorProviderDefinition_0", "OnSpawn"))
+    game.add_bpd(_bpd("Pkg.B:BehaviorProviderDefinition_0", "OnDeath"))
+
+    assert indexing.refresh() == (2, 0)
+    assert indexing.refresh() == (0, 0)
+
+    sequence = game.module("decode").decode_bpd(first, references=False).sequences[0]
+    sequence.events[0].name = "OnRevive"
+    game.module("encode").encode_sequence(first, 0, sequence)
+
+    assert indexing.refresh() == (1, 0)
+    assert indexing.find(event="OnRevive") == {"Pkg.A:BehaviorProviderDefinition_0"}
+    assert indexing.find(event="OnSpawn") == set()
+
+
+def test_refresh_catches_relinking(game: FakeGame) -> None:
+    indexing = game.module("indexing")
+    obj = game.add_bpd(_bpd("Pkg.A:BehaviorProviderDefinition_0", "OnSpawn"))
+    indexing.refresh()
+
+    sequence = game.module("decode").decode_bpd(obj, references=False).sequences[0]
+    sequence.behaviors[0].output_links = 0
+    sequence.output_links.pop()
+    game.module("encode").encode_sequence(obj, 0, sequence)
+
+    assert indexing.refresh() == (1, 0)
+
+
+def test_refresh_removes_unloaded(game: FakeGame) -> None:
+    indexing = game.module("indexing")
+    game.add_bpd(_bpd("Pkg.A:BehaviorProviderDefinition_0", "OnSpawn"))
+    game.add_bpd(_bpd("Pkg.B:BehaviorProviderDefinition_0", "OnSpawn"))
+    indexing.refresh()
+
+    del game.objects["pkg.b:behaviorproviderdefinition_0"]
+
+    assert indexing.refresh() == (0, 1)
+    assert indexing.find(event="OnSpawn") == {"Pkg.A:BehaviorProviderDefinition_0"}
+    assert indexing.refresh(rebuild=True) == (1, 0)
+
+
+def test_apply_reindexes(game: FakeGame, tmp_path: Path) -> None:
+    indexing = game.module("indexing")
+    bpd = _bpd("Pkg.A:BehaviorProviderDefinition_0", "OnSpawn")
+    game.add_bpd(bpd)
+    indexing.refresh()
+
+    bpd.sequences[0].events[0].name = "OnRevive"
+    file = tmp_path / "bpd_dump.py"
+    with file.open("w") as stream:
+        write_script(bpd, 0, stream)
+    game.module("dump_bpd").apply_bpd.func(argparse.Namespace(bpd=None, idx=0, file=str(file)))
+
+    assert indexing.index.search(event="OnRevive") == {bpd.path}
+    assert indexing.refresh() == (0, 0)
@@ -0,0 +1,168 @@
+"""Tests of the DOT parsers and the builtin layout.
+
+The files in `data` are real Graphviz 8.0.10 output for `synthetic_bpd(12, 1)`: `.gv` is the
+source, `.dot` what `dot -Tdot` made of it, and `.plain` what `dot -Tplain` did.
+"""
+
+from __future__ import annotations
+
+import copy
+import xml.etree.ElementTree as ET
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from bpd_grapher import diff, graph
+from bpd_grapher.layout import DotGraph, layout, parse_dot, parse_plain, to_svg
+from bpd_grapher.tests.bench_layout import builtin_polylines, count_crossings, plain_polylines
+from bpd_grapher.tests.synthetic import CORPUS_SIZES, synthetic_bpd
+
+DATA = Path(__file__).parent / "data"
+
+
+def _read(name: str) -> str:
+    return (DATA / name).read_text(encoding="utf-8")
+
+
+def _edges(parsed: DotGraph) -> Counter[tuple[str, str, str | None]]:
+    return Counter((edge.tail, edge.head, edge.attrs.get("label")) for edge in parsed.edges)
+
+
+def test_parse_source() -> None:
+    bpd = synthetic_bpd(12, 1)
+    sequence = bpd.sequences[0]
+    parsed = parse_dot(_read("synthetic_12.gv"))
+
+    assert parsed.attrs["label"] == bpd.path
+    assert len(parsed.nodes) == len(sequence.events) + len(sequence.behaviors)
+    assert parsed.min_rank == {"[0] Default [0] Event0"}
+    assert sum(_edges(parsed).values()) == sum(
+        len(list(sequence.iter_output_links(source.output_links)))
+        for source in (*sequence.events, *sequence.behaviors)
+    )
+    custom_event = parsed.nodes["[0][1] Behavior_CustomEvent_1"]
+    assert custom_event.attrs["shape"] == "cds"
+    assert all(edge.attrs["arrowhead"] == "vee" for edge in parsed.edges)
+
+
+def test_parse_dot_output() -> None:
+    source = parse_dot(_read("synthetic_12.gv"))
+    output = parse_dot(_read("synthetic_12.dot"))
+
+    assert output.nodes.keys() == source.nodes.keys()
+    assert output.min_rank == source.min_rank
+    assert _edges(output) == _edges(source)
+    for name, node in source.nodes.items():
+        assert output.nodes[name].attrs["label"] == node.attrs["label"]
+        assert "pos" in output.nodes[name].attrs
+
+    # Long attributes are wrapped with backslash-newlines, which have to be joined back up.
+    assert "\\\n" in _read("synthetic_12.dot")
+    for edge in output.edges:
+        assert "\\" not in edge.attrs["pos"]
+        assert "\n" not in edge.attrs["pos"]
+        points = [point for point in edge.attrs["pos"].split() if not point.startswith("e,")]
+        assert len(points) % 3 == 1
+        assert all(len(point.split(",")) == 2 for point in points)  # noqa: PLR2004
+
+
+def test_parse_dot_default_label() -> None:
+    parsed = parse_dot(_read("small.dot"))
+
+    assert parsed.attrs["bb"] == "0,0,126,125.25"
+    assert {name: node.attrs["label"] for name, node in parsed.nodes.items()} == {
+        "a": "a",
+        "b": "b",
+        "c": "c",
+    }
+    assert _edges(parsed) == Counter({("a", "b", None): 1, ("a", "c", "x y"): 1})
+
+
+def test_parse_plain() -> None:
+    source = parse_dot(_read("synthetic_12.gv"))
+    plain = parse_plain(_read("synthetic_12.plain"))
+
+    assert plain.width == pytest.approx(22.469 * 72)
+    assert plain.height == pytest.approx(10.139 * 72)
+    assert plain.nodes.keys() == source.nodes.keys()
+    for name, node in source.nodes.items():
+        assert plain.nodes[name].label == node.attrs["label"]
+    assert Counter((edge.tail, edge.head, edge.label) for edge in plain.edges) == _edges(source)
+    for edge in plain.edges:
+        assert len(edge.points) % 3 == 1
+        assert all(0 <= y <= plain.height for _, y in edge.points)
+
+
+def test_plain_matches_dot_output() -> None:
+    output = parse_dot(_read("synthetic_12.dot"))
+    plain = parse_plain(_read("synthetic_12.plain"))
+    bb_height = float(output.attrs["bb"].split(",")[3])
+
+    for name, node in output.nodes.items():
+        x, y = map(float, node.attrs["pos"].split(","))
+        # Plain output is in inches and flipped, and only has five significant figures.
+        assert plain.nodes[name].x == pytest.approx(x, abs=0.5)
+        assert plain.nodes[name].y == pytest.approx(bb_height - y, abs=0.5)
+        assert plain.nodes[name].width == pytest.approx(float(node.attrs["width"]) * 72)
+
+
+@pytest.mark.parametrize("size", CORPUS_SIZES)
+def test_builtin_layout(size: int) -> None:
+    parsed = parse_dot(graph.build_graph(synthetic_bpd(size, size)).source)
+    result = layout(parsed)
+
+    for vertex in result.vertices:
+        assert 0 <= vertex.x - vertex.width / 2
+        assert vertex.x + vertex.width / 2 <= result.width
+        assert 0 <= vertex.y - vertex.height / 2
+        assert vertex.y + vertex.height / 2 <= result.height
+    for name in parsed.min_rank:
+        assert result.vertices[result.index[name]].layer == 0
+    for route in result.routes:
+        route_layers = [result.vertices[v].layer for v in route.path]
+        assert route_layers == list(range(route_layers[0], route_layers[0] + len(route_layers)))
+
+    layers: dict[int, list[int]] = {}
+    for idx, vertex in enumerate(result.vertices):
+        layers.setdefault(vertex.layer, []).append(idx)
+    for layer in layers.values():
+        ordered = sorted((result.vertices[v] for v in layer), key=lambda vertex: vertex.x)
+        for left, right in zip(ordered, ordered[1:]):
+            assert left.x + left.width / 2 <= right.x - right.width / 2
+
+    ET.fromstring(to_svg(result))  # noqa: S314
+
+
+def test_builtin_crossings_near_dot() -> None:
+    builtin = count_crossings(builtin_polylines(layout(parse_dot(_read("synthetic_12.gv")))))
+    dot = count_crossings(plain_polylines(parse_plain(_read("synthetic_12.plain"))))
+
+    assert builtin <= 2 * dot + 2
+
+
+def test_svg_diff_styles() -> None:
+    old = synthetic_bpd(12, 1)
+    new = copy.deepcopy(old)
+    new.sequences[0].behaviors[5].path = None
+    dot = diff.build_diff_graph(old, new, diff.diff_bpd(old, new))
+    svg = ET.fromstring(to_svg(layout(parse_dot(dot.source))))  # noqa: S314
+    ns = "{http://www.w3.org/2000/svg}"
+
+    removed = [
+        text for text in svg.iter(f"{ns}text") if "removed" in "".join(text.itertext())
+    ]
+    assert removed
+    assert all(text.get("fill") == "red" for text in removed)
+
+    paths = [path for path in svg.iter(f"{ns}path") if path.get("stroke") == "red"]
+    assert paths
+    for path in paths:
+        assert path.get("stroke-dasharray") == "5,2"
+        assert path.get("marker-end") == "url(#vee-red)"
+    markers = {marker.get("id"): marker for marker in svg.iter(f"{ns}marker")}
+    assert markers["vee-red"].find(f"{ns}path").get("fill") == "red"  # type: ignore[union-attr]
+
+    highlighted = [rect for rect in svg.iter(f"{ns}rect") if rect.get("stroke-width") == "3"]
+    assert highlighted
+    assert all(rect.get("stroke") != "black" for rect in highlighted)
@@ -0,0 +1,68 @@
+"""Tests of writing sequences as scripts and reading them back."""
+
+from __future__ import annotations
+
+import io
+from typing import Any
+
+import pytest
+
+from bpd_grapher.model import Sequence
+from bpd_grapher.script import read_script, restore_details, write_script
+from bpd_grapher.tests.synthetic import CORPUS_SIZES, synthetic_bpd
+
+
+def _bindings(sequence: Sequence, packed: int) -> list[tuple[Any, ...]]:
+    return [
+        (link.property_name, link.link_type, link.connection_index, variables)
+        for _, link, variables in sequence.iter_variable_links(packed)
+    ]
+
+
+def _links(sequence: Sequence, packed: int) -> list[tuple[int, float, int]]:
+    return [
+        (link.link_id, link.activate_delay, link.linked_behavior)
+        for _, link in sequence.iter_output_links(packed)
+    ]
+
+
+@pytest.mark.parametrize("size", CORPUS_SIZES)
+def test_round_trip(size: int) -> None:
+    bpd = synthetic_bpd(size, size)
+    original = bpd.sequences[0]
+    file = io.StringIO()
+    write_script(bpd, 0, file)
+
+    path, sequence = read_script(file.getvalue())
+    restore_details(sequence, original)
+
+    assert path == bpd.path
+    assert sequence.variables == original.variables
+    assert [(e.name, e.enabled) for e in sequence.events] == [
+        (e.name, e.enabled) for e in original.events
+    ]
+    for new, old in zip(sequence.events, original.events, strict=True):
+        assert _bindings(sequence, new.output_variables) == _bindings(
+            original, old.output_variables
+        )
+        assert _links(sequence, new.output_links) == _links(original, old.output_links)
+
+    for new, old in zip(sequence.behaviors, original.behaviors, strict=True):
+        assert (new.path, new.cls, new.name) == (old.path, old.cls, old.name)
+        assert _bindings(sequence, new.linked_variables) == _bindings(
+            original, old.linked_variables
+        )
+        assert _links(sequence, new.output_links) == _links(original, old.output_links)
+
+
+def test_round_trip_twice() -> None:
+    bpd = synthetic_bpd(40, 3)
+    first = io.StringIO()
+    write_script(bpd, 0, first)
+
+    _, sequence = read_script(first.getvalue())
+    bpd.sequences[0] = sequence
+    second = io.StringIO()
+    write_script(bpd, 0, second)
+
+    assert second.getvalue() == first.getvalue()
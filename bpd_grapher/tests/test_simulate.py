@@ -0,0 +1,89 @@
+"""Tests of simulating what happens when a bpd event fires."""
+
+from __future__ import annotations
+
+import pytest
+
+from bpd_grapher import simulate
+from bpd_grapher.model import BpdError, parse_arrayindexandlength
+from bpd_grapher.tests.synthetic import build_sequence
+
+
+def _runs(timeline: simulate.Timeline) -> list[tuple[float, int]]:
+    return [(step.time, step.behavior) for step in timeline.steps]
+
+
+def test_heap_ordering() -> None:
+    sequence = build_sequence(
+        [
+            ("Behavior_ActivateSkill", "Skill_0"),
+            ("Behavior_ActivateSkill", "Skill_1"),
+            ("Behavior_Delay", "Delay_2"),
+            ("Behavior_ActivateSkill", "Skill_3"),
+            ("Behavior_ActivateSkill", "Skill_4"),
+        ],
+        {"OnStart": [(0, 0, 1.0), (0, 1, 0.0), (0, 2, 0.0)]},
+        {1: [(0, 3, 0.5)], 2: [(0, 4, 0.0)]},
+    )
+    sequence.behaviors[2].detail = "delay 0.5"
+
+    timeline = simulate.simulate(sequence, 0)
+
+    # Ties run in the order their links fired.
+    assert _runs(timeline) == [(0, 1), (0, 2), (0.5, 3), (0.5, 4), (1, 0)]
+    assert timeline.duration == 1
+    assert timeline.critical_path == [4]
+
+
+def test_cut_back_edge() -> None:
+    sequence = build_sequence(
+        [
+            ("Behavior_ActivateSkill", "Skill_0"),
+            ("Behavior_ActivateSkill", "Skill_1"),
+            ("Behavior_ActivateSkill", "Skill_2"),
+        ],
+        {"OnStart": [(0, 0, 0.0)]},
+        {0: [(0, 1, 0.25)], 1: [(0, 0, 0.25), (0, 2, 1.0)]},
+    )
+    back_edge = parse_arrayindexandlength(sequence.behaviors[1].output_links)[0]
+
+    timeline = simulate.simulate(sequence, 0)
+
+    assert timeline.cut_links == [back_edge]
+    assert _runs(timeline) == [(0, 0), (0.25, 1), (1.25, 2)]
+    assert [timeline.steps[idx].behavior for idx in timeline.critical_path] == [0, 1, 2]
+    assert list(simulate.format_timeline(sequence, timeline))[-2:] == [
+        f"cut loop at output link {back_edge}",
+        "duration: 1.250s",
+    ]
+
+
+def test_compare_outcomes() -> None:
+    sequence = build_sequence(
+        [
+            ("Behavior_CompareBool", "Compare_0"),
+            ("Behavior_ActivateSkill", "Skill_1"),
+            ("Behavior_ActivateSkill", "Skill_2"),
+        ],
+        {"OnStart": [(0, 0, 0.0)]},
+        {0: [(0, 1, 0.0), (1, 2, 2.0)]},
+    )
+
+    assert _runs(simulate.simulate(sequence, 0)) == [(0, 0), (0, 1)]
+    timeline = simulate.simulate(sequence, 0, {0: 1})
+    assert _runs(timeline) == [(0, 0), (2, 2)]
+    assert timeline.outcomes == {0: 1}
+
+    scenarios = simulate.explore(sequence, 0)
+    assert [(s.outcomes, s.duration, s.critical_path) for s in scenarios] == [
+        ({0: 1}, 2, [0, 2]),
+        ({0: 0}, 0, [0, 1]),
+    ]
+
+
+def test_find_event() -> None:
+    sequence = build_sequence([], {"OnStart": [], "OnEnd": []})
+
+    assert simulate.find_event(sequence, "onend") == 1
+    with pytest.raises(BpdError):
+        simulate.find_event(sequence, "OnMissing")
@@ -0,0 +1,81 @@
+import argparse
+from collections.abc import Callable, Generator
+from typing import Any
+
+import unrealsdk
+from unrealsdk.hooks import Type
+from unrealsdk.unreal import BoundFunction, UObject, WrappedStruct
+
+from frame_tasks.scheduler import FrameScheduler, FrameTask, TaskState
+from mods_base import Library, build_mod, command, hook
+
+__all__: tuple[str, ...] = ("FrameScheduler", "FrameTask", "TaskState", "scheduler", "spawn")
+
+# Every mod's tasks share the one budget, so together they never take more than it per frame.
+scheduler = FrameScheduler(budget=0.002)
+
+
+@hook("WillowGame.WillowGameViewportClient:Tick", Type.POST)
+def _tick(
+    _1: UObject,
+    _2: WrappedStruct,
+    _3: Any,
+    _4: BoundFunction,
+) -> None:
+    scheduler.run()
+    if not scheduler:
+        _tick.disable()
+
+
+def spawn(
+    generator: Generator[Any, None, Any],
+    name: str | None = None,
+    priority: int = 0,
+    on_done: Callable[[FrameTask], None] | None = None,
+) -> FrameTask:
+    """Run a generator a little bit each frame, see `FrameScheduler.add`.
+
+    The viewport ticks in menus and while paused too, so tasks keep going there.
+
+    Args:
+        generator: The generator to step.
+        name: A name to show for the task, defaults to the generator's name.
+        priority: Higher priority tasks run first.
+        on_done: Called with the task once it finishes, is cancelled, or fails.
+    Returns:
+        A handle to the task.
+    """
+    task = scheduler.add(generator, name, priority, on_done)
+    _tick.enable()
+    return task
+
+
+@command(description="List or cancel the running frame tasks, or change the per frame budget.")
+def frame_tasks(args: argparse.Namespace) -> None:
+    if args.budget is not None:
+        scheduler.budget = args.budget / 1000
+        unrealsdk.logging.info(f"Frame task budget set to {args.budget}ms")
+    if args.cancel is not None:
+        cancelled = [
+            task for task in list(scheduler) if args.cancel in ("*", task.name) and task.cancel()
+        ]
+        unrealsdk.logging.info(f"Cancelled {len(cancelled)} tasks")
+        return
+    tasks = list(scheduler)
+    if not tasks:
+        unrealsdk.logging.info("No frame tasks running")
+        return
+    for task in tasks:
+        progress = "?" if task.progress is None else f"{task.progress:.0%}"
+        unrealsdk.logging.info(
+            f"{task.name} (priority {task.priority}): {progress}, {task.steps} steps,"
+            f" {task.run_time * 1000:.1f}ms"
+        )
+
+
+frame_tasks.add_argument("--cancel", help="Cancel every task with this name, or * for all.")
+frame_tasks.add_argument("--budget", type=float, help="How many ms tasks may take each frame.")
+
+
+# The tick hook is only enabled while there are tasks to run.
+build_mod(cls=Library, commands=[frame_tasks], hooks=[])
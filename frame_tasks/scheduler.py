@@ -0,0 +1,197 @@
+"""Runs generator based tasks a little at a time, within a time budget.
+
+A task is a generator which does a small chunk of work between each yield. Each time the
+scheduler runs it steps tasks until the budget is used up, then leaves the rest for next time.
+Tasks can yield a float between 0 and 1 to report their progress, anything else is ignored.
+
+    def count_objects(cls):
+        objs = list(unrealsdk.find_all(cls))
+        for idx, obj in enumerate(objs):
+            process(obj)
+            yield idx / len(objs)
+
+Higher priority tasks always run first, tasks of the same priority take turns.
+
+Nothing in here touches unrealsdk, the scheduler is driven by calling `run`.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import time
+import traceback
+from collections.abc import Callable, Generator, Iterator
+from enum import Enum, auto
+from typing import Any
+
+__all__: tuple[str, ...] = ("FrameScheduler", "FrameTask", "TaskState")
+
+
+class TaskState(Enum):
+    PENDING = auto()
+    DONE = auto()
+    FAILED = auto()
+    CANCELLED = auto()
+
+
+class FrameTask:
+    """A handle to a task added to a `FrameScheduler`.
+
+    `progress` is the last progress the task reported, or None if it never has. Once finished,
+    `result` holds what the generator returned, or `error` what it raised.
+    """
+
+    def __init__(  # noqa: D107
+        self,
+        generator: Generator[Any, None, Any],
+        name: str,
+        priority: int,
+        on_done: Callable[[FrameTask], None] | None,
+    ) -> None:
+        self.generator = generator
+        self.name = name
+        self.priority = priority
+        self.on_done = on_done
+        self.state = TaskState.PENDING
+        self.progress: float | None = None
+        self.result: Any = None
+        self.error: Exception | None = None
+        self.steps = 0
+        self.run_time = 0.0
+
+    def __repr__(self) -> str:
+        progress = "" if self.progress is None else f", {self.progress:.0%}"
+        return f"FrameTask({self.name!r}, {self.state.name.lower()}{progress})"
+
+    @property
+    def done(self) -> bool:
+        """Check if the task has finished, in any way."""
+        return self.state is not TaskState.PENDING
+
+    def cancel(self) -> bool:
+        """Stop the task, running any `finally` blocks in the generator.
+
+        Returns:
+            True if the task was cancelled, false if it had already finished.
+        """
+        if self.done:
+            return False
+        # A task cancelling itself is closed by the scheduler once it yields.
+        if not self.generator.gi_running:
+            self.generator.close()
+        self._finish(TaskState.CANCELLED)
+        return True
+
+    def _finish(self, state: TaskState) -> None:
+        self.state = state
+        if self.on_done is not None:
+            try:
+                self.on_done(self)
+            except Exception:  # noqa: BLE001
+                traceback.print_exc()
+
+
+class FrameScheduler:
+    """Shares out a time budget between tasks each time it runs.
+
+    Args:
+        budget: How long each run may take, in seconds. At least one step is always taken, so a
+                single slow step can still go over.
+        clock: The clock to measure the budget with.
+    """
+
+    def __init__(  # noqa: D107
+        self, budget: float = 0.002, clock: Callable[[], float] = time.perf_counter
+    ) -> None:
+        self.budget = budget
+        self.clock = clock
+        self._queue: list[tuple[int, int, FrameTask]] = []
+        self._order = itertools.count()
+
+    def __len__(self) -> int:
+        return sum(1 for _, _, task in self._queue if not task.done)
+
+    def __iter__(self) -> Iterator[FrameTask]:
+        """Iterate through the unfinished tasks, in the order they'll run."""
+        return (task for _, _, task in sorted(self._queue) if not task.done)
+
+    def add(
+        self,
+        generator: Generator[Any, None, Any],
+        name: str | None = None,
+        priority: int = 0,
+        on_done: Callable[[FrameTask], None] | None = None,
+    ) -> FrameTask:
+        """Add a task.
+
+        Args:
+            generator: The generator to step.
+            name: A name to show for the task, defaults to the generator's name.
+            priority: Higher priority tasks run first.
+            on_done: Called with the task once it finishes, is cancelled, or fails.
+        Returns:
+            A handle to the task.
+        """
+        task = FrameTask(generator, name or generator.__name__, priority, on_done)
+        heapq.heappush(self._queue, (-priority, next(self._order), task))
+        return task
+
+    def cancel_all(self) -> None:
+        """Cancel every task."""
+        queue, self._queue = self._queue, []
+        for _, _, task in queue:
+            task.cancel()
+
+    def run(self) -> int:
+        """Step tasks until the budget is used up, or there are none left.
+
+        Returns:
+            How many steps were taken.
+        """
+        start = self.clock()
+        deadline = start + self.budget
+        steps = 0
+        now = start
+        while self._queue:
+            _, _, task = self._queue[0]
+            if task.done:
+                heapq.heappop(self._queue)
+                continue
+            # Always take at least one step, so tasks still move with a tiny budget.
+            if steps and now >= deadline:
+                break
+            heapq.heappop(self._queue)
+
+            # Keep stepping the same task for as long as the budget allows, since switching
+            # between generators each step would waste the budget on overhead.
+            task_start = now
+            while True:
+                steps += 1
+                task.steps += 1
+                try:
+                    progress = next(task.generator)
+                except StopIteration as e:
+                    task.result = e.value
+                    task.progress = 1
+                    task._finish(TaskState.DONE)
+                    break
+                except Exception as e:  # noqa: BLE001
+                    traceback.print_exc()
+                    task.error = e
+                    task._finish(TaskState.FAILED)
+                    break
+                if task.done:
+                    task.generator.close()
+                    break
+                if isinstance(progress, float | int) and not isinstance(progress, bool):
+                    task.progress = min(max(float(progress), 0), 1)
+                if self.clock() >= deadline:
+                    break
+            now = self.clock()
+            task.run_time += now - task_start
+
+            if not task.done:
+                # Goes behind any other tasks of the same priority.
+                heapq.heappush(self._queue, (-task.priority, next(self._order), task))
+        return steps
@@ -0,0 +1,104 @@
+"""Stand-ins for the game's modules, so `frame_tasks` can be imported outside the game.
+
+There's deliberately no `__init__.py` in here, so collecting these tests doesn't import
+`frame_tasks` itself, they only ever see it through the `scheduler` fixture.
+"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+from typing import Any
+
+import pytest
+
+
+class FakeHook:
+    """A hook which is only ever called directly, and tracks if it's been enabled."""
+
+    def __init__(self, func: Callable[..., Any]) -> None:
+        self.func = func
+        self.enabled = False
+
+    def __call__(self, *args: Any) -> Any:
+        return self.func(*args)
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+
+class FakeCommand:
+    def __init__(self, func: Callable[..., Any]) -> None:
+        self.func = func
+
+    def add_argument(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+
+def _module(name: str, **attrs: Any) -> ModuleType:
+    module = ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+def _forget_frame_tasks() -> None:
+    for name in [name for name in sys.modules if name.split(".")[0] == "frame_tasks"]:
+        del sys.modules[name]
+
+
+def _install_stand_ins(monkeypatch: pytest.MonkeyPatch) -> None:
+    stand_ins = {
+        "unrealsdk": _module("unrealsdk", logging=SimpleNamespace(info=lambda _: None)),
+        "unrealsdk.hooks": _module("unrealsdk.hooks", Type=SimpleNamespace(PRE=0, POST=1)),
+        "unrealsdk.unreal": _module(
+            "unrealsdk.unreal",
+            BoundFunction=object,
+            UObject=object,
+            WrappedStruct=object,
+        ),
+        "mods_base": _module(
+            "mods_base",
+            Library=object,
+            build_mod=lambda **_: None,
+            command=lambda **_: FakeCommand,
+            hook=lambda *_: FakeHook,
+        ),
+    }
+    monkeypatch.syspath_prepend(str(Path(__file__).parents[2]))
+    for name, module in stand_ins.items():
+        monkeypatch.setitem(sys.modules, name, module)
+
+
+_STAND_INS = pytest.StashKey[pytest.MonkeyPatch]()
+
+
+# Setting up the first test imports the `frame_tasks` package, so the stand-ins need to be in
+# place from the start of setup to the end of teardown, which is wider than any fixture.
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_setup(item: pytest.Item) -> Iterator[None]:
+    monkeypatch = pytest.MonkeyPatch()
+    item.stash[_STAND_INS] = monkeypatch
+    _install_stand_ins(monkeypatch)
+    return (yield)
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_teardown(item: pytest.Item) -> Iterator[None]:
+    try:
+        return (yield)
+    finally:
+        _forget_frame_tasks()
+        item.stash[_STAND_INS].undo()
+
+
+@pytest.fixture
+def scheduler() -> ModuleType:
+    """Import a fresh copy of `frame_tasks.scheduler` against the stand-ins."""
+    _forget_frame_tasks()
+    return importlib.import_module("frame_tasks.scheduler")
@@ -0,0 +1,161 @@
+"""Tests of sharing the frame budget between tasks."""
+
+from __future__ import annotations
+
+from collections.abc import Generator
+from types import ModuleType
+from typing import Any
+
+import pytest
+
+# Each step of a task costs 1ms on the fake clock.
+STEP = 0.001
+
+
+class FakeClock:
+    """A clock which only moves when told to."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+def _work(
+    clock: FakeClock, log: list[str], name: str, steps: int, cost: float = STEP
+) -> Generator[float, None, str]:
+    for idx in range(steps):
+        clock.advance(cost)
+        log.append(name)
+        yield (idx + 1) / steps
+    return name
+
+
+def test_budget_cutoff(scheduler: ModuleType, clock: FakeClock) -> None:
+    frames = scheduler.FrameScheduler(budget=0.0025, clock=clock)
+    log: list[str] = []
+    task = frames.add(_work(clock, log, "a", 10))
+
+    assert frames.run() == 3  # noqa: PLR2004
+    assert task.steps == 3  # noqa: PLR2004
+    assert task.progress == pytest.approx(0.3)
+    assert task.run_time == pytest.approx(0.003)
+
+    assert frames.run() == 3  # noqa: PLR2004
+    assert log == ["a"] * 6
+
+
+def test_slow_step_still_runs(scheduler: ModuleType, clock: FakeClock) -> None:
+    frames = scheduler.FrameScheduler(budget=0.0025, clock=clock)
+    log: list[str] = []
+    slow = frames.add(_work(clock, log, "slow", 2, cost=0.01))
+    other = frames.add(_work(clock, log, "other", 2))
+
+    assert frames.run() == 1
+    assert (slow.steps, other.steps) == (1, 0)
+    assert frames.run() == 4  # noqa: PLR2004
+    assert log == ["slow", "other", "other", "slow"]
+
+
+def test_priority(scheduler: ModuleType, clock: FakeClock) -> None:
+    frames = scheduler.FrameScheduler(budget=0.0005, clock=clock)
+    log: list[str] = []
+    for name, priority in (("low", -1), ("normal", 0), ("high", 5)):
+        frames.add(_work(clock, log, name, 2), name, priority)
+
+    assert [task.name for task in frames] == ["high", "normal", "low"]
+    while frames:
+        frames.run()
+    assert log == ["high", "high", "normal", "normal", "low", "low"]
+
+
+def test_round_robin(scheduler: ModuleType, clock: FakeClock) -> None:
+    frames = scheduler.FrameScheduler(budget=0.0005, clock=clock)
+    log: list[str] = []
+    for name in "abc":
+        frames.add(_work(clock, log, name, 2))
+
+    while frames:
+        frames.run()
+    assert log == ["a", "b", "c", "a", "b", "c"]
+
+
+def test_done(scheduler: ModuleType, clock: FakeClock) -> None:
+    frames = scheduler.FrameScheduler(budget=1, clock=clock)
+    finished: list[Any] = []
+    task = frames.add(_work(clock, [], "a", 3), on_done=finished.append)
+
+    assert frames.run() == 4  # noqa: PLR2004
+    assert finished == [task]
+    assert task.state is scheduler.TaskState.DONE
+    assert (task.result, task.progress) == ("a", 1)
+    assert len(frames) == 0
+
+
+def test_cancel_self(scheduler: ModuleType, clock: FakeClock) -> None:
+    frames = scheduler.FrameScheduler(budget=1, clock=clock)
+    log: list[str] = []
+    finished: list[Any] = []
+
+    def cancels_itself() -> Generator[None, None, None]:
+        try:
+            log.append("step")
+            yield
+            task.cancel()
+            yield
+            log.append("not reached")
+        finally:
+            log.append("closed")
+
+    task = frames.add(cancels_itself(), on_done=finished.append)
+    other = frames.add(_work(clock, log, "other", 1))
+
+    frames.run()
+
+    assert log == ["step", "closed", "other"]
+    assert task.state is scheduler.TaskState.CANCELLED
+    assert finished == [task]
+    assert other.state is scheduler.TaskState.DONE
+    assert not task.cancel()
+    assert not frames
+
+
+def test_failure(
+    scheduler: ModuleType, clock: FakeClock, capsys: pytest.CaptureFixture[str]
+) -> None:
+    frames = scheduler.FrameScheduler(budget=1, clock=clock)
+    log: list[str] = []
+    finished: list[Any] = []
+
+    def fails() -> Generator[float, None, None]:
+        yield 0.5
+        raise ValueError("broken")
+
+    def broken_callback(_: Any) -> None:
+        raise RuntimeError("callback")
+
+    task = frames.add(fails(), on_done=finished.append)
+    frames.add(_work(clock, log, "bad_callback", 1), on_done=broken_callback)
+    other = frames.add(_work(clock, log, "other", 1))
+
+    frames.run()
+
+    assert finished == [task]
+    assert task.state is scheduler.TaskState.FAILED
+    assert isinstance(task.error, ValueError)
+    assert task.progress == 0.5  # noqa: PLR2004
+    # Neither the task nor the callback raising stops the other tasks.
+    assert other.state is scheduler.TaskState.DONE
+    assert log == ["bad_callback", "other"]
+    err = capsys.readouterr().err
+    assert "ValueError: broken" in err
+    assert "RuntimeError: callback" in err
@@ -4,9 +4,9 @@ from typing import TYPE_CHECKING, Any
 
 import unrealsdk
 from mods_base import BoolOption, GroupedOption, SpinnerOption, build_mod, get_pc, hook, keybind
-from unrealsdk.hooks import Block
-
-from insta_vehicles.ucaching import ObjReferenceByName
+from ucaching import ObjReferenceByName
+from unrealsdk.hooks import Block, Type
+from unrealsdk.unreal import WeakPointer
 
 if TYPE_CHECKING:
     from bl2.Core import Object  # pyright: ignore[reportMissingModuleSource]
@@ -91,20 +91,49 @@ FANBOAT_OBJECTIVE: ObjReferenceByName[MissionObjectiveDefinition] = ObjReference
     "MissionObjectiveDefinition", "GD_Sage_Ep1.M_Sage_Mission01:DefendRepair"
 )
 
+# The vehicle each choice would summon at the current map's station, or None if the station
+# doesn't support it, by option identifier. Filled in as needed, cleared by `forget_vehicles` and
+# when the choice changes.
+station_vehicles: dict[str, WeakPointer[VSSUIDefinition] | None] = {}
+# The names of the vehicle objectives known to be completed. They can't become incomplete again
+# without loading a save, or a different character, which clears them in `forget_vehicles`.
+completed_objectives: set[str] = set()
+
+
+def forget_station_vehicle(option: SpinnerOption, _new_value: str) -> None:
+    station_vehicles.pop(option.identifier, None)
+
+
+def forget_vehicles() -> None:
+    station_vehicles.clear()
+    completed_objectives.clear()
+
+
 despawn_on_exit = BoolOption("Despawn on exit", False)
 skip_animations = BoolOption(
     "Skip Animations", False, description="Skip the enter and exit animations"
 )
 prefer_technical = BoolOption("Prefer Technical", False)
-runner_option = SpinnerOption("Runner", MG_RUNNER, [MG_RUNNER, ROCKET_RUNNER])
+runner_option = SpinnerOption(
+    "Runner", MG_RUNNER, [MG_RUNNER, ROCKET_RUNNER], on_change=forget_station_vehicle
+)
 technical_option = SpinnerOption(
-    "Technical", SAWBLADE_TECHNICAL, [SAWBLADE_TECHNICAL, CATAPULT_TECHNICAL]
+    "Technical",
+    SAWBLADE_TECHNICAL,
+    [SAWBLADE_TECHNICAL, CATAPULT_TECHNICAL],
+    on_change=forget_station_vehicle,
 )
 hovercraft_option = SpinnerOption(
-    "Hovercraft", HARPOON_HOVERCRAFT, [HARPOON_HOVERCRAFT, ROCKET_HOVERCRAFT, SAWBLADE_HOVERCRAFT]
+    "Hovercraft",
+    HARPOON_HOVERCRAFT,
+    [HARPOON_HOVERCRAFT, ROCKET_HOVERCRAFT, SAWBLADE_HOVERCRAFT],
+    on_change=forget_station_vehicle,
 )
 fanboat_option = SpinnerOption(
-    "Fan Boat", SHOCK_FANBOAT, [CORROSIVE_FANBOAT, INCENDIARY_FANBOAT, SHOCK_FANBOAT]
+    "Fan Boat",
+    SHOCK_FANBOAT,
+    [CORROSIVE_FANBOAT, INCENDIARY_FANBOAT, SHOCK_FANBOAT],
+    on_change=forget_station_vehicle,
 )
 
 vehicle_choices_group = GroupedOption(
@@ -123,6 +152,20 @@ def find_spawn_station_def() -> VehicleSpawnStationGFxDefinition | None:
     return None
 
 
+# The current map's spawn station, looked up once the map loads instead of on every summon.
+spawn_station: WeakPointer[VehicleSpawnStationGFxDefinition] = WeakPointer()
+
+
+def get_spawn_station_def() -> VehicleSpawnStationGFxDefinition | None:
+    global spawn_station
+    if (stationdef := spawn_station()) is not None:
+        return stationdef
+    # Either not found when the map loaded, or unloaded since, so it's worth looking again.
+    if (stationdef := find_spawn_station_def()) is not None:
+        spawn_station = WeakPointer(stationdef)
+    return stationdef
+
+
 def get_customisation_for_vehicle_def(
     vehicle_def: VSSUIDefinition,
 ) -> CustomizationDefinition | None:
@@ -142,46 +185,60 @@ def station_supports_vehicle(
 
 
 def lookup_vehicle_def(vehicle_name: str) -> VSSUIDefinition | None:
-    if (vehicle_ref := VSSUIDEFS.get(vehicle_name)) is not None and (
-        vehicle_def := vehicle_ref()
-    ) is not None:
-        return vehicle_def
-    return None
+    if (vehicle_ref := VSSUIDEFS.get(vehicle_name)) is None:
+        return None
+    try:
+        return vehicle_ref()
+    except ValueError:
+        # The DLC it's from isn't loaded.
+        return None
 
 
 def has_completed_objective(objective_ref: ObjReferenceByName[MissionObjectiveDefinition]) -> bool:
+    if objective_ref.name in completed_objectives:
+        return True
+    try:
+        objective = objective_ref()
+    except ValueError:
+        return False
     pc: WillowPlayerController = get_pc()
     mission_tracker: MissionTracker = pc.WorldInfo.GRI.MissionTracker
-    return (objective := objective_ref()) and mission_tracker.IsObjectiveBitSet(
-        objective, objective.ObjectiveCount
-    )
+    if not mission_tracker.IsObjectiveBitSet(objective, objective.ObjectiveCount):
+        return False
+    completed_objectives.add(objective_ref.name)
+    return True
+
+
+def get_station_vehicle(
+    station: VehicleSpawnStationGFxDefinition, option: SpinnerOption
+) -> VSSUIDefinition | None:
+    if option.identifier in station_vehicles:
+        pointer = station_vehicles[option.identifier]
+        if pointer is None:
+            return None
+        if (vehicle_def := pointer()) is not None:
+            return vehicle_def
+    vehicle_def = lookup_vehicle_def(option.value)
+    if vehicle_def is None or not station_supports_vehicle(station, vehicle_def):
+        station_vehicles[option.identifier] = None
+        return None
+    station_vehicles[option.identifier] = WeakPointer(vehicle_def)
+    return vehicle_def
 
 
 def get_vehicle_def(station: VehicleSpawnStationGFxDefinition) -> VSSUIDefinition | None:
-    if (
-        (
-            has_completed_objective(TECHNICAL_OBJECTIVE)
-            and prefer_technical.value
-            and (vehicle_def := lookup_vehicle_def(technical_option.value))
-            and station_supports_vehicle(station, vehicle_def)
-        )
-        or (
-            has_completed_objective(RUNNER_OBJECTIVE)
-            and (vehicle_def := lookup_vehicle_def(runner_option.value))
-            and station_supports_vehicle(station, vehicle_def)
-        )
-        or (
-            has_completed_objective(HOVERCRAFT_OBJECTIVE)
-            and (vehicle_def := lookup_vehicle_def(hovercraft_option.value))
-            and station_supports_vehicle(station, vehicle_def)
-        )
-        or (
-            has_completed_objective(FANBOAT_OBJECTIVE)
-            and (vehicle_def := lookup_vehicle_def(fanboat_option.value))
-            and station_supports_vehicle(station, vehicle_def)
-        )
-    ):
-        return vehicle_def
+    families = [
+        (RUNNER_OBJECTIVE, runner_option),
+        (HOVERCRAFT_OBJECTIVE, hovercraft_option),
+        (FANBOAT_OBJECTIVE, fanboat_option),
+    ]
+    if prefer_technical.value:
+        families.insert(0, (TECHNICAL_OBJECTIVE, technical_option))
+    for objective_ref, option in families:
+        if (vehicle_def := get_station_vehicle(station, option)) is not None and (
+            has_completed_objective(objective_ref)
+        ):
+            return vehicle_def
     return None
 
 
@@ -203,10 +260,11 @@ def summon_vehicle() -> None:
             pop_master.DespawnVehicleFromVehicleSpawnStation(VEHICLE_SLOT)
         return
 
-    if (stationdef := find_spawn_station_def()) is None:
+    if (stationdef := get_spawn_station_def()) is None:
         return
 
-    vehicle_def = get_vehicle_def(stationdef)
+    if (vehicle_def := get_vehicle_def(stationdef)) is None:
+        return
     data_manager = willow_globals.GetPlayerPawnDataManager()
     spawn_def = data_manager.LoadVSSVehicleDefinition(vehicle_def.PathToVSSDefinition, pc)
     if pop_master.GetVehicleFromVehicleSpawnStation(VEHICLE_SLOT) is not None:
@@ -235,4 +293,21 @@ def exit_vehicle(pc: WillowPlayerController, *_: Any) -> type[Block]:
     return Block
 
 
-build_mod(options=[despawn_on_exit, skip_animations, vehicle_choices_group])
+@hook("WillowGame.WillowGameInfo:PostCommitMapChange", Type.POST)
+def map_change(*_: Any) -> None:
+    global spawn_station
+    spawn_station = WeakPointer()
+    forget_vehicles()
+    get_spawn_station_def()
+
+
+@hook("WillowGame.WillowPlayerController:FinishSaveGameLoad", Type.POST)
+def save_game_load(*_: Any) -> None:
+    forget_vehicles()
+
+
+# Nothing is tracked while disabled, so a different save may have been loaded since.
+build_mod(
+    options=[despawn_on_exit, skip_animations, vehicle_choices_group],
+    on_enable=forget_vehicles,
+)
@@ -21,11 +21,10 @@ from mods_base import (
     open_in_mod_dir,
 )
 from networking import add_network_functions, host
+from ucaching import ObjReferenceByName, forget_missing
 from unrealsdk.hooks import Block, Type
 from unrealsdk.unreal import WeakPointer
 
-from movement_tech.ucaching import ObjReferenceByName
-
 if TYPE_CHECKING:
     from bl2.Core import Object
     from bl2.Engine import Actor, BehaviorBase, WorldInfo
@@ -173,6 +172,8 @@ def setup_objects() -> None:
     with open_in_mod_dir(COMMANDS_FILE_PATH) as file:
         for line in file.readlines():
             pc.ConsoleCommand(line)
+    # The references may have been looked up, and found missing, before these objects existed.
+    forget_missing()
 
 
 @hook("WillowGame.FrontendGFxMovie:Start", Type.POST_UNCONDITIONAL, immediately_enable=True)
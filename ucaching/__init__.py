@@ -0,0 +1,226 @@
+import argparse
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any
+
+import unrealsdk
+from unrealsdk.hooks import Type
+from unrealsdk.unreal import BoundFunction, UClass, UObject, WeakPointer, WrappedStruct
+
+from mods_base import Library, build_mod, command, hook
+
+__all__: tuple[str, ...] = (
+    "ObjReference",
+    "ObjReferenceByName",
+    "ObjReferenceConstructed",
+    "ReferenceStats",
+    "forget_missing",
+    "resolve_all",
+)
+
+
+class ObjReference[T: UObject = UObject](ABC):
+    """Reference to an object.
+
+    Object is saved with a weak pointer after looking it up.
+    """
+
+    _obj_pointer: WeakPointer[T] | None = None
+
+    @abstractmethod
+    def get_object(self) -> T:
+        """Get the object being referenced.
+
+        Subclasses must implement this method.
+        """
+
+    def __call__(self) -> T:
+        """Get the UObject."""
+        if self._obj_pointer is None or (obj := self._obj_pointer()) is None:
+            obj = self.get_object()
+            self._obj_pointer = WeakPointer(obj)
+        return obj
+
+
+@dataclass
+class ReferenceStats:
+    """How a by name reference has been used.
+
+    Hits are calls which found the object already cached, misses are calls where the object
+    couldn't be found, whether looked up or already known to be missing. Resolves are actual
+    lookups, a reference with a lot of them keeps losing its object.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    resolves: int = 0
+    resolve_time: float = 0
+
+
+class _Slot:
+    """The cached pointer shared by every by name reference to the same object.
+
+    Objects which couldn't be found are remembered as missing, until the next map change or
+    `forget_missing`, so they aren't looked up again on every call.
+    """
+
+    __slots__ = ("cls", "missing", "name", "pointer", "stats")
+
+    def __init__(self, cls: UClass | str, name: str) -> None:
+        self.cls = cls
+        self.name = name
+        self.pointer: WeakPointer | None = None
+        self.missing = False
+        self.stats = ReferenceStats()
+
+    def resolve(self) -> UObject:
+        start = time.perf_counter()
+        try:
+            obj = unrealsdk.find_object(self.cls, self.name)
+        except ValueError:
+            self.missing = True
+            self.stats.misses += 1
+            raise
+        finally:
+            self.stats.resolves += 1
+            self.stats.resolve_time += time.perf_counter() - start
+        self.pointer = WeakPointer(obj)
+        return obj
+
+
+# Every by name reference from every mod, keyed by lowercase (class name, object name).
+_registry: dict[tuple[str, str], _Slot] = {}
+
+
+def _get_slot(cls: UClass | str, name: str) -> _Slot:
+    cls_name = cls if isinstance(cls, str) else cls.Name
+    key = (cls_name.lower(), name.lower())
+    slot = _registry.get(key)
+    if slot is None:
+        slot = _registry[key] = _Slot(cls, name)
+    return slot
+
+
+@dataclass
+class ObjReferenceByName[T: UObject = UObject](ObjReference[T]):
+    """Reference to an object by name.
+
+    References to the same object share their cached pointer, no matter which mod made them.
+    """
+
+    cls: UClass | str
+    name: str
+    _slot: _Slot = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._slot = _get_slot(self.cls, self.name)
+
+    def get_object(self) -> T:
+        """Get the object using find_object."""
+        return unrealsdk.find_object(self.cls, self.name)
+
+    @property
+    def stats(self) -> ReferenceStats:
+        """The usage stats, shared with every other reference to the same object."""
+        return self._slot.stats
+
+    def __call__(self) -> T:
+        """Get the UObject."""
+        slot = self._slot
+        if slot.pointer is not None and (obj := slot.pointer()) is not None:
+            slot.stats.hits += 1
+            return obj  # type: ignore[return-value]
+        if slot.missing:
+            slot.stats.misses += 1
+            msg = f"{self.name} isn't loaded"
+            raise ValueError(msg)
+        return slot.resolve()  # type: ignore[return-value]
+
+
+@dataclass
+class ObjReferenceConstructed[T: UObject = UObject](ObjReference[T]):
+    """Reference to an object that should be constructed."""
+
+    cls: UClass | str
+    outer: ObjReference | None = None
+    name: str = "None"
+    flags: int = 0
+    template: ObjReference | None = None
+
+    def get_object(self) -> T:
+        """Construct the object."""
+        return unrealsdk.construct_object(
+            self.cls,
+            None if self.outer is None else self.outer(),
+            self.name,
+            self.flags,
+            None if self.template is None else self.template(),
+        )
+
+
+def resolve_all() -> int:
+    """Look up every by name reference again, in one go.
+
+    References to objects which aren't loaded are left to be looked up when next used, they
+    aren't remembered as missing since they may still be created later on the map. These eager
+    lookups aren't counted in the stats either.
+
+    Returns:
+        How many references were found.
+    """
+    found = 0
+    for slot in _registry.values():
+        slot.missing = False
+        try:
+            obj = unrealsdk.find_object(slot.cls, slot.name)
+        except ValueError:
+            slot.pointer = None
+            continue
+        slot.pointer = WeakPointer(obj)
+        found += 1
+    return found
+
+
+def forget_missing() -> None:
+    """Let references to missing objects look them up again, e.g. after loading a package."""
+    for slot in _registry.values():
+        slot.missing = False
+
+
+@hook("WillowGame.WillowGameInfo:PostCommitMapChange", Type.POST)
+def _post_commit_map_change(
+    _1: UObject,
+    _2: WrappedStruct,
+    _3: Any,
+    _4: BoundFunction,
+) -> None:
+    # Objects from the old map may be gone, or replaced by new ones with the same name.
+    resolve_all()
+
+
+@command(description="Show how often each cached reference is used, looked up and missing.")
+def ucaching_stats(args: argparse.Namespace) -> None:
+    slots = sorted(_registry.values(), key=lambda slot: slot.stats.resolves, reverse=True)
+    for slot in slots[: args.count]:
+        stats = slot.stats
+        average = stats.resolve_time / stats.resolves * 1000 if stats.resolves else 0
+        if slot.missing:
+            state = "missing"
+        elif slot.pointer is not None and slot.pointer() is not None:
+            state = "cached"
+        else:
+            state = "unresolved"
+        unrealsdk.logging.info(
+            f"{slot.name} ({state}): {stats.hits} hits, {stats.misses} misses,"
+            f" {stats.resolves} resolves averaging {average:.3f}ms"
+        )
+    unrealsdk.logging.info(f"{len(_registry)} references")
+
+
+ucaching_stats.add_argument(
+    "--count", type=int, default=20, help="How many references to show, most resolved first."
+)
+
+
+build_mod(cls=Library, commands=[ucaching_stats], hooks=[_post_commit_map_change])
@@ -1,14 +1,211 @@
+import argparse
+import time
+import traceback
 from collections.abc import Callable
 from dataclasses import dataclass, field
+from enum import Enum, auto
 from typing import Any
 
 import unrealsdk
 from unrealsdk.hooks import Type
 from unrealsdk.unreal import BoundFunction, UObject, WeakPointer, WrappedStruct
 
-from mods_base import Library, bind_all_hooks, build_mod, get_pc, hook
+from mods_base import HiddenOption, Library, build_mod, command, get_pc, hook
+from ue_timers.coroutines import CancelledError, CoroutineScheduler, Future, Task
+from ue_timers.limits import Debounced, Throttled, TokenBucket
+from ue_timers.stats import Instrumentation
+from ue_timers.wheel import TimingWheel, WheelTimer
 
-__all__: tuple[str, ...] = ("UnrealTimer",)
+__all__: tuple[str, ...] = (
+    "CancelledError",
+    "Clock",
+    "CoroutineScheduler",
+    "Debounced",
+    "Future",
+    "Task",
+    "Throttled",
+    "TimerScheduler",
+    "TokenBucket",
+    "UnrealTimer",
+    "WheelTimer",
+    "debounce",
+    "gather",
+    "get_scheduler",
+    "instrumentation",
+    "sleep",
+    "spawn",
+    "throttle",
+    "token_bucket",
+    "wait_for",
+)
+
+
+class _TimerManager:
+    """Tracks every running timer, so a single set of hooks can serve all of them.
+
+    `Engine.Actor:Timer` fires for every actor timer in the game, so the hooks are only enabled
+    while at least one of our timers is running.
+
+    The engine only calls real functions on the timer's actor, and `Timer` is the only one we can
+    hook, so each running timer still needs its own actor. Stopped timers hand theirs back to a
+    pool instead, so only as many actors are spawned as timers run at once.
+    """
+
+    def __init__(self) -> None:
+        self.by_actor: dict[UObject, UnrealTimer] = {}
+        self.running: dict[int, UnrealTimer] = {}
+        self.free_actors: list[WeakPointer] = []
+
+    def acquire_actor(self) -> UObject:
+        while self.free_actors:
+            actor = self.free_actors.pop()()
+            if actor is not None:
+                return actor
+        return get_pc().WorldInfo.Spawn(unrealsdk.find_class("WillowWeapon"))
+
+    def release_actor(self, actor: UObject) -> None:
+        actor.Timers = []
+        self.free_actors.append(WeakPointer(actor))
+
+    def add(self, timer: "UnrealTimer", actor: UObject) -> None:
+        if not self.running:
+            for timer_hook in _HOOKS:
+                timer_hook.enable()
+        self.by_actor[actor] = timer
+        self.running[id(timer)] = timer
+
+    def remove(self, timer: "UnrealTimer") -> None:
+        self.running.pop(id(timer), None)
+        actor = timer._timer_actor()
+        if actor is not None and self.by_actor.get(actor) is timer:
+            del self.by_actor[actor]
+        if not self.running:
+            for timer_hook in _HOOKS:
+                timer_hook.disable()
+
+    def capture(self) -> None:
+        """Remember how far along each running timer is, before its actor goes away."""
+        for timer in self.running.values():
+            if (timer_data := timer._get_timer_data()) is not None:
+                timer._elapsed = timer_data.Count
+                timer._paused = timer_data.bPaused
+
+
+_manager = _TimerManager()
+
+# Off by default, see the `timer_stats` command.
+instrumentation = Instrumentation()
+
+# Named timers which were running on the last save quit, so they can be restored next launch.
+# Only ever replaced, never modified in place, since the value starts out as the shared default.
+_saved_timers = HiddenOption[dict[str, dict[str, Any]]]("saved_timers", {})
+
+
+@hook("Engine.Actor:Timer")
+def _timer_finish(
+    obj: UObject,
+    _2: WrappedStruct,
+    _3: Any,
+    _4: BoundFunction,
+) -> None:
+    timer = _manager.by_actor.get(obj)
+    if timer is None:
+        return
+    timer_data = timer._get_timer_data()
+    if timer_data is None:
+        return
+    loop = timer_data.bLoop
+    if not instrumentation.enabled:
+        if not loop:
+            timer.stop()
+        timer.on_finish()
+        return
+
+    due = timer._due
+    period = timer.duration
+    fired = _game_time()
+    if loop:
+        timer._due = (fired if due is None else due) + period
+    else:
+        timer.stop()
+    start = time.perf_counter()
+    timer.on_finish()
+    cost = time.perf_counter() - start
+    name = timer.name or getattr(timer.on_finish, "__qualname__", repr(timer.on_finish))
+    instrumentation.record(name, due, fired, cost, period)
+
+
+@hook("WillowGame.WillowGameInfo:PreCommitMapChange")
+def _pre_commit_map_change(
+    _1: UObject,
+    _2: WrappedStruct,
+    _3: Any,
+    _4: BoundFunction,
+) -> None:
+    _manager.capture()
+
+
+@hook("WillowGame.WillowPlayerController:ReturnToTitleScreen")
+def _return_to_title_screen(
+    _1: UObject,
+    _2: WrappedStruct,
+    _3: Any,
+    _4: BoundFunction,
+) -> None:
+    _manager.capture()
+    # Always overwritten, even with nothing, so timers from an older session aren't restored.
+    saved = {
+        timer.name: {
+            "duration": timer.duration,
+            "loop": timer.loop,
+            "elapsed": timer._elapsed,
+            "paused": timer._paused,
+        }
+        for timer in _manager.running.values()
+        if timer.name is not None
+    }
+    if saved != _saved_timers.value:
+        _saved_timers.value = saved
+        _saved_timers.save()
+
+
+@hook("WillowGame.WillowGameInfo:PostCommitMapChange", Type.POST)
+def _post_commit_map_change(
+    _1: UObject,
+    _2: WrappedStruct,
+    _3: Any,
+    _4: BoundFunction,
+) -> None:
+    # The old actors are gone along with the old map.
+    _manager.by_actor.clear()
+    _manager.free_actors.clear()
+    for timer in list(_manager.running.values()):
+        timer._timer_data = None
+        if timer.duration == 0 and timer.loop is False:
+            continue
+        timer._start(timer.duration, timer.loop, timer._elapsed, timer._paused)
+
+
+def _game_time() -> float:
+    return get_pc().WorldInfo.TimeSeconds
+
+
+class Clock(Enum):
+    """Which time a `TimerScheduler` counts in."""
+
+    # WorldInfo.TimeSeconds, slows down with slow-mo and stops while paused.
+    GAME = auto()
+    # Wall clock time, keeps going through pauses, menus and map loads.
+    REAL = auto()
+    # WorldInfo.AudioTimeSeconds, isn't affected by slow-mo but still stops while paused.
+    REAL_UNPAUSED = auto()
+
+
+_HOOKS = (
+    _timer_finish,
+    _pre_commit_map_change,
+    _post_commit_map_change,
+)
 
 
 @dataclass
@@ -18,75 +215,41 @@ class UnrealTimer:
     Can be used as either its own object or as a decorator for the on_tick function.
     Timers only run while in game and not paused, so opening the menu in singleplayer
     will stop the timer. Timers will also automatically resume if left running on save quit
-    or on map transition.
-    The timer completely restarts on map transition, long timers may fail due to this.
+    or on map transition, carrying on from where they were.
+    Named timers also remember how far along they were on save quit across restarting the
+    game, call `restore` to pick them back up.
 
     Args:
         on_tick: The callback that is triggered when the timer is up.
+        name: A unique name for the timer, needed to restore it after restarting the game.
 
     """
 
     on_finish: Callable[[], None] = field(init=True)
+    name: str | None = None
     _timer_actor: WeakPointer | None = field(init=False, default_factory=WeakPointer)
+    _timer_data: WrappedStruct | None = field(init=False, default=None, repr=False)
     duration: float = field(init=False, default=0)
     loop: bool = field(init=False, default=False)
-
-    def __post_init__(self) -> None:  # noqa: D105
-        bind_all_hooks(self, f"{id(self)}:{id(self.on_finish)}")
-
-    @hook("Engine.Actor:Timer")
-    def _timer_finish(
-        self,
-        obj: UObject,
-        _2: WrappedStruct,
-        _3: Any,
-        _4: BoundFunction,
-    ) -> None:
-        if obj != self._timer_actor():
-            return
-        timer_data = self._get_timer_data()
-        if timer_data is None:
-            return
-        if not timer_data.bLoop:
-            self.stop()
-        self.on_finish()
-
-    @hook("WillowGame.WillowGameInfo:PostCommitMapChange", Type.POST)
-    def _post_commit_map_change(
-        self,
-        _1: UObject,
-        _2: WrappedStruct,
-        _3: Any,
-        _4: BoundFunction,
-    ) -> None:
-        if self.duration == 0 and self.loop is False:
-            return
-        self.start(self.duration, self.loop)
+    _elapsed: float = field(init=False, default=0, repr=False)
+    _paused: bool = field(init=False, default=False, repr=False)
+    # When the timer is next due in game time, only tracked while instrumentation is enabled.
+    _due: float | None = field(init=False, default=None, repr=False)
 
     def _get_timer_actor(self) -> UObject:
         actor: UObject | None = self._timer_actor()
         if actor is None:
-            new_actor: UObject = get_pc().WorldInfo.Spawn(unrealsdk.find_class("WillowWeapon"))
-            actor = new_actor
+            actor = _manager.acquire_actor()
             self._timer_actor = WeakPointer(actor)
         return actor
 
     def _get_timer_data(self) -> WrappedStruct | None:
-        timer_actor = self._timer_actor()
-        if self._timer_actor() is None:
+        # The cached struct points into the actor's Timers array, only valid while it's alive.
+        if self._timer_data is None:
             return None
-        for timer in timer_actor.Timers:
-            if timer.FuncName == "Timer":
-                return timer
-        return None
-
-    def _enable_hooks(self) -> None:
-        self._timer_finish.enable()
-        self._post_commit_map_change.enable()
-
-    def _disable_hooks(self) -> None:
-        self._timer_finish.disable()
-        self._post_commit_map_change.disable()
+        if self._timer_actor() is None:
+            self._timer_data = None
+        return self._timer_data
 
     def start(self, duration: float, loop: bool) -> None:
         """Start the timer.
@@ -98,6 +261,11 @@ class UnrealTimer:
                         the timer a different legnth, the value is limited to length.
 
         """
+        self._start(duration, loop)
+
+    def _start(
+        self, duration: float, loop: bool, elapsed: float = 0, paused: bool = False
+    ) -> None:
         timer_actor = self._get_timer_actor()
         if self._get_timer_data() is not None:
             msg = "Cannot start a timer that is running."
@@ -107,25 +275,53 @@ class UnrealTimer:
             "TimerData",
             FuncName="Timer",
             bLoop=loop,
+            bPaused=paused,
             Rate=duration,
+            Count=elapsed,
             TimerTimeDilation=1,
             TimerObj=timer_actor,
         )
         timer_actor.Timers = [timer_data]
-        self._enable_hooks()
+        self._timer_data = timer_actor.Timers[0]
+        _manager.add(self, timer_actor)
         self.duration = duration
         self.loop = loop
+        self._elapsed = 0
+        self._paused = False
+        self._due = None
+        if instrumentation.enabled and not paused:
+            self._due = _game_time() + duration - elapsed
+
+    def restore(self) -> bool:
+        """Start a named timer from where it was when the game was last save quit.
+
+        Returns:
+            True if the timer was restored, false if it wasn't running on the last save quit, or
+            is still running since then.
+        """
+        if self.name is None or (saved := _saved_timers.value.get(self.name)) is None:
+            return False
+        _saved_timers.value = {
+            name: data for name, data in _saved_timers.value.items() if name != self.name
+        }
+        _saved_timers.save()
+        if self.is_running():
+            return False
+        self._start(saved["duration"], saved["loop"], saved["elapsed"], saved["paused"])
+        return True
 
     def stop(self) -> None:
         """Stop the timer. Must do this when finished with a timer so it can be removed properly."""
-        self._disable_hooks()
+        _manager.remove(self)
         self.duration = 0
         self.loop = False
         timer_actor = self._timer_actor()
         if timer_actor is None or self._get_timer_data() is None:
             msg = "Cannot stop a timer that is not running."
             raise RuntimeError(msg)
-        timer_actor.Timers = []
+        _manager.release_actor(timer_actor)
+        self._timer_actor = WeakPointer()
+        self._timer_data = None
 
     def pause(self) -> None:
         """Pause the timer, does not interrupt the count."""
@@ -134,6 +330,7 @@ class UnrealTimer:
             msg = "Cannot pause a timer that is not running."
             raise RuntimeError(msg)
         timer_data.bPaused = True
+        self._due = None
 
     def resume(self) -> None:
         """Resume the timer."""
@@ -157,6 +354,7 @@ class UnrealTimer:
             return
         timer_data.Rate = duration
         timer_data.bLoop = loop
+        self._due = None
         self.duration = duration
         self.loop = loop
 
@@ -173,4 +371,224 @@ class UnrealTimer:
         return timer_data.bPaused
 
 
-build_mod(cls=Library)
+class TimerScheduler:
+    """Runs lots of short python timers off a single driver.
+
+    Timers are kept in a `TimingWheel`, so scheduling and cancelling cost the same no matter how
+    many are waiting, and everything due on the same tick is run in one go. Timers fire on the
+    first tick after they're due, so they're only as accurate as the resolution.
+
+    Game time schedulers are driven by a single looping engine timer, so like `UnrealTimer`,
+    timers only count down while in game and not paused, and keep going across map transitions.
+    The other clocks need to keep going while the game is paused, so they're driven by the
+    viewport tick instead, which is shared between all of them and doesn't need an actor.
+
+    Args:
+        resolution: How often the wheel ticks, in seconds.
+        slots: How many slots the timing wheel has.
+        clock: Which time to count in.
+    """
+
+    def __init__(  # noqa: D107
+        self, resolution: float = 1 / 30, slots: int = 512, clock: Clock = Clock.GAME
+    ) -> None:
+        self.clock = clock
+        self._wheel = TimingWheel(resolution, slots)
+        self._driver = UnrealTimer(self._on_tick) if clock is Clock.GAME else None
+        self._last_time = 0.0
+
+    def __len__(self) -> int:
+        return len(self._wheel)
+
+    def _now(self) -> float:
+        if self.clock is Clock.REAL:
+            return time.perf_counter()
+        if (pc := get_pc()) is None:
+            return self._last_time
+        if self.clock is Clock.REAL_UNPAUSED:
+            return pc.WorldInfo.AudioTimeSeconds
+        return pc.WorldInfo.TimeSeconds
+
+    def _is_driving(self) -> bool:
+        if self._driver is None:
+            return self in _ticking
+        return self._driver.is_running()
+
+    def _start_driving(self) -> None:
+        self._last_time = self._now()
+        if self._driver is None:
+            _ticking.append(self)
+            _viewport_tick.enable()
+        else:
+            self._driver.start(self._wheel.resolution, True)
+
+    def _stop_driving(self) -> None:
+        if self._driver is None:
+            _ticking.remove(self)
+            if not _ticking:
+                _viewport_tick.disable()
+        else:
+            self._driver.stop()
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> WheelTimer:
+        """Call a function after a delay.
+
+        Args:
+            delay: How long to wait, in seconds.
+            callback: The function to call.
+        Returns:
+            A handle which can be passed to `cancel`.
+        """
+        if not self._is_driving():
+            self._start_driving()
+        return self._wheel.schedule(delay, callback)
+
+    def cancel(self, timer: WheelTimer) -> bool:
+        """Cancel a timer.
+
+        Args:
+            timer: The handle returned by `call_later`.
+        Returns:
+            True if the timer was cancelled, false if it already fired or was cancelled.
+        """
+        cancelled = self._wheel.cancel(timer)
+        if not self._wheel and self._is_driving():
+            self._stop_driving()
+        return cancelled
+
+    def cancel_all(self) -> None:
+        """Cancel every timer."""
+        self._wheel.clear()
+        if self._is_driving():
+            self._stop_driving()
+
+    def _on_tick(self) -> None:
+        now = self._now()
+        # Game and audio time start again from zero on each new map.
+        elapsed = now - self._last_time if now >= self._last_time else self._wheel.resolution
+        self._last_time = now
+        for timer in self._wheel.advance(elapsed):
+            try:
+                timer.callback()
+            except Exception:  # noqa: BLE001
+                traceback.print_exc()
+        if not self._wheel and self._is_driving():
+            self._stop_driving()
+
+
+# The schedulers currently driven by the viewport tick.
+_ticking: list[TimerScheduler] = []
+
+
+@hook("WillowGame.WillowGameViewportClient:Tick", Type.POST)
+def _viewport_tick(
+    _1: UObject,
+    _2: WrappedStruct,
+    _3: Any,
+    _4: BoundFunction,
+) -> None:
+    for scheduler in list(_ticking):
+        scheduler._on_tick()
+
+
+@command(description="Show how late timers fire and how long their callbacks take, in ms.")
+def timer_stats(args: argparse.Namespace) -> None:
+    if args.action == "enable":
+        instrumentation.enabled = True
+        unrealsdk.logging.info("Timer instrumentation enabled")
+    elif args.action == "disable":
+        instrumentation.enabled = False
+        unrealsdk.logging.info("Timer instrumentation disabled")
+    elif args.action == "reset":
+        instrumentation.reset()
+        unrealsdk.logging.info("Timer stats reset")
+    elif not instrumentation.timers:
+        state = "enabled" if instrumentation.enabled else "disabled, run with 'enable' first"
+        unrealsdk.logging.info(f"No timer stats recorded, instrumentation is {state}")
+    else:
+        for line in instrumentation.summary():
+            unrealsdk.logging.info(line)
+
+
+timer_stats.add_argument(
+    "action",
+    nargs="?",
+    choices=("show", "enable", "disable", "reset"),
+    default="show",
+    help="Show the percentiles, start or stop recording, or throw away what's been recorded.",
+)
+
+
+# Coroutines and rate limits from every mod share one scheduler per clock, so they all run off
+# the same driver.
+_schedulers = {clock: TimerScheduler(clock=clock) for clock in Clock}
+_coroutines = CoroutineScheduler(_schedulers[Clock.GAME])
+spawn = _coroutines.spawn
+sleep = _coroutines.sleep
+gather = _coroutines.gather
+wait_for = _coroutines.wait_for
+
+
+def get_scheduler(clock: Clock = Clock.GAME) -> TimerScheduler:
+    """Get the shared scheduler for a clock.
+
+    Args:
+        clock: Which time the scheduler counts in.
+    Returns:
+        The scheduler.
+    """
+    return _schedulers[clock]
+
+
+def debounce(
+    wait: float, clock: Clock = Clock.GAME
+) -> Callable[[Callable[..., Any]], Debounced]:
+    """Decorator which only runs a function once calls to it have stopped for a while.
+
+    Args:
+        wait: How long calls need to stop for, in seconds.
+        clock: Which time to count in.
+    Returns:
+        A decorator turning a function into a `Debounced`.
+    """
+    return lambda func: Debounced(_schedulers[clock], func, wait)
+
+
+def throttle(
+    interval: float, trailing: bool = True, clock: Clock = Clock.GAME
+) -> Callable[[Callable[..., Any]], Throttled]:
+    """Decorator which runs a function at most once per interval.
+
+    Args:
+        interval: The minimum time between runs, in seconds.
+        trailing: If false, calls during the interval are dropped instead of merged into one
+                  call at the end of it.
+        clock: Which time to count in.
+    Returns:
+        A decorator turning a function into a `Throttled`.
+    """
+    scheduler = _schedulers[clock]
+    return lambda func: Throttled(scheduler, scheduler._now, func, interval, trailing)
+
+
+def token_bucket(rate: float, capacity: float, clock: Clock = Clock.GAME) -> TokenBucket:
+    """Create a token bucket.
+
+    Args:
+        rate: How many tokens are added per second.
+        capacity: The most tokens the bucket can hold, it starts full.
+        clock: Which time to count in.
+    Returns:
+        The new bucket.
+    """
+    return TokenBucket(_schedulers[clock]._now, rate, capacity)
+
+
+# The timer hooks are enabled and disabled by the manager as timers start and stop. Saving the
+# timers on quitting to the title screen always runs, so the saved timers are never left stale.
+build_mod(
+    cls=Library,
+    commands=[timer_stats],
+    hooks=[_return_to_title_screen],
+    options=[_saved_timers],
+)
@@ -0,0 +1,372 @@
+"""Run coroutines which wait on timers, instead of chaining timer callbacks.
+
+Both generators and `async def` coroutines work, a generator yields what a coroutine awaits:
+
+    def flash():
+        for _ in range(3):
+            show()
+            yield sleep(0.5)
+            hide()
+            yield sleep(0.5)
+
+    async def flash():
+        for _ in range(3):
+            show()
+            await sleep(0.5)
+            hide()
+            await sleep(0.5)
+
+Every sleep goes through the same timer scheduler, so however many coroutines are waiting, they
+all share one engine timer.
+
+Nothing in here touches unrealsdk, the scheduler is driven by whatever it's given to run timers.
+"""
+
+from __future__ import annotations
+
+import traceback
+from collections.abc import Awaitable, Callable, Coroutine, Generator
+from typing import Any, Protocol
+
+__all__: tuple[str, ...] = (
+    "CancelledError",
+    "CoroutineScheduler",
+    "Future",
+    "Task",
+)
+
+# Anything which can be run as a task.
+TaskCoroutine = Coroutine[Any, Any, Any] | Generator[Any, Any, Any]
+
+
+class CancelledError(BaseException):
+    """Raised inside a coroutine when its task is cancelled, and by results of cancelled futures.
+
+    Like asyncio's, this isn't an `Exception`, so it isn't swallowed by `except Exception`.
+    """
+
+
+class _Timers(Protocol):
+    def call_later(self, delay: float, callback: Callable[[], None]) -> Any: ...
+    def cancel(self, timer: Any) -> bool: ...
+
+
+class Future:
+    """A result which will be available later.
+
+    Can be awaited from a coroutine, or yielded from a generator, to wait for the result.
+    """
+
+    def __init__(self) -> None:  # noqa: D107
+        self._done = False
+        self._cancelled = False
+        self._result: Any = None
+        self._exception: BaseException | None = None
+        self._callbacks: list[Callable[[Future], None]] = []
+
+    def __await__(self) -> Generator[Future, Any, Any]:
+        if not self._done:
+            yield self
+        return self.result()
+
+    def done(self) -> bool:
+        """Check if the future has a result, an exception, or was cancelled."""
+        return self._done
+
+    def cancelled(self) -> bool:
+        """Check if the future was cancelled."""
+        return self._cancelled
+
+    def result(self) -> Any:
+        """Get the result of the future, raising its exception if it has one.
+
+        Returns:
+            The result.
+        """
+        if not self._done:
+            msg = "Future isn't done yet."
+            raise RuntimeError(msg)
+        if self._cancelled:
+            raise CancelledError
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def exception(self) -> BaseException | None:
+        """Get the exception the future finished with, if any."""
+        if not self._done:
+            msg = "Future isn't done yet."
+            raise RuntimeError(msg)
+        if self._cancelled:
+            raise CancelledError
+        return self._exception
+
+    def add_done_callback(self, callback: Callable[[Future], None]) -> None:
+        """Call a function with the future once it's done, or straight away if it already is."""
+        if self._done:
+            callback(self)
+        else:
+            self._callbacks.append(callback)
+
+    def remove_done_callback(self, callback: Callable[[Future], None]) -> None:
+        """Stop a function from being called when the future is done."""
+        if callback in self._callbacks:
+            self._callbacks.remove(callback)
+
+    def set_result(self, result: Any) -> None:
+        """Finish the future with a result."""
+        self._finish(result=result)
+
+    def set_exception(self, exception: BaseException) -> None:
+        """Finish the future with an exception."""
+        self._finish(exception=exception)
+
+    def cancel(self) -> bool:
+        """Cancel the future.
+
+        Returns:
+            True if the future was cancelled, false if it was already done.
+        """
+        if self._done:
+            return False
+        self._cancelled = True
+        self._finish()
+        return True
+
+    def _finish(self, result: Any = None, exception: BaseException | None = None) -> None:
+        if self._done:
+            msg = "Future is already done."
+            raise RuntimeError(msg)
+        self._done = True
+        self._result = result
+        self._exception = exception
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+
+class Task(Future):
+    """Runs a coroutine, finishing with whatever it returns.
+
+    Cancelling a task raises `CancelledError` inside the coroutine at the point it's waiting, and
+    cancels whatever it was waiting on.
+    """
+
+    def __init__(  # noqa: D107
+        self, scheduler: CoroutineScheduler, coroutine: TaskCoroutine
+    ) -> None:
+        super().__init__()
+        self._scheduler = scheduler
+        self._coroutine = coroutine
+        self._waiting: Future | None = None
+        self._running = False
+        self._must_cancel = False
+
+    def cancel(self) -> bool:  # noqa: D102
+        if self._done:
+            return False
+        if self._running:
+            # Can't throw into a running coroutine, cancel whatever it yields next instead.
+            self._must_cancel = True
+        elif self._waiting is not None:
+            self._waiting.cancel()
+        else:
+            self._step(exception=CancelledError())
+        return True
+
+    def _step(self, value: Any = None, exception: BaseException | None = None) -> None:
+        self._waiting = None
+        self._running = True
+        try:
+            if exception is not None:
+                yielded = self._coroutine.throw(exception)
+            else:
+                yielded = self._coroutine.send(value)
+        except StopIteration as e:
+            self._running = False
+            self.set_result(e.value)
+            return
+        except CancelledError:
+            self._running = False
+            super().cancel()
+            return
+        except Exception as e:  # noqa: BLE001
+            self._running = False
+            self._fail(e)
+            return
+        self._running = False
+
+        if yielded is None:
+            # A bare yield waits for the next tick.
+            yielded = self._scheduler.sleep(0)
+        if not isinstance(yielded, Future):
+            self._step(
+                exception=TypeError(f"Coroutines can only wait on futures, not {yielded!r}")
+            )
+            return
+        self._waiting = yielded
+        yielded.add_done_callback(self._wakeup)
+        if self._must_cancel:
+            self._must_cancel = False
+            yielded.cancel()
+
+    def _wakeup(self, future: Future) -> None:
+        if future.cancelled():
+            self._step(exception=CancelledError())
+        elif (exception := future.exception()) is not None:
+            self._step(exception=exception)
+        else:
+            self._step(future.result())
+
+    def _fail(self, exception: BaseException) -> None:
+        # Nothing's waiting on the task, so the exception would otherwise vanish.
+        if not self._callbacks:
+            traceback.print_exception(exception)
+        self.set_exception(exception)
+
+
+class CoroutineScheduler:
+    """Runs coroutines, using a timer scheduler for all of their sleeps.
+
+    Args:
+        timers: The timer scheduler, anything with `call_later` and `cancel`, e.g. a
+                `TimerScheduler`.
+    """
+
+    def __init__(self, timers: _Timers) -> None:  # noqa: D107
+        self._timers = timers
+
+    def spawn(self, coroutine: TaskCoroutine) -> Task:
+        """Start running a coroutine.
+
+        It runs straight away, up until the first time it waits.
+
+        Args:
+            coroutine: The coroutine or generator to run.
+        Returns:
+            The task running it.
+        """
+        task = Task(self, coroutine)
+        task._step()
+        return task
+
+    def sleep(self, delay: float, result: Any = None) -> Future:
+        """Get a future which finishes after a delay.
+
+        Args:
+            delay: How long to wait, in seconds.
+            result: The result to finish with.
+        Returns:
+            The future.
+        """
+        future = Future()
+
+        def on_timer() -> None:
+            if not future.done():
+                future.set_result(result)
+
+        def on_done(future: Future) -> None:
+            if future.cancelled():
+                self._timers.cancel(timer)
+
+        timer = self._timers.call_later(delay, on_timer)
+        future.add_done_callback(on_done)
+        return future
+
+    def _ensure_future(self, awaitable: Awaitable[Any] | TaskCoroutine) -> Future:
+        if isinstance(awaitable, Future):
+            return awaitable
+        return self.spawn(awaitable)  # type: ignore[arg-type]
+
+    def gather(self, *awaitables: Awaitable[Any] | TaskCoroutine) -> Future:
+        """Wait for several things at once.
+
+        If any of them fails or is cancelled, the rest are cancelled, and the gather fails the
+        same way. Cancelling the gather cancels all of them.
+
+        Args:
+            *awaitables: Futures, tasks or coroutines to wait on, coroutines are spawned.
+        Returns:
+            A future finishing with a list of all of their results, in the same order.
+        """
+        futures = [self._ensure_future(awaitable) for awaitable in awaitables]
+        outer = Future()
+        remaining = len(futures)
+        if remaining == 0:
+            outer.set_result([])
+            return outer
+
+        def on_child_done(child: Future) -> None:
+            nonlocal remaining
+            if outer.done():
+                return
+            if child.cancelled() or child.exception() is not None:
+                for future in futures:
+                    future.remove_done_callback(on_child_done)
+                    future.cancel()
+                if child.cancelled():
+                    outer.cancel()
+                else:
+                    outer.set_exception(child.exception())  # type: ignore[arg-type]
+                return
+            remaining -= 1
+            if remaining == 0:
+                outer.set_result([future.result() for future in futures])
+
+        def on_outer_done(outer: Future) -> None:
+            if outer.cancelled():
+                for future in futures:
+                    future.cancel()
+
+        for future in futures:
+            future.add_done_callback(on_child_done)
+        outer.add_done_callback(on_outer_done)
+        return outer
+
+    def wait_for(self, awaitable: Awaitable[Any] | TaskCoroutine, timeout: float) -> Future:
+        """Wait for something, giving up after a timeout.
+
+        Args:
+            awaitable: The future, task or coroutine to wait on, coroutines are spawned.
+            timeout: How long to wait, in seconds.
+        Returns:
+            A future finishing the same way, or with a `TimeoutError` if it took too long, in
+            which case the inner one is cancelled.
+        """
+        inner = self._ensure_future(awaitable)
+        outer = Future()
+        if inner.done():
+            self._copy_state(inner, outer)
+            return outer
+        timer = None
+
+        def on_timeout() -> None:
+            if outer.done():
+                return
+            inner.remove_done_callback(on_inner_done)
+            inner.cancel()
+            outer.set_exception(TimeoutError(f"Timed out after {timeout}s"))
+
+        def on_inner_done(inner: Future) -> None:
+            self._timers.cancel(timer)
+            if not outer.done():
+                self._copy_state(inner, outer)
+
+        def on_outer_done(outer: Future) -> None:
+            if outer.cancelled():
+                self._timers.cancel(timer)
+                inner.cancel()
+
+        timer = self._timers.call_later(timeout, on_timeout)
+        inner.add_done_callback(on_inner_done)
+        outer.add_done_callback(on_outer_done)
+        return outer
+
+    @staticmethod
+    def _copy_state(src: Future, dst: Future) -> None:
+        if src.cancelled():
+            dst.cancel()
+        elif (exception := src.exception()) is not None:
+            dst.set_exception(exception)
+        else:
+            dst.set_result(src.result())
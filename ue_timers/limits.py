@@ -0,0 +1,200 @@
+"""Ways to call something less often than it's asked to be called.
+
+Hooks like `PlayerTick` or `BeginFire` can run far more often than the work they trigger needs
+to. `Debounced` waits for the calls to stop before running once, `Throttled` runs at most once
+per interval, and `TokenBucket` allows short bursts while capping the average rate.
+
+Nothing in here touches unrealsdk, delays go through whatever timer scheduler is given, and times
+come from the given clock.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any, Protocol
+
+__all__: tuple[str, ...] = ("Debounced", "Throttled", "TokenBucket")
+
+
+class _Timers(Protocol):
+    def call_later(self, delay: float, callback: Callable[[], None]) -> Any: ...
+    def cancel(self, timer: Any) -> bool: ...
+
+
+class _Deferred:
+    """Holds the latest arguments of a call which is waiting on a timer."""
+
+    def __init__(self, timers: _Timers, func: Callable[..., Any]) -> None:
+        self._timers = timers
+        self.func = func
+        self._timer: Any = None
+        self._args: tuple[Any, ...] = ()
+        self._kwargs: dict[str, Any] = {}
+
+    @property
+    def pending(self) -> bool:
+        """Check if there's a call waiting to run."""
+        return self._timer is not None
+
+    def cancel(self) -> bool:
+        """Drop the waiting call, if there is one.
+
+        Returns:
+            True if a call was dropped.
+        """
+        if self._timer is None:
+            return False
+        self._timers.cancel(self._timer)
+        self._timer = None
+        self._args = ()
+        self._kwargs = {}
+        return True
+
+    def flush(self) -> None:
+        """Run the waiting call straight away, if there is one."""
+        if self._timer is not None:
+            self._timers.cancel(self._timer)
+            self._fire()
+
+    def _defer(self, delay: float, args: tuple[Any, ...], kwargs: dict[str, Any]) -> None:
+        self._args = args
+        self._kwargs = kwargs
+        if self._timer is None:
+            self._timer = self._timers.call_later(delay, self._fire)
+
+    def _fire(self) -> None:
+        args, kwargs = self._args, self._kwargs
+        self._timer = None
+        self._args = ()
+        self._kwargs = {}
+        self._run(args, kwargs)
+
+    def _run(self, args: tuple[Any, ...], kwargs: dict[str, Any]) -> None:
+        self.func(*args, **kwargs)
+
+
+class Debounced(_Deferred):
+    """Only runs a function once calls to it have stopped for a while.
+
+    Each call restarts the wait, the function then runs once with the arguments of the last call.
+
+    Args:
+        timers: The timer scheduler, anything with `call_later` and `cancel`.
+        func: The function to run.
+        wait: How long calls need to stop for, in seconds.
+    """
+
+    def __init__(  # noqa: D107
+        self, timers: _Timers, func: Callable[..., Any], wait: float
+    ) -> None:
+        super().__init__(timers, func)
+        self.wait = wait
+
+    def __call__(self, *args: Any, **kwargs: Any) -> None:
+        if self._timer is not None:
+            self._timers.cancel(self._timer)
+            self._timer = None
+        self._defer(self.wait, args, kwargs)
+
+
+class Throttled(_Deferred):
+    """Runs a function at most once per interval.
+
+    The first call runs straight away. Calls during the interval after it are merged into a
+    single trailing call, run with the latest arguments once the interval is up.
+
+    Args:
+        timers: The timer scheduler, anything with `call_later` and `cancel`.
+        clock: Gets the current time, in seconds.
+        func: The function to run.
+        interval: The minimum time between runs, in seconds.
+        trailing: If false, calls during the interval are dropped instead.
+    """
+
+    def __init__(  # noqa: D107
+        self,
+        timers: _Timers,
+        clock: Callable[[], float],
+        func: Callable[..., Any],
+        interval: float,
+        trailing: bool = True,
+    ) -> None:
+        super().__init__(timers, func)
+        self._clock = clock
+        self.interval = interval
+        self.trailing = trailing
+        self._last_run: float | None = None
+
+    def __call__(self, *args: Any, **kwargs: Any) -> None:
+        now = self._clock()
+        # The clock going backwards means it was reset, e.g. game time on a new map.
+        if self._last_run is None or not self._last_run <= now < self._last_run + self.interval:
+            if self._timer is not None:
+                self.cancel()
+            self._run(args, kwargs)
+        elif self.trailing:
+            self._defer(self._last_run + self.interval - now, args, kwargs)
+
+    def _run(self, args: tuple[Any, ...], kwargs: dict[str, Any]) -> None:
+        self._last_run = self._clock()
+        self.func(*args, **kwargs)
+
+
+class TokenBucket:
+    """Limits how often something may happen, while still allowing short bursts.
+
+    The bucket holds up to `capacity` tokens, and refills at `rate` tokens per second. Each action
+    takes tokens out, and isn't allowed if there aren't enough left.
+
+    Args:
+        clock: Gets the current time, in seconds.
+        rate: How many tokens are added per second.
+        capacity: The most tokens the bucket can hold, it starts full.
+    """
+
+    def __init__(  # noqa: D107
+        self, clock: Callable[[], float], rate: float, capacity: float
+    ) -> None:
+        self._clock = clock
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        # Only read the clock once it's used, buckets are usually made before there's a game.
+        self._last: float | None = None
+
+    @property
+    def tokens(self) -> float:
+        """How many tokens are currently available."""
+        self._refill()
+        return self._tokens
+
+    def _refill(self) -> None:
+        now = self._clock()
+        if self._last is None or now < self._last:
+            # Either the first use, or the clock was reset, count it as no time having passed.
+            self._last = now
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Take tokens out of the bucket, if there are enough.
+
+        Args:
+            tokens: How many to take.
+        Returns:
+            True if they were taken, false if there weren't enough, in which case none are taken.
+        """
+        self._refill()
+        if self._tokens < tokens:
+            return False
+        self._tokens -= tokens
+        return True
+
+    def time_until(self, tokens: float = 1) -> float:
+        """Get how long until enough tokens will be available, in seconds."""
+        self._refill()
+        if self._tokens >= tokens:
+            return 0
+        if self.rate <= 0:
+            return float("inf")
+        return (tokens - self._tokens) / self.rate
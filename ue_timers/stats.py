@@ -0,0 +1,158 @@
+"""Records how late timers fire and how long their callbacks take.
+
+Samples go into fixed size ring buffers, so recording never allocates and old samples simply
+fall off the end.
+
+Nothing in here touches unrealsdk, times are passed in by the caller.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Iterator
+
+__all__: tuple[str, ...] = ("Instrumentation", "RingBuffer", "TimerStats", "percentile")
+
+PERCENTILES = (50, 90, 99)
+
+
+class RingBuffer:
+    """Keeps the last `size` samples.
+
+    Args:
+        size: How many samples to keep.
+    """
+
+    __slots__ = ("_pos", "_samples", "count")
+
+    def __init__(self, size: int) -> None:  # noqa: D107
+        self._samples = [0.0] * size
+        self._pos = 0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return min(self.count, len(self._samples))
+
+    def append(self, sample: float) -> None:
+        """Add a sample, replacing the oldest one once full."""
+        self._samples[self._pos] = sample
+        self._pos = (self._pos + 1) % len(self._samples)
+        self.count += 1
+
+    def values(self) -> list[float]:
+        """Get the samples currently held, oldest first."""
+        if self.count < len(self._samples):
+            return self._samples[: self.count]
+        return self._samples[self._pos :] + self._samples[: self._pos]
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    """Get a percentile of some sorted samples, interpolating between the closest two.
+
+    Args:
+        ordered: The samples, sorted.
+        pct: The percentile, from 0 to 100.
+    Returns:
+        The percentile, or nan if there are no samples.
+    """
+    if not ordered:
+        return math.nan
+    pos = (len(ordered) - 1) * pct / 100
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+class TimerStats:
+    """The recorded samples of a single timer.
+
+    `drift` holds how many seconds after it was due each fire happened, `cost` how many seconds
+    of wall time each callback took. A fire is counted as an overrun when it's late by at least
+    a whole period, i.e. at least one fire of a looping timer was missed.
+    """
+
+    __slots__ = ("cost", "drift", "overruns")
+
+    def __init__(self, size: int) -> None:  # noqa: D107
+        self.drift = RingBuffer(size)
+        self.cost = RingBuffer(size)
+        self.overruns = 0
+
+    @property
+    def jitter(self) -> float:
+        """The standard deviation of the drift."""
+        drift = self.drift.values()
+        if len(drift) < 2:  # noqa: PLR2004
+            return 0
+        mean = sum(drift) / len(drift)
+        return math.sqrt(sum((sample - mean) ** 2 for sample in drift) / (len(drift) - 1))
+
+
+class Instrumentation:
+    """Collects `TimerStats` by timer name.
+
+    Starts disabled, callers are expected to check `enabled` before measuring anything, so it
+    costs a single attribute lookup while off.
+
+    Args:
+        size: How many samples to keep per timer.
+    """
+
+    def __init__(self, size: int = 256) -> None:  # noqa: D107
+        self.enabled = False
+        self.size = size
+        self.timers: dict[str, TimerStats] = {}
+
+    def reset(self) -> None:
+        """Throw away every sample."""
+        self.timers.clear()
+
+    def _get(self, name: str) -> TimerStats:
+        stats = self.timers.get(name)
+        if stats is None:
+            stats = self.timers[name] = TimerStats(self.size)
+        return stats
+
+    def record(
+        self,
+        name: str,
+        due: float | None,
+        fired: float,
+        cost: float,
+        period: float,
+    ) -> None:
+        """Record a timer firing.
+
+        Args:
+            name: The name of the timer.
+            due: When it was meant to fire, in game seconds, or None if unknown.
+            fired: When it actually fired, in game seconds.
+            cost: How long the callback took, in wall seconds.
+            period: The duration of the timer.
+        """
+        stats = self._get(name)
+        stats.cost.append(cost)
+        if due is None:
+            return
+        drift = fired - due
+        stats.drift.append(drift)
+        if period > 0 and drift >= period:
+            stats.overruns += 1
+
+    def summary(self) -> Iterator[str]:
+        """Format the percentiles of every timer as human readable lines, in milliseconds."""
+        drift_header = " ".join(f"{f'drift p{pct}':>9}" for pct in PERCENTILES)
+        cost_header = " ".join(f"{f'cost p{pct}':>9}" for pct in PERCENTILES)
+        yield (
+            f"{'timer':<40} {'fires':>6} {'overruns':>8}  {drift_header} {'jitter':>9}"
+            f"  {cost_header}"
+        )
+        for name, stats in sorted(self.timers.items()):
+            drift = sorted(stats.drift.values())
+            cost = sorted(stats.cost.values())
+            drift_text = " ".join(f"{percentile(drift, pct) * 1000:9.2f}" for pct in PERCENTILES)
+            cost_text = " ".join(f"{percentile(cost, pct) * 1000:9.3f}" for pct in PERCENTILES)
+            yield (
+                f"{name:<40} {stats.cost.count:>6} {stats.overruns:>8}  {drift_text}"
+                f" {stats.jitter * 1000:9.2f}  {cost_text}"
+            )
@@ -0,0 +1,152 @@
+"""Stand-ins for the game's modules, so `ue_timers` can be imported outside the game.
+
+There's deliberately no `__init__.py` in here, so collecting these tests doesn't import
+`ue_timers` itself, they only ever see it through the `ue_timers` fixture.
+"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+from typing import Any
+
+import pytest
+
+
+class FakeHook:
+    """A hook which is only ever called directly, and tracks if it's been enabled."""
+
+    def __init__(self, func: Callable[..., Any]) -> None:
+        self.func = func
+        self.enabled = False
+
+    def __call__(self, *args: Any) -> Any:
+        return self.func(*args)
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+
+class FakeCommand:
+    def __init__(self, func: Callable[..., Any]) -> None:
+        self.func = func
+        self.arguments: list[tuple[Any, ...]] = []
+
+    def add_argument(self, *args: Any, **kwargs: Any) -> None:
+        self.arguments.append((args, kwargs))
+
+
+class FakeHiddenOption:
+    """Like the real option, the value starts out as the default object itself."""
+
+    def __class_getitem__(cls, _: Any) -> type[FakeHiddenOption]:
+        return cls
+
+    def __init__(self, identifier: str, value: Any) -> None:
+        self.identifier = identifier
+        self.default_value = value
+        self.value = value
+        self.saves = 0
+
+    def save(self) -> None:
+        self.saves += 1
+
+
+class FakeActor:
+    def __init__(self) -> None:
+        self.Timers: list[SimpleNamespace] = []
+
+
+class FakeWeakPointer:
+    def __init__(self, obj: Any = None) -> None:
+        self.obj = obj
+
+    def __call__(self) -> Any:
+        return self.obj
+
+
+def _module(name: str, **attrs: Any) -> ModuleType:
+    module = ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+def _build_mod(**kwargs: Any) -> None:
+    _build_mod.kwargs = kwargs  # type: ignore[attr-defined]
+
+
+def _forget_ue_timers() -> None:
+    for name in [name for name in sys.modules if name.split(".")[0] == "ue_timers"]:
+        del sys.modules[name]
+
+
+def _install_stand_ins(monkeypatch: pytest.MonkeyPatch) -> None:
+    world_info = SimpleNamespace(
+        TimeSeconds=0.0,
+        AudioTimeSeconds=0.0,
+        Spawn=lambda _: FakeActor(),
+    )
+    pc = SimpleNamespace(WorldInfo=world_info)
+    stand_ins = {
+        "unrealsdk": _module(
+            "unrealsdk",
+            find_class=lambda name: name,
+            make_struct=lambda _, **fields: SimpleNamespace(**fields),
+            logging=SimpleNamespace(info=lambda _: None),
+        ),
+        "unrealsdk.hooks": _module("unrealsdk.hooks", Type=SimpleNamespace(PRE=0, POST=1)),
+        "unrealsdk.unreal": _module(
+            "unrealsdk.unreal",
+            BoundFunction=object,
+            UObject=object,
+            WeakPointer=FakeWeakPointer,
+            WrappedStruct=object,
+        ),
+        "mods_base": _module(
+            "mods_base",
+            HiddenOption=FakeHiddenOption,
+            Library=object,
+            build_mod=_build_mod,
+            command=lambda **_: FakeCommand,
+            get_pc=lambda: pc,
+            hook=lambda *_: FakeHook,
+        ),
+    }
+    monkeypatch.syspath_prepend(str(Path(__file__).parents[2]))
+    for name, module in stand_ins.items():
+        monkeypatch.setitem(sys.modules, name, module)
+
+
+_STAND_INS = pytest.StashKey[pytest.MonkeyPatch]()
+
+
+# Setting up the first test imports the `ue_timers` package, so the stand-ins need to be in place
+# from the start of setup to the end of teardown, which is wider than any fixture.
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_setup(item: pytest.Item) -> Iterator[None]:
+    monkeypatch = pytest.MonkeyPatch()
+    item.stash[_STAND_INS] = monkeypatch
+    _install_stand_ins(monkeypatch)
+    return (yield)
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_teardown(item: pytest.Item) -> Iterator[None]:
+    try:
+        return (yield)
+    finally:
+        _forget_ue_timers()
+        item.stash[_STAND_INS].undo()
+
+
+@pytest.fixture
+def ue_timers() -> ModuleType:
+    """Import a fresh copy of `ue_timers` against the stand-ins."""
+    _forget_ue_timers()
+    return importlib.import_module("ue_timers")
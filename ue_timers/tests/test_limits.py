@@ -0,0 +1,189 @@
+"""Tests of debouncing, throttling and token buckets."""
+
+from __future__ import annotations
+
+import sys
+from collections.abc import Callable
+from types import ModuleType
+from typing import Any
+
+import pytest
+
+
+class FakeTimers:
+    """A timer scheduler and clock which only move when told to."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.waiting: dict[int, tuple[float, Callable[[], None]]] = {}
+        self._next_id = 0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> int:
+        self._next_id += 1
+        self.waiting[self._next_id] = (self.now + delay, callback)
+        return self._next_id
+
+    def cancel(self, timer: int) -> bool:
+        return self.waiting.pop(timer, None) is not None
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+        for timer, (due, callback) in sorted(self.waiting.items(), key=lambda item: item[1][0]):
+            if due <= self.now and self.waiting.pop(timer, None) is not None:
+                callback()
+
+
+@pytest.fixture
+def limits(ue_timers: ModuleType) -> ModuleType:
+    return sys.modules["ue_timers.limits"]
+
+
+@pytest.fixture
+def timers() -> FakeTimers:
+    return FakeTimers()
+
+
+def test_debounced_runs_once_with_last_call(limits: ModuleType, timers: FakeTimers) -> None:
+    calls: list[Any] = []
+    debounced = limits.Debounced(timers, calls.append, 1)
+
+    for value in range(3):
+        debounced(value)
+        timers.advance(0.5)
+    assert calls == []
+    assert len(timers.waiting) == 1
+
+    timers.advance(0.5)
+    assert calls == [2]
+    assert not debounced.pending
+
+
+def test_debounced_cancel_and_flush(limits: ModuleType, timers: FakeTimers) -> None:
+    calls: list[Any] = []
+    debounced = limits.Debounced(timers, calls.append, 1)
+
+    debounced(1)
+    assert debounced.cancel()
+    assert not debounced.cancel()
+    timers.advance(2)
+    assert calls == []
+
+    debounced(2)
+    debounced.flush()
+    assert calls == [2]
+    assert timers.waiting == {}
+
+
+def test_throttled_leading_and_trailing(limits: ModuleType, timers: FakeTimers) -> None:
+    calls: list[Any] = []
+    throttled = limits.Throttled(timers, timers, calls.append, 1)
+
+    throttled(1)
+    assert calls == [1]
+    throttled(2)
+    timers.advance(0.25)
+    throttled(3)
+    assert calls == [1]
+
+    timers.advance(0.75)
+    assert calls == [1, 3]
+    # The trailing call starts a new interval.
+    throttled(4)
+    assert calls == [1, 3]
+    timers.advance(1)
+    assert calls == [1, 3, 4]
+
+    timers.advance(5)
+    throttled(5)
+    assert calls == [1, 3, 4, 5]
+
+
+def test_throttled_no_trailing(limits: ModuleType, timers: FakeTimers) -> None:
+    calls: list[Any] = []
+    throttled = limits.Throttled(timers, timers, calls.append, 1, trailing=False)
+
+    throttled(1)
+    throttled(2)
+    timers.advance(1)
+    assert calls == [1]
+    assert timers.waiting == {}
+
+    throttled(3)
+    assert calls == [1, 3]
+
+
+def test_throttled_clock_reset(limits: ModuleType, timers: FakeTimers) -> None:
+    calls: list[Any] = []
+    throttled = limits.Throttled(timers, timers, calls.append, 10)
+
+    timers.now = 100
+    throttled(1)
+    throttled(2)
+    assert throttled.pending
+
+    # Game time starts again on a new map, which shouldn't leave calls stuck for 100 seconds.
+    timers.now = 0
+    throttled(3)
+    assert calls == [1, 3]
+    assert not throttled.pending
+    assert timers.waiting == {}
+
+
+def test_token_bucket_burst_and_refill(limits: ModuleType, timers: FakeTimers) -> None:
+    bucket = limits.TokenBucket(timers, 2, 3)
+
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    assert bucket.time_until() == pytest.approx(0.5)
+    assert bucket.time_until(3) == pytest.approx(1.5)
+
+    timers.advance(0.5)
+    assert bucket.tokens == pytest.approx(1)
+    assert not bucket.try_acquire(2)
+    assert bucket.tokens == pytest.approx(1)
+
+    timers.advance(10)
+    assert bucket.tokens == 3
+    assert bucket.time_until(3) == 0
+
+
+def test_token_bucket_no_rate(limits: ModuleType, timers: FakeTimers) -> None:
+    bucket = limits.TokenBucket(timers, 0, 1)
+
+    assert bucket.try_acquire()
+    timers.advance(100)
+    assert not bucket.try_acquire()
+    assert bucket.time_until() == float("inf")
+
+
+def test_token_bucket_clock_reset(limits: ModuleType, timers: FakeTimers) -> None:
+    timers.now = 50
+    bucket = limits.TokenBucket(timers, 1, 2)
+    bucket.try_acquire(2)
+
+    # Game time starts again on a new map, which shouldn't count as time passing.
+    timers.now = 0
+    assert bucket.tokens == 0
+    timers.advance(1)
+    assert bucket.tokens == pytest.approx(1)
+
+
+def test_shared_schedulers(ue_timers: ModuleType) -> None:
+    world_info = ue_timers.get_pc().WorldInfo
+    calls: list[Any] = []
+    debounced = ue_timers.debounce(1)(calls.append)
+    bucket = ue_timers.token_bucket(1, 1)
+    scheduler = ue_timers.get_scheduler()
+
+    world_info.TimeSeconds = 10
+    assert bucket.try_acquire()
+    debounced(1)
+    assert scheduler._is_driving()
+
+    world_info.TimeSeconds = 11.5
+    scheduler._on_tick()
+    assert calls == [1]
+    assert bucket.try_acquire()
+    assert not scheduler._is_driving()
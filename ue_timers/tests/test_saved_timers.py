@@ -0,0 +1,96 @@
+"""Tests of saving named timers on quitting to the title screen, and restoring them."""
+
+from __future__ import annotations
+
+from types import ModuleType
+
+
+def _quit_to_title(ue_timers: ModuleType) -> None:
+    ue_timers._return_to_title_screen(None, None, None, None)
+
+
+def _saved(duration: float, loop: bool, elapsed: float, paused: bool) -> dict[str, object]:
+    return {"duration": duration, "loop": loop, "elapsed": elapsed, "paused": paused}
+
+
+def test_title_screen_saves_named_timers(ue_timers: ModuleType) -> None:
+    named = ue_timers.UnrealTimer(lambda: None, name="named")
+    unnamed = ue_timers.UnrealTimer(lambda: None)
+    named.start(5, True)
+    unnamed.start(3, False)
+    named._timer_data.Count = 2
+    named.pause()
+
+    _quit_to_title(ue_timers)
+
+    assert ue_timers._saved_timers.value == {"named": _saved(5, True, 2, True)}
+    assert ue_timers._saved_timers.saves == 1
+
+
+def test_title_screen_clears_stale_timers(ue_timers: ModuleType) -> None:
+    # Saved by an older session, which was quit again without restoring it.
+    ue_timers._saved_timers.value = {"named": _saved(5, False, 2, False)}
+
+    _quit_to_title(ue_timers)
+
+    assert ue_timers._saved_timers.value == {}
+    assert ue_timers._saved_timers.saves == 1
+    assert not ue_timers.UnrealTimer(lambda: None, name="named").restore()
+
+
+def test_title_screen_skips_saving_nothing(ue_timers: ModuleType) -> None:
+    _quit_to_title(ue_timers)
+
+    assert ue_timers._saved_timers.value == {}
+    assert ue_timers._saved_timers.saves == 0
+
+
+def test_title_screen_hook_always_registered(ue_timers: ModuleType) -> None:
+    assert ue_timers._return_to_title_screen not in ue_timers._HOOKS
+    assert ue_timers._return_to_title_screen in ue_timers.build_mod.kwargs["hooks"]
+
+
+def test_restore(ue_timers: ModuleType) -> None:
+    loaded = {"named": _saved(5, True, 2, True), "other": _saved(1, False, 0, False)}
+    ue_timers._saved_timers.value = loaded
+    timer = ue_timers.UnrealTimer(lambda: None, name="named")
+
+    assert timer.restore()
+
+    assert timer.is_running()
+    assert timer.is_paused()
+    assert (timer.duration, timer.loop) == (5, True)
+    assert (timer._timer_data.Rate, timer._timer_data.Count) == (5, 2)
+    assert ue_timers._saved_timers.value == {"other": _saved(1, False, 0, False)}
+    assert ue_timers._saved_timers.saves == 1
+    # The loaded dict is replaced, not modified.
+    assert "named" in loaded
+    assert ue_timers._saved_timers.default_value == {}
+
+
+def test_restore_round_trip(ue_timers: ModuleType) -> None:
+    timer = ue_timers.UnrealTimer(lambda: None, name="named")
+    timer.start(5, False)
+    timer._timer_data.Count = 4
+    _quit_to_title(ue_timers)
+    timer.stop()
+
+    assert ue_timers.UnrealTimer(lambda: None, name="named").restore()
+    assert not ue_timers.UnrealTimer(lambda: None, name="named").restore()
+
+
+def test_restore_nothing_saved(ue_timers: ModuleType) -> None:
+    assert not ue_timers.UnrealTimer(lambda: None, name="named").restore()
+    assert not ue_timers.UnrealTimer(lambda: None).restore()
+    assert ue_timers._saved_timers.saves == 0
+
+
+def test_restore_running_timer(ue_timers: ModuleType) -> None:
+    ue_timers._saved_timers.value = {"named": _saved(5, False, 2, False)}
+    timer = ue_timers.UnrealTimer(lambda: None, name="named")
+    timer.start(1, True)
+
+    assert not timer.restore()
+
+    assert (timer._timer_data.Rate, timer._timer_data.Count) == (1, 0)
+    assert ue_timers._saved_timers.value == {}